@@ -0,0 +1,236 @@
+# Auslastungsstatistik aus vorberechneten Rollups (/admin/analytics)
+#
+# Die Statistik über ein Halb- oder Schuljahr würde sonst bei jedem Aufruf
+# alle Buchungen lesen und jedes students_json parsen. refresh_rollups()
+# macht das einmal (nachts per Cron oder über den Button auf der Seite) und
+# schreibt die Summen nach booking_rollups: Schüler*innen und Buchungen pro
+# Datum, Stunde, Lehrkraft, Angebot und Klasse. Archivierte Schuljahre
+# (archive.py) werden mitgezählt; ihre Rollups bleiben nach der Archivierung
+# erhalten.
+#
+# Die Seite liest nur booking_rollups und die Sperren des Zeitraums. Belegung
+# und Kapazität liegen als array-Zähler über dem Raster Schultag × Stunde
+# (Index = Tag * Stunden + Stunde - 1); Wochentag/Stunde, Monat usw. sind
+# Summen über Ausschnitte dieses Rasters.
+#
+# Ausführen:
+#   python analytics.py          # Rollups des laufenden Schuljahres neu berechnen
+#   python analytics.py 2025     # Schuljahr 2025/26
+
+import json
+import logging
+import sys
+import time
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert
+
+from archive import current_school_year, school_year_bounds
+from config import FIXED_OFFERS, FREE_MODULES, MAX_STUDENTS_PER_PERIOD, PERIOD_TIMES
+from database import db
+from models import (BlockedSlot, BlockedSlotArchive, Booking, BookingArchive, BookingRollup, RollupRun,
+                    User)
+
+logger = logging.getLogger(__name__)
+
+PERIODS = tuple(sorted(PERIOD_TIMES))
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri')
+WEEKDAY_NAMES = {'Mon': 'Montag', 'Tue': 'Dienstag', 'Wed': 'Mittwoch', 'Thu': 'Donnerstag', 'Fri': 'Freitag'}
+ROLLUP_BATCH = 500
+
+
+def _school_year_range(start_year):
+    """Erster und letzter Tag eines Schuljahres als 'YYYY-MM-DD'"""
+    first_day, next_year = school_year_bounds(start_year)
+    return first_day, (date.fromisoformat(next_year) - timedelta(days=1)).isoformat()
+
+
+def term_ranges(start_year):
+    """Schuljahr und Halbjahre (1. Halbjahr bis Ende Januar) für die Auswahl auf der Seite"""
+    first_day, last_day = _school_year_range(start_year)
+    february = date(start_year + 1, 2, 1)
+    return [
+        ('Schuljahr', first_day, last_day),
+        ('1. Halbjahr', first_day, (february - timedelta(days=1)).isoformat()),
+        ('2. Halbjahr', february.isoformat(), last_day),
+    ]
+
+
+def refresh_rollups(first_day, last_day):
+    """
+    Berechnet booking_rollups für einen Zeitraum neu (Live- und Archivtabelle).
+
+    Liest die Buchungen mit yield_per und ersetzt die Rollups des Zeitraums in
+    einer Transaktion.
+
+    Returns:
+        Anzahl geschriebener Rollup-Zeilen
+    """
+    started = time.perf_counter()
+    students_total = Counter()
+    bookings_total = Counter()
+    for model in (BookingArchive, Booking):
+        rows = db.session.query(
+            model.date, model.period, model.teacher_id, model.offer_type, model.offer_label, model.students_json
+        ).filter(model.date >= first_day, model.date <= last_day).yield_per(ROLLUP_BATCH)
+        for booking_date, period, teacher_id, offer_type, offer_label, students_json in rows:
+            students = json.loads(students_json) if students_json else []
+            classes = Counter((student.get('klasse') or '?').strip() for student in students) or Counter({'?': 0})
+            slot = (booking_date, period, teacher_id, offer_type, offer_label)
+            for school_class, count in classes.items():
+                students_total[slot + (school_class,)] += count
+            # Buchung einmal zählen, bei der Klasse der ersten Schüler*in
+            bookings_total[slot + (next(iter(classes)),)] += 1
+
+    try:
+        db.session.execute(delete(BookingRollup).where(BookingRollup.date >= first_day,
+                                                       BookingRollup.date <= last_day))
+        if students_total:
+            db.session.execute(insert(BookingRollup), [
+                {'date': key[0], 'period': key[1], 'teacher_id': key[2], 'offer_type': key[3],
+                 'offer_label': key[4], 'student_class': key[5], 'students': count,
+                 'bookings': bookings_total[key]}
+                for key, count in students_total.items()
+            ])
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        db.session.add(RollupRun(first_day=first_day, last_day=last_day, rows=len(students_total),
+                                 duration_ms=duration_ms))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception(f"Rollups {first_day} bis {last_day} fehlgeschlagen")
+        raise
+    logger.info(f"Rollups {first_day} bis {last_day}: {len(students_total)} Zeilen ({duration_ms} ms)")
+    return len(students_total)
+
+
+def last_refresh(first_day, last_day):
+    """Letzte Neuberechnung, die den Zeitraum vollständig abdeckt (oder None)"""
+    return RollupRun.query.filter(RollupRun.first_day <= first_day, RollupRun.last_day >= last_day) \
+        .order_by(RollupRun.created_at.desc()).first()
+
+
+def _school_days(first_day, last_day):
+    """Alle Montage bis Freitage im Zeitraum"""
+    day, end = date.fromisoformat(first_day), date.fromisoformat(last_day)
+    days = []
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _ranked(students, bookings):
+    """Zeilen für eine Tabelle, absteigend nach Schüler*innen"""
+    return [{'key': key, 'students': count, 'bookings': bookings[key]} for key, count in students.most_common()]
+
+
+def utilization(first_day, last_day):
+    """
+    Auslastung im Zeitraum, nur aus booking_rollups und blocked_slots.
+
+    Returns:
+        Dict mit totals, grid (Wochentag × Stunde), months, classes, teachers,
+        modules; Auslastung jeweils als Anteil an der Kapazität
+        (MAX_STUDENTS_PER_PERIOD pro nicht gesperrtem Slot)
+    """
+    days = _school_days(first_day, last_day)
+    day_index = {day.isoformat(): i for i, day in enumerate(days)}
+    width = len(PERIODS)
+    period_index = {period: i for i, period in enumerate(PERIODS)}
+
+    # Raster Schultag × Stunde: belegte Plätze und Kapazität
+    occupied = array('l', bytes(array('l').itemsize * len(days) * width))
+    capacity = array('l', [MAX_STUDENTS_PER_PERIOD]) * (len(days) * width)
+    for model in (BlockedSlotArchive, BlockedSlot):
+        for blocked_date, period in db.session.query(model.date, model.period).filter(
+                model.date >= first_day, model.date <= last_day):
+            if blocked_date in day_index and period in period_index:
+                capacity[day_index[blocked_date] * width + period_index[period]] = 0
+
+    class_students, class_bookings = Counter(), Counter()
+    teacher_students, teacher_bookings = Counter(), Counter()
+    module_students, module_bookings = Counter(), Counter()
+    module_types = {}
+    for booking_date, period, teacher_id, offer_type, offer_label, school_class, students, bookings in \
+            db.session.query(BookingRollup.date, BookingRollup.period, BookingRollup.teacher_id,
+                             BookingRollup.offer_type, BookingRollup.offer_label, BookingRollup.student_class,
+                             BookingRollup.students, BookingRollup.bookings
+                             ).filter(BookingRollup.date >= first_day, BookingRollup.date <= last_day):
+        i = day_index.get(booking_date)
+        if i is not None and period in period_index:
+            occupied[i * width + period_index[period]] += students
+        class_students[school_class] += students
+        class_bookings[school_class] += bookings
+        teacher_students[teacher_id] += students
+        teacher_bookings[teacher_id] += bookings
+        module_students[offer_label] += students
+        module_bookings[offer_label] += bookings
+        module_types.setdefault(offer_label, offer_type)
+
+    # Wochentag × Stunde: days enthält jeden Schultag, derselbe Wochentag
+    # kommt also alle 5 Tage wieder - ein Slice mit Schrittweite 5 * width
+    grid = []
+    stride = len(WEEKDAYS) * width
+    for weekday_number, weekday in enumerate(WEEKDAYS):
+        cells = []
+        first = (weekday_number - days[0].weekday()) % len(WEEKDAYS) if days else 0
+        for p, period in enumerate(PERIODS):
+            used = sum(occupied[first * width + p::stride])
+            total = sum(capacity[first * width + p::stride])
+            cells.append({'period': period, 'students': used, 'capacity': total,
+                          'rate': used / total if total else None})
+        grid.append({'weekday': WEEKDAY_NAMES[weekday], 'cells': cells})
+
+    # Monate: zusammenhängende Ausschnitte des Rasters
+    months = []
+    start = 0
+    while start < len(days):
+        end = start
+        while end < len(days) and (days[end].year, days[end].month) == (days[start].year, days[start].month):
+            end += 1
+        used = sum(occupied[start * width:end * width])
+        total = sum(capacity[start * width:end * width])
+        months.append({'label': days[start].strftime('%m/%Y'), 'students': used, 'capacity': total,
+                       'rate': used / total if total else None})
+        start = end
+
+    # Alle Module und festen Angebote anzeigen, auch ohne Buchungen
+    for label in FREE_MODULES:
+        module_types.setdefault(label, 'frei')
+    for offers in FIXED_OFFERS.values():
+        for label in offers.values():
+            module_types.setdefault(label, 'fest')
+    modules = [{'label': label, 'type': module_types[label], 'students': module_students[label],
+                'bookings': module_bookings[label]} for label in module_types]
+    modules.sort(key=lambda m: (-m['students'], m['label']))
+
+    users = {user_id: username for user_id, username in db.session.query(User.id, User.username)}
+    teachers = [dict(row, name=users.get(row['key'], 'unbekannt'))
+                for row in _ranked(teacher_students, teacher_bookings)]
+
+    used, total = sum(occupied), sum(capacity)
+    return {
+        'totals': {'students': sum(class_students.values()), 'bookings': sum(class_bookings.values()),
+                   'occupied': used, 'capacity': total, 'rate': used / total if total else None,
+                   'school_days': len(days)},
+        'grid': grid,
+        'months': months,
+        'classes': _ranked(class_students, class_bookings),
+        'teachers': teachers,
+        'modules': modules,
+    }
+
+
+if __name__ == '__main__':
+    from database import create_cli_app
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    with create_cli_app().app_context():
+        start_year = int(sys.argv[1]) if len(sys.argv) > 1 else current_school_year()
+        first_day, last_day = _school_year_range(start_year)
+        rows = refresh_rollups(first_day, last_day)
+        print(f"{rows} Rollup-Zeilen für {first_day} bis {last_day}")
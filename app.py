@@ -1,14 +1,18 @@
 # Haupt-Anwendungsdatei für die SportOase-Buchungssystem
 # Diese Datei enthält alle Routen (URLs) und die Logik der Webanwendung
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, Response, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, Response, jsonify, g
 from datetime import datetime, timedelta, date
 from werkzeug.middleware.proxy_fix import ProxyFix
-import pytz
+import hashlib
 import json
+import logging
 import os
 import queue
+import re
 import threading
+from collections import OrderedDict
+from markupsafe import Markup, escape
 
 # Flask-App erstellen
 app = Flask(__name__)
@@ -23,10 +27,54 @@ if not session_secret:
 app.secret_key = session_secret
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# Logging über Queue und Listener-Thread, JSON nach stdout und logs/ (log_pipeline.py)
+from log_pipeline import init_logging
+init_logging(app)
+
+# Eigene Logger für Login und Buchung (Level/Sampling über LOG_LEVELS/LOG_SAMPLING)
+auth_log = logging.getLogger('app.auth')
+booking_log = logging.getLogger('app.booking')
+
 # Cookie-Einstellungen für iFrame-Kompatibilität (IServ Embed)
 app.config['SESSION_COOKIE_SAMESITE'] = 'None'
 app.config['SESSION_COOKIE_SECURE'] = True
 
+# Statische Assets mit Fingerprint und Langzeit-Caching (build_assets.py)
+from assets import init_assets
+init_assets(app)
+
+# Kompilierte Templates zwischen Workern teilen (siehe gunicorn_config.py)
+from template_cache import init_template_cache
+init_template_cache(app)
+
+# gzip/brotli für HTML- und JSON-Antworten
+from compression import init_compression
+init_compression(app)
+
+# Latenz, SQL-Statements und ausgehende HTTP-Aufrufe pro Route (/metrics)
+from metrics import init_metrics, inc_counter, track_outbound
+init_metrics(app)
+
+# Langsame SQL-Statements mit EXPLAIN-Plan (nur mit SLOW_QUERY_MS, /admin/slow_queries)
+from slow_queries import init_slow_queries
+init_slow_queries(app)
+
+# Sampling-Profiler für einzelne Requests (?profile=1 für Admins, /admin/profiles)
+from profiler import init_profiler
+init_profiler(app)
+
+# RSS pro Worker, Recycling über WORKER_MAX_RSS_MB, tracemalloc (/admin/memory)
+from worker_memory import init_memory
+init_memory(app)
+
+# Stack, Route und laufendes SQL hängender Requests loggen (WATCHDOG_SECONDS)
+from request_watchdog import init_watchdog
+init_watchdog(app)
+
+# Spans für SQL, E-Mail und OAuth (TRACE_SAMPLE_RATE, /admin/traces)
+from tracing import init_tracing, span
+init_tracing(app)
+
 @app.after_request
 def add_iframe_headers(response):
     """Erlaubt Einbettung in IServ iFrame"""
@@ -84,10 +132,11 @@ if not db_uri:
     )
 
 app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+
+# Pool-Konfiguration passend zum Gunicorn-Worker-Modell (siehe server_profile.py)
+from server_profile import get_engine_options
+
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options()
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # Importiere zentrale Datenbank-Instanz
@@ -109,19 +158,33 @@ from models import (
     change_user_password, get_or_create_oauth_user
 )
 from config import *
-from email_service import send_booking_notification
 
-# IServ OAuth-Integration initialisieren
-from oauth_config import init_oauth, determine_user_role
-oauth_instance, iserv_client = init_oauth(app)
+# email_service (resend), OAuth (authlib) und Kalender-Module werden erst bei
+# der ersten Verwendung geladen, damit Worker nach einem Neustart schnell bereit sind
 
-# Schema-Erstellung erfolgt explizit über db_setup.py
-# Nicht automatisch bei jedem Import!
+# IServ OAuth-Integration: Status einmalig beim Start ausgeben,
+# der Client selbst wird pro Worker beim ersten Login erzeugt
+from oauth_config import print_oauth_status, is_oauth_configured, get_iserv_client, determine_user_role
+print_oauth_status()
+
+# Schema-Änderungen laufen über migrations.py (bzw. db_setup.py).
+# Beim Start wird nur die Schema-Version geprüft (eine Query);
+# mit DB_AUTO_MIGRATE=1 werden fehlende Migrationen direkt angewendet.
+from migrations import check_schema_version
+check_schema_version(app)
 
 # Hilfsfunktion: Zeitzone Europe/Berlin
+from period_clock import PeriodClock, BERLIN_TZ
+
 def get_berlin_tz():
     """Gibt die Zeitzone Europe/Berlin zurück"""
-    return pytz.timezone('Europe/Berlin')
+    return BERLIN_TZ
+
+def get_period_clock():
+    """Gibt die PeriodClock des aktuellen Requests zurück ("jetzt" einmal pro Request)"""
+    if 'period_clock' not in g:
+        g.period_clock = PeriodClock()
+    return g.period_clock
 
 # Hilfsfunktion: Prüft, ob Benutzer eingeloggt ist
 def login_required(f):
@@ -152,16 +215,20 @@ def admin_required(f):
     return decorated_function
 
 # Hilfsfunktion: Gibt Informationen über eine Stunde zurück
-def get_period_info(weekday, period):
+def get_period_info(weekday, period, slot_names=None):
     """
     Gibt Informationen über eine Stunde zurück (fest/frei, Bezeichnung)
     weekday: z.B. "Mon", "Tue", ...
     period: 1-6
+    slot_names: optional bereits geladene Slot-Namen {(weekday, period): label}
     """
     from models import get_custom_slot_name
     
     if weekday in FIXED_OFFERS and period in FIXED_OFFERS[weekday]:
-        custom_label = get_custom_slot_name(weekday, period)
+        if slot_names is None:
+            custom_label = get_custom_slot_name(weekday, period)
+        else:
+            custom_label = slot_names.get((weekday, period))
         label = custom_label if custom_label else FIXED_OFFERS[weekday][period]
         return {
             'type': 'fest',
@@ -178,21 +245,7 @@ def is_past_date(check_date, period=None):
     """
     Prüft, ob ein Datum (und optional eine Stunde) in der Vergangenheit liegt
     """
-    berlin_tz = get_berlin_tz()
-    now = datetime.now(berlin_tz)
-    
-    if period is not None:
-        # Prüfe mit spezifischer Stunde
-        period_start_time = PERIOD_TIMES[period]['start']
-        hour, minute = map(int, period_start_time.split(':'))
-        period_datetime = berlin_tz.localize(
-            datetime.combine(check_date, datetime.min.time()).replace(hour=hour, minute=minute)
-        )
-        return period_datetime < now
-    else:
-        # Prüfe nur Datum
-        today = now.date()
-        return check_date < today
+    return get_period_clock().is_past(check_date, period)
 
 # Hilfsfunktion: Prüft, ob eine Buchung zeitlich möglich ist
 def check_booking_time(booking_date, period):
@@ -200,22 +253,7 @@ def check_booking_time(booking_date, period):
     Prüft, ob die Buchung mindestens 60 Minuten in der Zukunft liegt
     Gibt (True, None) zurück wenn OK, sonst (False, Fehlermeldung)
     """
-    berlin_tz = get_berlin_tz()
-    now = datetime.now(berlin_tz)
-    
-    # Erstelle Datetime-Objekt für den Stundenbeginn
-    period_start_time = PERIOD_TIMES[period]['start']
-    hour, minute = map(int, period_start_time.split(':'))
-    
-    # Kombiniere Datum und Zeit
-    period_datetime = berlin_tz.localize(
-        datetime.combine(booking_date, datetime.min.time()).replace(hour=hour, minute=minute)
-    )
-    
-    # Berechne Zeitdifferenz
-    time_diff = period_datetime - now
-    
-    if time_diff.total_seconds() < BOOKING_ADVANCE_MINUTES * 60:
+    if not get_period_clock().can_book(booking_date, period):
         return False, f"Buchungen sind nur bis {BOOKING_ADVANCE_MINUTES} Minuten vor Stundenbeginn möglich."
     
     return True, None
@@ -227,7 +265,7 @@ def index():
     if 'user_id' in session:
         return redirect(url_for('dashboard'))
     # Wenn IServ nicht konfiguriert, zeige Login-Seite
-    if not iserv_client:
+    if not is_oauth_configured():
         return redirect(url_for('login'))
     return redirect(url_for('login_iserv'))
 
@@ -257,7 +295,7 @@ def iserv_embed_login():
     timestamp = request.args.get('ts', '').strip()
     
     # Debug-Log
-    print(f"🔐 IServ Embed Versuch: user={user}, email={email}, domain={domain}")
+    auth_log.debug("IServ Embed Versuch", extra={'user': user, 'email': email, 'domain': domain})
     
     # Prüfe ob alle Parameter vorhanden sind
     if not user or not email:
@@ -274,7 +312,7 @@ def iserv_embed_login():
     if embed_secret:
         # Wenn Secret konfiguriert, muss Token gültig sein
         if not token or not timestamp:
-            print(f"⚠️ IServ Embed: Token fehlt für {email}")
+            auth_log.warning("IServ Embed: Token fehlt", extra={'email': email})
             flash('Ungültige Anmeldung (Token fehlt).', 'error')
             return render_template('login.html')
         
@@ -282,7 +320,7 @@ def iserv_embed_login():
         try:
             ts = int(timestamp)
             if abs(time.time() - ts) > 300:
-                print(f"⚠️ IServ Embed: Token abgelaufen für {email}")
+                auth_log.warning("IServ Embed: Token abgelaufen", extra={'email': email})
                 flash('Anmeldung abgelaufen. Bitte erneut versuchen.', 'error')
                 return render_template('login.html')
         except ValueError:
@@ -297,7 +335,7 @@ def iserv_embed_login():
         ).hexdigest()
         
         if not hmac.compare_digest(token, expected):
-            print(f"⚠️ IServ Embed: Ungültiger Token für {email}")
+            auth_log.warning("IServ Embed: Ungültiger Token", extra={'email': email})
             flash('Ungültige Anmeldung.', 'error')
             return render_template('login.html')
     
@@ -311,7 +349,7 @@ def iserv_embed_login():
         session['user_email'] = existing_user['email']
         session['user_role'] = existing_user['role']
         
-        print(f"🔐 IServ Embed Login: {email} (bestehender Benutzer)")
+        auth_log.info("IServ Embed Login", extra={'email': email})
         return redirect(url_for('dashboard'))
     else:
         # Neuer Benutzer - muss sich erst über OAuth registrieren
@@ -328,16 +366,17 @@ def login():
 @app.route('/login/iserv')
 def login_iserv():
     """Startet den IServ OAuth2-Login-Flow"""
+    iserv_client = get_iserv_client(app)
     if not iserv_client:
         flash('IServ-Login ist nicht konfiguriert. Bitte ISERV_CLIENT_ID und ISERV_CLIENT_SECRET in den Umgebungsvariablen setzen.', 'error')
         return redirect(url_for('login'))
     
     try:
         redirect_uri = url_for('oauth_callback', _external=True)
-        print(f"🔐 IServ OAuth: Starte Login, Redirect URI: {redirect_uri}")
+        auth_log.info("IServ OAuth: Starte Login", extra={'redirect_uri': redirect_uri})
         return iserv_client.authorize_redirect(redirect_uri)
     except Exception as e:
-        print(f"❌ IServ OAuth Fehler: {e}")
+        auth_log.exception("IServ OAuth: Login konnte nicht gestartet werden")
         flash(f'Fehler beim Starten des IServ-Logins: {str(e)}', 'error')
         return redirect(url_for('login'))
 
@@ -345,80 +384,62 @@ def login_iserv():
 @app.route('/oauth/callback')
 def oauth_callback():
     """Callback-Route für IServ OAuth2"""
+    iserv_client = get_iserv_client(app)
     if not iserv_client:
         flash('IServ-Login ist nicht konfiguriert.', 'error')
         return redirect(url_for('login'))
     
     try:
-        token = iserv_client.authorize_access_token()
-        
-        # === AUSFÜHRLICHES DEBUG-LOGGING ===
-        print("=" * 80)
-        print("🔐 ISERV OAUTH CALLBACK - VOLLSTÄNDIGE DEBUG-AUSGABE")
-        print("=" * 80)
-        
-        # Token-Struktur analysieren
-        print("\n📦 TOKEN KEYS:")
-        token_keys = list(token.keys()) if isinstance(token, dict) else []
-        for key in token_keys:
-            print(f"   - {key}")
-        
-        # Prüfe ob roles/groups direkt im Token sind
-        if 'roles' in token:
-            print(f"\n📋 ROLES IM TOKEN: {token['roles']}")
-        if 'groups' in token:
-            print(f"\n👥 GROUPS IM TOKEN: {token['groups']}")
+        with track_outbound('iserv_oauth'):
+            token = iserv_client.authorize_access_token()
+        
+        # Token-Struktur für die Fehlersuche (LOG_LEVELS=app.auth=DEBUG)
+        auth_log.debug("IServ OAuth Callback: Token", extra={
+            'token_keys': list(token.keys()) if isinstance(token, dict) else [],
+            'token_roles': token.get('roles'),
+            'token_groups': token.get('groups'),
+        })
         
         # Userinfo aus Token oder separat abrufen
         userinfo = token.get('userinfo')
-        print(f"\n📋 USERINFO AUS TOKEN: {'Ja' if userinfo else 'Nein'}")
-        
         if not userinfo:
-            print("   → Rufe userinfo separat ab...")
-            userinfo = iserv_client.userinfo(token=token)
-        
-        # Vollständige Userinfo ausgeben
-        print("\n📋 KOMPLETTE USERINFO:")
-        print("-" * 60)
-        if isinstance(userinfo, dict):
-            for key, value in userinfo.items():
-                value_str = str(value)
-                if len(value_str) > 500:
-                    value_str = value_str[:500] + "... [GEKÜRZT]"
-                print(f"   {key}: {value_str}")
-        else:
-            print(f"   (Typ: {type(userinfo)}) {userinfo}")
-        print("-" * 60)
+            auth_log.debug("IServ OAuth Callback: Rufe userinfo separat ab")
+            with track_outbound('iserv_oauth'):
+                userinfo = iserv_client.userinfo(token=token)
+        
+        if auth_log.isEnabledFor(logging.DEBUG):
+            if isinstance(userinfo, dict):
+                userinfo_dump = {}
+                for key, value in userinfo.items():
+                    value_str = str(value)
+                    if len(value_str) > 500:
+                        value_str = value_str[:500] + "... [GEKÜRZT]"
+                    userinfo_dump[key] = value_str
+            else:
+                userinfo_dump = f"(Typ: {type(userinfo)}) {userinfo}"
+            auth_log.debug("IServ OAuth Callback: Userinfo", extra={'userinfo': userinfo_dump})
         
         email = userinfo.get('email')
         sub = userinfo.get('sub')
         name = userinfo.get('name', email)
         
-        print(f"\n👤 BENUTZER-DETAILS:")
-        print(f"   E-Mail: {email}")
-        print(f"   Sub-ID: {sub}")
-        print(f"   Name: {name}")
-        
         if not email or not sub:
-            print("❌ FEHLER: E-Mail oder Sub-ID fehlt!")
+            auth_log.error("IServ OAuth: E-Mail oder Sub-ID fehlt", extra={'email': email, 'sub': sub})
             flash('Fehler beim Abrufen der Benutzerdaten von IServ.', 'error')
             return redirect(url_for('login'))
         
         # Prüfe auch ob Token selbst roles/groups enthält und füge sie zu userinfo hinzu
         if 'roles' in token and 'roles' not in userinfo:
             userinfo['roles'] = token['roles']
-            print(f"\n   → Roles aus Token übernommen: {token['roles']}")
+            auth_log.debug("IServ OAuth: Roles aus Token übernommen")
         if 'groups' in token and 'groups' not in userinfo:
             userinfo['groups'] = token['groups']
-            print(f"\n   → Groups aus Token übernommen: {token['groups']}")
+            auth_log.debug("IServ OAuth: Groups aus Token übernommen")
         
         # determine_user_role gibt jetzt (role, iserv_group) zurück
         role, iserv_group = determine_user_role(userinfo)
-        
-        print(f"\n🎯 ROLLENZUWEISUNG:")
-        print(f"   App-Rolle: {role}")
-        print(f"   IServ-Gruppe: {iserv_group}")
-        print("=" * 80)
+        auth_log.info("IServ OAuth: Rollenzuweisung",
+                      extra={'email': email, 'role': role, 'iserv_group': iserv_group})
         
         # Prüfe ob Benutzer Zugang hat (nur Lehrer, Mitarbeitende, Administrator)
         if role is None:
@@ -431,14 +452,14 @@ def oauth_callback():
             
             if not has_roles and not has_groups:
                 error_msg += 'IServ liefert keine Rollen/Gruppen. Bitte prüfen Sie die OAuth-Konfiguration in IServ (Scopes: roles, groups).'
-                print(f"\n⚠️ WICHTIG: Keine Rollen/Gruppen von IServ erhalten!")
-                print(f"   → Prüfen Sie in IServ unter: Admin → Single-Sign-On → App bearbeiten")
-                print(f"   → Stellen Sie sicher, dass die Scopes 'roles' und 'groups' aktiviert sind!")
+                auth_log.warning("IServ OAuth: Keine Rollen/Gruppen erhalten - in IServ unter "
+                                 "Admin → Single-Sign-On → App bearbeiten die Scopes 'roles' und 'groups' aktivieren",
+                                 extra={'email': email})
             else:
                 error_msg += 'Keine berechtigte Rolle gefunden. Nur Schulleitung, Lehrer und Mitarbeitende haben Zugang.'
             
             flash(error_msg, 'error')
-            print(f"❌ Zugang verweigert für: {email}")
+            auth_log.warning("IServ OAuth: Zugang verweigert", extra={'email': email})
             return redirect(url_for('login'))
         
         # Verwende E-Mail direkt als Username für OAuth-Benutzer
@@ -463,15 +484,12 @@ def oauth_callback():
         session['user_email'] = user['email']
         session['user_role'] = user['role']
         
-        print(f"\n✅ LOGIN ERFOLGREICH: {email} → Rolle: {role}")
+        auth_log.info("IServ OAuth: Login erfolgreich", extra={'email': email, 'role': role})
         flash(f'Willkommen, {name}!', 'success')
         return redirect(url_for('dashboard'))
         
-    except Exception as e:
-        import traceback
-        print(f"\n❌ OAUTH FEHLER:")
-        print(f"   Exception: {e}")
-        print(f"   Traceback:\n{traceback.format_exc()}")
+    except Exception:
+        auth_log.exception("IServ OAuth: Fehler im Callback")
         flash('Fehler beim IServ-Login. Bitte versuchen Sie es erneut.', 'error')
         return redirect(url_for('login'))
 
@@ -609,107 +627,71 @@ def change_password():
     
     return render_template('change_password.html')
 
-# Route: Dashboard
-@app.route('/dashboard')
-@login_required
-def dashboard():
-    """Hauptseite - zeigt Wochenplan und Buchungsmöglichkeiten"""
-    # Hole aktuelles Datum oder gewähltes Datum
-    selected_date_str = request.args.get('date', datetime.now(get_berlin_tz()).strftime('%Y-%m-%d'))
-    
-    try:
-        selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
-    except:
-        selected_date = datetime.now(get_berlin_tz()).date()
-    
-    # Wochentag ermitteln (Mon, Tue, ...)
-    weekday = selected_date.strftime('%a')
-    weekday_name = selected_date.strftime('%A')  # Ausgeschriebener Name
-    
-    # Deutsche Wochentagsnamen
-    weekday_names_de = {
-        'Monday': 'Montag',
-        'Tuesday': 'Dienstag',
-        'Wednesday': 'Mittwoch',
-        'Thursday': 'Donnerstag',
-        'Friday': 'Freitag',
-        'Saturday': 'Samstag',
-        'Sunday': 'Sonntag'
-    }
-    weekday_name_de = weekday_names_de.get(weekday_name, weekday_name)
-    
-    # Erstelle Stundenplan für den Tag
-    from models import is_slot_blocked, get_blocked_slot
-    schedule = []
-    for period in range(1, 7):
-        period_info = get_period_info(weekday, period)
-        student_count = count_students_for_period(selected_date_str, period)
-        available = MAX_STUDENTS_PER_PERIOD - student_count
-        
-        # Prüfe, ob Slot blockiert ist
-        blocked_slot = get_blocked_slot(selected_date_str, period)
-        is_blocked = blocked_slot is not None
-        
-        # Prüfe, ob Termin in der Vergangenheit liegt
-        is_past = is_past_date(selected_date, period)
-        
-        # Prüfe, ob es ein Wochenende ist
-        is_weekend = selected_date.weekday() in [5, 6]
-        
-        # Prüfe, ob Buchung zeitlich möglich ist
-        can_book, time_message = check_booking_time(selected_date, period)
-        
-        # can_book muss False sein für vergangene Termine oder Wochenenden
-        if is_past:
-            can_book = False
-            if not time_message:
-                time_message = "Dieser Termin liegt in der Vergangenheit."
-        elif is_weekend:
-            can_book = False
-            if not time_message:
-                time_message = "Buchungen sind am Wochenende nicht möglich."
-        
-        schedule.append({
-            'period': period,
-            'time': f"{PERIOD_TIMES[period]['start']} - {PERIOD_TIMES[period]['end']}",
-            'type': period_info['type'],
-            'label': period_info['label'],
-            'booked': student_count,
-            'available': available,
-            'can_book': can_book and available > 0 and not is_blocked and not is_past and not is_weekend,
-            'time_message': time_message,
-            'blocked': blocked_slot,
-            'blocked_reason': blocked_slot.get('reason', 'Beratung') if blocked_slot else None,
-            'blocked_icon': blocked_slot.get('icon', '🔧') if blocked_slot else None,
-            'is_past': is_past,
-            'is_weekend': is_weekend
-        })
-    
-    # Erstelle Wochenübersicht (Montag-Freitag) mit Buchungsdaten
-    from models import get_bookings_for_week, get_blocked_slots_for_week, is_slot_blocked
-    
-    # Berechne Montag und Freitag der aktuellen Woche
-    days_since_monday = selected_date.weekday()
-    monday = selected_date - timedelta(days=days_since_monday)
+# Hilfsfunktion: Farbe, Icon und Tag einer Kurs-Karte im Wochenplan
+COURSE_STYLES = [
+    (('Wochenstart',), 'course-wochenstart', '☀️', 'Energie'),
+    (('Konflikt', 'Deeskalation'), 'course-konflikt', '🛡️', 'Reset'),
+    (('Koordination',), 'course-koordination', '🎯', 'Fokus'),
+    (('Sozial', 'Gruppen'), 'course-sozial', '👥', 'Team'),
+    (('Mini-Fitness', 'Aktivierung'), 'course-fitness', '⚡', 'Power'),
+    (('Motorik', 'Parcours'), 'course-motorik', '🏃', 'Bewegung'),
+    (('Turnen', 'Balance'), 'course-turnen', '🤸', 'Balance'),
+    (('Atem', 'Reflexion'), 'course-atem', '🌬️', 'Atem'),
+    (('Bodyscan',), 'course-bodyscan', '🧘', 'Scan'),
+    (('Ruhe', 'Entspannung'), 'course-ruhe', '🍃', 'Ruhe'),
+]
+
+def get_course_style(slot_type, label):
+    """Gibt (css_klasse, icon, tag) für eine Kurs-Karte zurück"""
+    if slot_type != 'fest':
+        return 'course-frei', '⭐', 'Flexibel'
+    for keywords, course_class, icon, tag in COURSE_STYLES:
+        if any(keyword in label for keyword in keywords):
+            return course_class, icon, tag
+    return 'course-default', '📋', 'Fest'
+
+# Format von /api/week; bei inkompatiblen Änderungen erhöhen
+WEEK_API_VERSION = 1
+
+def load_week(monday):
+    """Lädt Buchungen, Sperrungen und Slot-Namen einer Woche (Mo-Fr)"""
+    from models import get_week_grid_data
     friday = monday + timedelta(days=4)
+    return get_week_grid_data(monday.strftime('%Y-%m-%d'), friday.strftime('%Y-%m-%d'))
+
+def get_week_data_version(monday, week_data, clock):
+    """
+    Fingerprint eines Wochenplans.
+
+    Ändert sich, sobald sich eine Buchung, Sperrung oder ein Slot-Name der Woche
+    ändert oder ein Slot zeitlich umschlägt (vergangen / nicht mehr buchbar).
+    """
+    week_days = [monday + timedelta(days=i) for i in range(5)]
+    slot_times = clock.grid(week_days)
+    fingerprint = repr((
+        WEEK_API_VERSION,
+        clock.today.isoformat(),
+        [(key, slot_times[key][:2]) for key in sorted(slot_times)],
+        week_data['bookings'],
+        week_data['blocked'],
+        sorted(week_data['slot_names'].items()),
+    ))
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:16]
+
+def build_week_overview(monday, week_data, clock):
+    """
+    Baut die Wochenübersicht (Mo-Fr × 6 Stunden) aus den Rohdaten von load_week.
+    Das Ergebnis ist für alle Benutzer gleich; was sichtbar ist, entscheidet
+    das Template bzw. serialize_week.
+    """
+    week_days = [monday + timedelta(days=i) for i in range(5)]
     
-    # Berechne Kalenderwoche
-    calendar_week = monday.isocalendar()[1]
-    calendar_year = monday.isocalendar()[0]
-    
-    # Berechne vorherige und nächste Woche für Navigation
-    prev_week_monday = monday - timedelta(days=7)
-    next_week_monday = monday + timedelta(days=7)
-    
-    # Hole alle Buchungen für diese Woche
-    week_bookings = get_bookings_for_week(monday.strftime('%Y-%m-%d'), friday.strftime('%Y-%m-%d'))
-    
-    # Hole alle blockierten Slots für diese Woche
-    blocked_slots = get_blocked_slots_for_week(monday.strftime('%Y-%m-%d'), friday.strftime('%Y-%m-%d'))
+    # Vergangenheit/Vorlaufzeit für alle 30 Slots der Woche in einem Durchlauf
+    slot_times = clock.grid(week_days)
     
     # Organisiere blockierte Slots nach Datum und Stunde
     blocked_by_date_period = {}
-    for blocked in blocked_slots:
+    for blocked in week_data['blocked']:
         key = f"{blocked['date']}_{blocked['period']}"
         blocked_by_date_period[key] = blocked
     
@@ -718,14 +700,14 @@ def dashboard():
     exclusive_by_date_period = {}
     pending_exclusive_by_date_period = {}
     
-    for booking in week_bookings:
-        booking_dict = dict(booking)
+    for booking_dict in week_data['bookings']:
         key = f"{booking_dict['date']}_{booking_dict['period']}"
         if key not in bookings_by_date_period:
             bookings_by_date_period[key] = []
         
         students = json.loads(booking_dict['students_json']) if booking_dict.get('students_json') else []
         booking_info = {
+            'id': booking_dict['id'],
             'teacher_name': booking_dict.get('teacher_name', 'N/A'),
             'teacher_class': booking_dict.get('teacher_class', 'N/A'),
             'teacher_id': booking_dict.get('teacher_id'),
@@ -750,12 +732,12 @@ def dashboard():
     weekday_names = ['Mo', 'Di', 'Mi', 'Do', 'Fr']
     
     for i, wd in enumerate(weekdays):
-        day_date = monday + timedelta(days=i)
+        day_date = week_days[i]
         day_date_str = day_date.strftime('%Y-%m-%d')
         
         day_schedule = []
         for period in range(1, 7):
-            info = get_period_info(wd, period)
+            info = get_period_info(wd, period, week_data['slot_names'])
             key = f"{day_date_str}_{period}"
             period_bookings = bookings_by_date_period.get(key, [])
             blocked_slot = blocked_by_date_period.get(key)
@@ -770,20 +752,24 @@ def dashboard():
             else:
                 available = MAX_STUDENTS_PER_PERIOD - total_students
             
-            # Prüfe, ob Termin in der Vergangenheit liegt
-            is_past = is_past_date(day_date, period)
+            # Vergangenheit und Vorlaufzeit aus der vorberechneten Tabelle
+            is_past, can_book, _ = slot_times[day_date, period]
             
             # Prüfe, ob es ein Wochenende ist
             is_weekend = day_date.weekday() in [5, 6]
             
             # Prüfe, ob Buchung für diesen Slot möglich ist
-            can_book, _ = check_booking_time(day_date, period)
             can_book = can_book and available > 0 and not blocked_slot and not is_past and not is_weekend and not exclusive_booking
             
+            course_class, course_icon, course_tag = get_course_style(info['type'], info['label'])
+            
             day_schedule.append({
                 'period': period,
                 'type': info['type'],
                 'label': info['label'],
+                'course_class': course_class,
+                'course_icon': course_icon,
+                'course_tag': course_tag,
                 'bookings': period_bookings,
                 'total_students': total_students,
                 'available': available,
@@ -797,9 +783,6 @@ def dashboard():
                 'exclusive_booking': exclusive_booking,
                 'pending_exclusive': pending_exclusive
             })
-        # Prüfe ob heute
-        today = datetime.now(get_berlin_tz()).date()
-        is_today = day_date == today
         
         week_overview.append({
             'weekday': wd,
@@ -807,23 +790,245 @@ def dashboard():
             'date': day_date_str,
             'date_formatted': day_date.strftime('%d.%m.'),
             'schedule': day_schedule,
-            'is_today': is_today
+            'is_today': day_date == clock.today
         })
     
+    return week_overview
+
+def serialize_week(monday, week_overview, version, viewer_id, viewer_role):
+    """
+    Kompakte JSON-Darstellung einer Woche für /api/week.
+
+    Schüler*innen-Namen fremder Buchungen werden durch 0 ersetzt (Anzeige ***),
+    Felder mit Standardwert (false/leer) werden weggelassen.
+    """
+    is_admin = viewer_role == 'admin'
+    friday = monday + timedelta(days=4)
+    iso_year, iso_week, _ = monday.isocalendar()
+    
+    days = []
+    for day in week_overview:
+        slots = []
+        for slot in day['schedule']:
+            item = {
+                'type': slot['type'],
+                'label': slot['label'],
+                'course': [slot['course_class'], slot['course_icon'], slot['course_tag']],
+                'count': slot['total_students'],
+                'available': slot['available'],
+            }
+            if slot['can_book']:
+                item['book'] = url_for('book', date_str=day['date'], period=slot['period'])
+            if slot['is_past'] or slot['is_weekend']:
+                item['past'] = 1
+            if slot['blocked']:
+                item['blocked'] = slot['blocked_reason']
+            if slot['pending_exclusive']:
+                item['pending'] = 1
+            
+            exclusive = slot['exclusive_booking']
+            if exclusive:
+                item['exclusive'] = {}
+                if (is_admin or exclusive['teacher_id'] == viewer_id) and exclusive['students']:
+                    student = exclusive['students'][0]
+                    item['exclusive'] = {
+                        'student': [student.get('name'), student.get('klasse')],
+                        'teacher': exclusive['teacher_name'],
+                    }
+            
+            students = []
+            for booking in slot['bookings']:
+                can_see = is_admin or booking['teacher_id'] == viewer_id
+                for student in booking['students']:
+                    students.append([student.get('name'), student.get('klasse')] if can_see else 0)
+            if students:
+                item['students'] = students
+            slots.append(item)
+        
+        days.append({
+            'date': day['date'],
+            'name': day['name'],
+            'fmt': day['date_formatted'],
+            'today': day['is_today'],
+            'slots': slots,
+        })
+    
+    return {
+        'v': WEEK_API_VERSION,
+        'version': version,
+        'monday': monday.strftime('%Y-%m-%d'),
+        'calendar_week': iso_week,
+        'calendar_year': iso_year,
+        'monday_date': monday.strftime('%d.%m.%Y'),
+        'friday_date': friday.strftime('%d.%m.%Y'),
+        'prev': (monday - timedelta(days=7)).strftime('%Y-%m-%d'),
+        'next': (monday + timedelta(days=7)).strftime('%Y-%m-%d'),
+        'days': days,
+    }
+
+# Fragment-Cache für die Wochenplan-Tabelle (pro Worker):
+# (monday, Rolle, Datenstand) → gerendertes HTML mit Platzhaltern
+WEEK_GRID_CACHE_SIZE = 64
+_week_grid_cache = OrderedDict()
+_week_grid_lock = threading.Lock()
+_week_grid_stats = {'hits': 0, 'renders': 0}
+
+# Platzhalter im Fragment, die pro Benutzer ersetzt werden
+_WEEK_GRID_PLACEHOLDER = re.compile(r'<!--(students|exclusive):(\d+)-->|__CSRF_TOKEN__')
+
+def render_week_grid(monday, week_data, clock, viewer_id, viewer_role):
+    """
+    Gibt die Wochenplan-Tabelle als HTML zurück.
+
+    Die Tabelle wird pro (Montag, Rolle, Datenstand) nur einmal gerendert.
+    Ändert sich eine Buchung, Sperrung oder ein Slot-Name der Woche, ändert sich
+    die Datenversion und damit der Cache-Schlüssel. Die Schüler*innen-Namen und
+    das CSRF-Token setzt apply_week_grid_overlay pro Request ein.
+    """
+    role = 'admin' if viewer_role == 'admin' else 'teacher'
+    key = (monday, role, get_week_data_version(monday, week_data, clock))
+    
+    with _week_grid_lock:
+        html = _week_grid_cache.get(key)
+        if html is not None:
+            _week_grid_cache.move_to_end(key)
+            _week_grid_stats['hits'] += 1
+    
+    if html is None:
+        week_overview = build_week_overview(monday, week_data, clock)
+        html = render_template('partials/week_grid.html', week_overview=week_overview, user_role=role)
+        with _week_grid_lock:
+            _week_grid_cache[key] = html
+            _week_grid_stats['renders'] += 1
+            while len(_week_grid_cache) > WEEK_GRID_CACHE_SIZE:
+                _week_grid_cache.popitem(last=False)
+        inc_counter('sportoase_week_grid_cache_total', result='render')
+    else:
+        inc_counter('sportoase_week_grid_cache_total', result='hit')
+    
+    return Markup(apply_week_grid_overlay(html, week_data, viewer_id, viewer_role, generate_csrf_token()))
+
+def apply_week_grid_overlay(html, week_data, viewer_id, viewer_role, csrf_token):
+    """Setzt die benutzerabhängigen Teile in ein gecachtes Wochenplan-Fragment ein"""
+    is_admin = viewer_role == 'admin'
+    bookings = {b['id']: b for b in week_data['bookings']}
+    
+    def replace(match):
+        if match.group(1) is None:
+            return str(escape(csrf_token))
+        booking = bookings.get(int(match.group(2)))
+        if booking is None:
+            return ''
+        students = json.loads(booking['students_json']) if booking.get('students_json') else []
+        can_see = is_admin or booking['teacher_id'] == viewer_id
+        
+        if match.group(1) == 'exclusive':
+            if can_see and students:
+                return Markup(
+                    '<span class="exclusive-student">{} ({})</span>'
+                    '<span class="exclusive-teacher">von {}</span>'
+                ).format(students[0].get('name'), students[0].get('klasse'), booking.get('teacher_name'))
+            return '<span class="exclusive-student">Reserviert</span>'
+        
+        if not can_see:
+            return '<span class="student-name blurred">***</span>' * len(students)
+        return ''.join(
+            Markup('<span class="student-name">{} ({})</span>').format(student.get('name'), student.get('klasse'))
+            for student in students
+        )
+    
+    return _WEEK_GRID_PLACEHOLDER.sub(replace, html)
+
+# Route: Dashboard
+@app.route('/dashboard')
+@login_required
+def dashboard():
+    """Hauptseite - zeigt Wochenplan und Buchungsmöglichkeiten"""
+    # Hole aktuelles Datum oder gewähltes Datum
+    clock = get_period_clock()
+    selected_date_str = request.args.get('date', clock.today.strftime('%Y-%m-%d'))
+    
+    try:
+        selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
+    except:
+        selected_date = clock.today
+    
+    # Wochentag ermitteln (Mon, Tue, ...)
+    weekday_name = selected_date.strftime('%A')  # Ausgeschriebener Name
+    
+    # Deutsche Wochentagsnamen
+    weekday_names_de = {
+        'Monday': 'Montag',
+        'Tuesday': 'Dienstag',
+        'Wednesday': 'Mittwoch',
+        'Thursday': 'Donnerstag',
+        'Friday': 'Freitag',
+        'Saturday': 'Samstag',
+        'Sunday': 'Sonntag'
+    }
+    weekday_name_de = weekday_names_de.get(weekday_name, weekday_name)
+    
+    # Berechne Montag und Freitag der aktuellen Woche
+    days_since_monday = selected_date.weekday()
+    monday = selected_date - timedelta(days=days_since_monday)
+    friday = monday + timedelta(days=4)
+    
+    # Berechne Kalenderwoche
+    calendar_week = monday.isocalendar()[1]
+    calendar_year = monday.isocalendar()[0]
+    
+    # Berechne vorherige und nächste Woche für Navigation
+    prev_week_monday = monday - timedelta(days=7)
+    next_week_monday = monday + timedelta(days=7)
+    
+    # Wochenübersicht (Montag-Freitag) aus dem Fragment-Cache
+    week_grid = render_week_grid(monday, load_week(monday), clock,
+                                 session.get('user_id'), session.get('user_role'))
+    
     return render_template('dashboard.html',
                          selected_date=selected_date,
                          weekday=weekday_name_de,
-                         schedule=schedule,
-                         week_overview=week_overview,
+                         week_grid=week_grid,
                          user_role=session.get('user_role'),
-                         current_user_id=session.get('user_id'),
                          calendar_week=calendar_week,
                          calendar_year=calendar_year,
+                         monday=monday.strftime('%Y-%m-%d'),
                          prev_week_date=prev_week_monday.strftime('%Y-%m-%d'),
                          next_week_date=next_week_monday.strftime('%Y-%m-%d'),
                          monday_date=monday.strftime('%d.%m.%Y'),
                          friday_date=friday.strftime('%d.%m.%Y'))
 
+# Route: Wochenplan als JSON (Wochenwechsel im Dashboard ohne Seiten-Reload)
+@app.route('/api/week/<monday_str>')
+@login_required
+def api_week(monday_str):
+    """Gibt den Wochenplan der Woche von monday_str als kompaktes JSON zurück (mit ETag)"""
+    try:
+        day = date.fromisoformat(monday_str)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Ungültiges Datum'}), 400
+    
+    monday = day - timedelta(days=day.weekday())
+    clock = get_period_clock()
+    week_data = load_week(monday)
+    version = get_week_data_version(monday, week_data, clock)
+    
+    # Die Antwort hängt zusätzlich davon ab, wessen Namen sichtbar sind
+    viewer_id = session['user_id']
+    viewer_role = session.get('user_role')
+    etag = hashlib.sha1(f"{version}:{viewer_role}:{viewer_id}".encode('utf-8')).hexdigest()[:20]
+    
+    # Schwacher Vergleich: die Komprimierung kennzeichnet das ETag als W/"..."
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        week_overview = build_week_overview(monday, week_data, clock)
+        response = jsonify(serialize_week(monday, week_overview, version, viewer_id, viewer_role))
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 # Route: Kalenderansicht (Monats-/Jahresübersicht)
 @app.route('/calendar')
 @app.route('/calendar/<int:year>/<int:month>')
@@ -834,7 +1039,7 @@ def calendar_view(year=None, month=None):
     from models import get_bookings_for_week, get_blocked_slots_for_week
     
     # Aktuelles Datum
-    today = datetime.now(get_berlin_tz()).date()
+    today = get_period_clock().today
     
     # Standard: aktueller Monat
     if year is None:
@@ -1019,12 +1224,13 @@ def book(date_str, period):
     
     # Prüfe, ob bereits eine genehmigte exklusive Buchung existiert
     from models import Booking
-    exclusive_booking = Booking.query.filter_by(
-        date=date_str,
-        period=period,
-        is_exclusive=True,
-        is_approved=True
-    ).first()
+    with span('book.exclusive_check'):
+        exclusive_booking = Booking.query.filter_by(
+            date=date_str,
+            period=period,
+            is_exclusive=True,
+            is_approved=True
+        ).first()
     if exclusive_booking:
         flash('Dieser Slot ist für ein Einzelangebot reserviert und kann nicht gebucht werden.', 'error')
         return redirect(url_for('dashboard', date=date_str))
@@ -1186,9 +1392,10 @@ def book(date_str, period):
             
             # Sende E-Mail-Benachrichtigung an Admin (SMTP)
             try:
+                from email_service import send_booking_notification
                 send_booking_notification(booking_data)
             except Exception as e:
-                print(f"E-Mail-Benachrichtigung fehlgeschlagen: {e}")
+                booking_log.warning(f"E-Mail-Benachrichtigung an Admin fehlgeschlagen: {e}")
             
             # Sende E-Mail-Bestätigung an Lehrer (nur wenn Checkbox aktiviert)
             send_email_confirmation = request.form.get('send_email_confirmation') == '1'
@@ -1201,27 +1408,26 @@ def book(date_str, period):
                 if user_data:
                     user_email = user_data.get('email', '')
             
-            print(f"[BUCHUNG] E-Mail-Checkbox aktiviert: {send_email_confirmation}")
-            print(f"[BUCHUNG] User ID: {user_id}")
-            print(f"[BUCHUNG] User E-Mail (aus DB): {user_email}")
+            booking_log.info("Buchung erstellt", extra={
+                'booking_id': booking_id, 'date': date_str, 'period': period,
+                'students': len(students), 'is_exclusive': is_exclusive,
+                'email_confirmation': send_email_confirmation,
+            })
             
             if send_email_confirmation and user_email:
-                print(f"[BUCHUNG] Versuche E-Mail-Bestätigung an {user_email} zu senden...")
                 try:
                     if is_exclusive:
                         # Bei Einzelbuchung: "Buchung steht aus" statt "erfolgreich gebucht"
                         from email_service import send_exclusive_pending_email
                         result = send_exclusive_pending_email(user_email, booking_data)
-                        print(f"[BUCHUNG] Einzelbuchung-Pending-E-Mail Ergebnis: {result}")
+                        booking_log.debug("Einzelbuchung-Pending-E-Mail", extra={'email': user_email, 'sent': result})
                     else:
                         # Normale Buchung: Standard-Bestätigung
                         from email_service import send_user_booking_confirmation
                         result = send_user_booking_confirmation(user_email, booking_data)
-                        print(f"[BUCHUNG] E-Mail-Versand Ergebnis: {result}")
+                        booking_log.debug("Buchungsbestätigung", extra={'email': user_email, 'sent': result})
                 except Exception as e:
-                    print(f"[BUCHUNG] Benutzer-E-Mail-Bestätigung fehlgeschlagen: {e}")
-            else:
-                print(f"[BUCHUNG] Keine E-Mail gesendet (Checkbox: {send_email_confirmation}, Email vorhanden: {bool(user_email)})")
+                    booking_log.warning(f"Buchungsbestätigung an {user_email} fehlgeschlagen: {e}")
             
             # Broadcast an SSE-Clients
             if notification_id:
@@ -1277,30 +1483,10 @@ def can_modify_booking(booking_date_str, period):
         Tuple (can_modify: bool, reason: str or None)
     """
     try:
-        booking_date = datetime.strptime(booking_date_str, '%Y-%m-%d').date()
-        now = datetime.now(get_berlin_tz())
-        today = now.date()
-        
-        # Vergangenes Datum?
-        if booking_date < today:
-            return False, "Vergangener Termin"
-        
-        # Heute: Prüfe ob weniger als 1 Stunde bis zum Termin
-        if booking_date == today:
-            period_start_str = PERIOD_TIMES[period]['start']
-            period_start_time = datetime.strptime(period_start_str, '%H:%M').time()
-            period_start = datetime.combine(today, period_start_time)
-            period_start = get_berlin_tz().localize(period_start)
-            
-            # 1 Stunde vor Beginn
-            cutoff_time = period_start - timedelta(hours=1)
-            
-            if now >= cutoff_time:
-                return False, "Weniger als 1 Stunde vor Termin"
-        
-        return True, None
+        booking_date = date.fromisoformat(booking_date_str)
+        return get_period_clock().can_modify(booking_date, period)
     except Exception as e:
-        print(f"Fehler bei can_modify_booking: {e}")
+        app.logger.error(f"Fehler bei can_modify_booking: {e}")
         return False, "Fehler bei der Prüfung"
 
 # Route: Meine Buchungen
@@ -1308,17 +1494,18 @@ def can_modify_booking(booking_date_str, period):
 @login_required
 def meine_buchungen():
     """Zeigt alle Buchungen des Benutzers (oder alle für Admin)"""
-    from models import get_all_bookings, Booking
+    from models import get_all_bookings, get_bookings_for_teacher
     
     user_id = session['user_id']
     is_admin = session.get('user_role') == 'admin'
+    # Abgeschlossene Schuljahre nur auf Wunsch (archive.py)
+    include_archive = request.args.get('archive') == '1'
     
     # Admin sieht alle Buchungen, normale Benutzer nur ihre eigenen
     if is_admin:
-        all_bookings = get_all_bookings()
+        all_bookings = get_all_bookings(include_archive=include_archive)
     else:
-        bookings_query = Booking.query.filter_by(teacher_id=user_id).order_by(Booking.date.desc(), Booking.period).all()
-        all_bookings = [b.to_dict() for b in bookings_query]
+        all_bookings = get_bookings_for_teacher(user_id, include_archive=include_archive)
     
     # Deutsche Wochentagsnamen
     weekday_names_de = {
@@ -1334,8 +1521,11 @@ def meine_buchungen():
         # Prüfe ob Buchung bearbeitet/gelöscht werden kann
         can_modify, modify_reason = can_modify_booking(booking_dict['date'], booking_dict['period'])
         
-        # Admin kann immer bearbeiten
-        if is_admin:
+        # Admin kann immer bearbeiten, archivierte Buchungen niemand
+        if booking_dict.get('archived'):
+            can_modify = False
+            modify_reason = 'Archiviert'
+        elif is_admin:
             can_modify = True
             modify_reason = None
         
@@ -1343,7 +1533,7 @@ def meine_buchungen():
         try:
             booking_date = datetime.strptime(booking_dict['date'], '%Y-%m-%d').date()
             date_formatted = booking_date.strftime('%d.%m.%Y')
-            is_past = booking_date < datetime.now(get_berlin_tz()).date()
+            is_past = booking_date < get_period_clock().today
         except:
             date_formatted = booking_dict['date']
             is_past = False
@@ -1378,12 +1568,14 @@ def meine_buchungen():
             'can_modify': can_modify,
             'modify_reason': modify_reason,
             'is_past': is_past,
+            'archived': booking_dict.get('archived', False),
             'created_at_formatted': created_at_formatted
         })
     
     return render_template('meine_buchungen.html',
                          bookings=bookings_display,
-                         is_admin=is_admin)
+                         is_admin=is_admin,
+                         include_archive=include_archive)
 
 # Route: Eigene Buchung bearbeiten
 @app.route('/meine-buchungen/bearbeiten/<int:booking_id>', methods=['GET', 'POST'])
@@ -1609,10 +1801,11 @@ def admin():
     
     # Hole alle Buchungen
     filter_date = request.args.get('filter_date', '')
+    include_archive = request.args.get('archive') == '1'
     if filter_date:
-        bookings = get_bookings_by_date(filter_date)
+        bookings = get_bookings_by_date(filter_date, include_archive=include_archive)
     else:
-        bookings = get_all_bookings()
+        bookings = get_all_bookings(include_archive=include_archive)
     
     # Konvertiere Buchungen für Anzeige
     bookings_display = []
@@ -1633,14 +1826,16 @@ def admin():
             'student_count': len(students),
             'notes': booking_dict.get('notes'),
             'is_exclusive': booking_dict.get('is_exclusive', False),
-            'is_approved': booking_dict.get('is_approved', True)
+            'is_approved': booking_dict.get('is_approved', True),
+            'archived': booking_dict.get('archived', False)
         })
     
     return render_template('admin.html',
                          users=users,
                          bookings=bookings_display,
                          pending_exclusive=pending_exclusive_display,
-                         filter_date=filter_date)
+                         filter_date=filter_date,
+                         include_archive=include_archive)
 
 # Route: Exklusive Buchung genehmigen
 @app.route('/admin/approve_exclusive/<int:booking_id>', methods=['POST'])
@@ -1698,7 +1893,8 @@ def approve_exclusive(booking_id):
         
         if removed_count > 0:
             db.session.commit()
-            print(f"[EXCLUSIVE] {removed_count} konfliktierende Buchungen für {date_str} Stunde {period} entfernt")
+            booking_log.info("Einzelangebot genehmigt: konfliktierende Buchungen entfernt",
+                             extra={'date': date_str, 'period': period, 'removed': removed_count})
         
         # Sende Bestätigungs-E-Mail an den Antragsteller
         if teacher_email:
@@ -1722,9 +1918,9 @@ def approve_exclusive(booking_id):
                         booking_info=teacher['booking_info'],
                         exclusive_info={'teacher': teacher_name, 'student': student_name}
                     )
-                    print(f"[EXCLUSIVE] Stornierungs-E-Mail an {teacher['email']} gesendet")
+                    booking_log.debug("Stornierungs-E-Mail gesendet", extra={'email': teacher['email']})
                 except Exception as e:
-                    print(f"[EXCLUSIVE] E-Mail an {teacher['email']} fehlgeschlagen: {e}")
+                    booking_log.warning(f"Stornierungs-E-Mail an {teacher['email']} fehlgeschlagen: {e}")
         
         if removed_count > 0:
             flash(f'Exklusive Buchung genehmigt. {removed_count} andere Buchung(en) wurden storniert und die Lehrkräfte benachrichtigt.', 'success')
@@ -2206,37 +2402,7 @@ def admin_setup_holidays_2026():
     total_blocked = 0
     total_skipped = 0
     
-    # Niedersachsen Schulferien 2026
-    holidays_2026 = [
-        # Winterferien: 02.02. - 03.02.2026
-        ('2026-02-02', '2026-02-03', '❄️ Winterferien', '❄️'),
-        # Osterferien: 23.03. - 04.04.2026
-        ('2026-03-23', '2026-04-04', '🐣 Osterferien', '🐣'),
-        # Pfingstferien: 26.05.2026
-        ('2026-05-26', '2026-05-26', '🌸 Pfingstferien', '🌸'),
-        # Sommerferien: 16.07. - 26.08.2026
-        ('2026-07-16', '2026-08-26', '☀️ Sommerferien', '☀️'),
-        # Herbstferien: 12.10. - 24.10.2026
-        ('2026-10-12', '2026-10-24', '🍂 Herbstferien', '🍂'),
-        # Weihnachtsferien: 23.12.2026 - 06.01.2027
-        ('2026-12-23', '2027-01-06', '🎄 Weihnachtsferien', '🎄'),
-    ]
-    
-    # Gesetzliche Feiertage Niedersachsen 2026
-    public_holidays_2026 = [
-        ('2026-01-01', '2026-01-01', '🎆 Neujahr', '🎆'),
-        ('2026-04-03', '2026-04-03', '✝️ Karfreitag', '✝️'),
-        ('2026-04-06', '2026-04-06', '✝️ Ostermontag', '✝️'),
-        ('2026-05-01', '2026-05-01', '🔧 Tag der Arbeit', '🔧'),
-        ('2026-05-14', '2026-05-14', '☁️ Christi Himmelfahrt', '☁️'),
-        ('2026-05-25', '2026-05-25', '🕊️ Pfingstmontag', '🕊️'),
-        ('2026-10-03', '2026-10-03', '🇩🇪 Tag der Deutschen Einheit', '🇩🇪'),
-        ('2026-10-31', '2026-10-31', '⛪ Reformationstag', '⛪'),
-        ('2026-12-25', '2026-12-25', '🎄 1. Weihnachtstag', '🎄'),
-        ('2026-12-26', '2026-12-26', '🎄 2. Weihnachtstag', '🎄'),
-    ]
-    
-    all_holidays = holidays_2026 + public_holidays_2026
+    all_holidays = SCHOOL_HOLIDAYS_2026 + PUBLIC_HOLIDAYS_2026
     
     for start_date, end_date, reason, icon in all_holidays:
         result = bulk_block_slots(start_date, end_date, admin_id, reason, icon=icon)
@@ -2253,7 +2419,8 @@ def admin_bulk_block():
     """Admin kann mehrere Slots auf einmal sperren (z.B. für Ferien)"""
     from models import bulk_block_slots, bulk_unblock_slots, get_all_blocked_slots
     
-    blocked_slots = get_all_blocked_slots()
+    include_archive = request.args.get('archive') == '1'
+    blocked_slots = get_all_blocked_slots(include_archive=include_archive)
     
     if request.method == 'POST':
         # CSRF-Token Validierung
@@ -2304,7 +2471,7 @@ def admin_bulk_block():
         
         return redirect(url_for('admin_bulk_block'))
     
-    return render_template('admin_bulk_block.html', blocked_slots=blocked_slots)
+    return render_template('admin_bulk_block.html', blocked_slots=blocked_slots, include_archive=include_archive)
 
 # ============================================================================
 # Notifications & Server-Sent Events (SSE) Routes
@@ -2391,6 +2558,305 @@ def api_mark_all_notifications_read():
         'success': success
     })
 
+@app.route('/admin/pool_stats', methods=['GET'])
+@admin_required
+def admin_pool_stats():
+    """Zeigt den Zustand des Datenbank-Connection-Pools dieses Workers"""
+    from database import get_pool_stats
+    from server_profile import get_server_profile, get_pool_mode
+    
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'server_profile': get_server_profile()['name'],
+        'pool_mode': get_pool_mode(),
+        'pool': get_pool_stats(db.engine)
+    })
+
+# Route: Langsame SQL-Statements dieses Workers
+@app.route('/admin/slow_queries', methods=['GET', 'POST'])
+@admin_required
+def admin_slow_queries():
+    """Zeigt den Slow-Query-Ringpuffer des antwortenden Workers"""
+    from slow_queries import clear_slow_queries, get_slow_queries, is_enabled
+    
+    if request.method == 'POST':
+        csrf_token = request.form.get('csrf_token', '')
+        if not validate_csrf_token(csrf_token):
+            flash('Ungültiges Sicherheits-Token. Bitte versuchen Sie es erneut.', 'error')
+            return redirect(url_for('admin_slow_queries'))
+        clear_slow_queries()
+        flash('Slow-Query-Log dieses Workers geleert.', 'success')
+        return redirect(url_for('admin_slow_queries'))
+    
+    return render_template('admin_slow_queries.html',
+                           enabled=is_enabled(),
+                           entries=get_slow_queries(),
+                           pid=os.getpid())
+
+# Route: Speicher der Worker und tracemalloc-Report
+@app.route('/admin/memory', methods=['GET', 'POST'])
+@admin_required
+def admin_memory():
+    """RSS aller Worker; POST nimmt einen tracemalloc-Snapshot im antwortenden Worker"""
+    from worker_memory import allocation_report, status, take_snapshot, worker_overview
+    
+    since = request.form.get('since', 'previous')
+    report = None
+    if request.method == 'POST':
+        csrf_token = request.form.get('csrf_token', '')
+        if not validate_csrf_token(csrf_token):
+            flash('Ungültiges Sicherheitstoken. Bitte versuchen Sie es erneut.', 'error')
+            return redirect(url_for('admin_memory'))
+        # Kein Redirect: der Report gehört zu diesem Worker, ein GET landet evtl. bei einem anderen
+        if take_snapshot():
+            report = allocation_report(since=since)
+        else:
+            flash('tracemalloc ist aus. Zum Aktivieren TRACEMALLOC_FRAMES setzen (z.B. 10).', 'error')
+    
+    return render_template('admin_memory.html',
+                           workers=worker_overview(),
+                           status=status(),
+                           report=report,
+                           since=since,
+                           sse_subscribers=len(notification_subscribers))
+
+# Route: Schuljahres-Archiv
+@app.route('/admin/archive', methods=['GET', 'POST'])
+@admin_required
+def admin_archive():
+    """Zeilen pro Schuljahr; POST verschiebt ein abgeschlossenes Schuljahr ins Archiv"""
+    from archive import archive_overview, archive_school_year, school_year_label
+    
+    if request.method == 'POST':
+        csrf_token = request.form.get('csrf_token', '')
+        if not validate_csrf_token(csrf_token):
+            flash('Ungültiges Sicherheitstoken. Bitte versuchen Sie es erneut.', 'error')
+            return redirect(url_for('admin_archive'))
+        try:
+            school_year = int(request.form.get('school_year', ''))
+            result = archive_school_year(school_year)
+        except ValueError as e:
+            flash(f'Archivierung nicht möglich: {e}', 'error')
+            return redirect(url_for('admin_archive'))
+        except Exception:
+            flash('Fehler bei der Archivierung. Bereits verschobene Blöcke bleiben im Archiv; '
+                  'erneut starten, um den Rest zu verschieben.', 'error')
+            return redirect(url_for('admin_archive'))
+        flash(f"✅ Schuljahr {school_year_label(school_year)} archiviert: {result['bookings']} Buchungen, "
+              f"{result['notifications']} Benachrichtigungen, {result['blocked']} Sperren.", 'success')
+        return redirect(url_for('admin_archive'))
+    
+    return render_template('admin_archive.html', years=archive_overview())
+
+# Route: Auslastungsstatistik (aus booking_rollups)
+@app.route('/admin/analytics', methods=['GET', 'POST'])
+@admin_required
+def admin_analytics():
+    """Auslastung nach Wochentag/Stunde, Monat, Klasse, Lehrkraft und Angebot für ein (Halb-)Schuljahr"""
+    from analytics import last_refresh, refresh_rollups, term_ranges, utilization
+    from archive import current_school_year, school_year_label
+    
+    current_year = current_school_year()
+    year_labels = {year: school_year_label(year) for year in range(current_year, current_year - 5, -1)}
+    # Nur die angebotenen Schuljahre; sonst würde z.B. 0 oder 9999 in date() scheitern
+    school_year = request.values.get('school_year', type=int)
+    if school_year not in year_labels:
+        school_year = current_year
+    terms = term_ranges(school_year)
+    term = request.values.get('term', 0, type=int)
+    if term not in range(len(terms)):
+        term = 0
+    term_label, first_day, last_day = terms[term]
+    
+    if request.method == 'POST':
+        csrf_token = request.form.get('csrf_token', '')
+        if not validate_csrf_token(csrf_token):
+            flash('Ungültiges Sicherheitstoken. Bitte versuchen Sie es erneut.', 'error')
+        else:
+            # Immer das ganze Schuljahr, damit die Halbjahre denselben Stand haben
+            _, year_first_day, year_last_day = terms[0]
+            rows = refresh_rollups(year_first_day, year_last_day)
+            flash(f'Statistik für {school_year_label(school_year)} neu berechnet ({rows} Rollup-Zeilen).', 'success')
+        return redirect(url_for('admin_analytics', school_year=school_year, term=term))
+    
+    return render_template('admin_analytics.html',
+                           school_year=school_year,
+                           school_year_label=school_year_label(school_year),
+                           year_labels=year_labels,
+                           terms=terms,
+                           term=term,
+                           term_label=term_label,
+                           first_day=first_day,
+                           last_day=last_day,
+                           refreshed=last_refresh(first_day, last_day),
+                           stats=utilization(first_day, last_day))
+
+# Route: Sammel-Import von Buchungen (CSV)
+@app.route('/admin/import', methods=['GET', 'POST'])
+@admin_required
+def admin_import():
+    """CSV prüfen und fehlerfreie Dateien in einer Transaktion importieren"""
+    from booking_import import MAX_IMPORT_ROWS, import_bookings
+    
+    report = None
+    if request.method == 'POST':
+        csrf_token = request.form.get('csrf_token', '')
+        if not validate_csrf_token(csrf_token):
+            flash('Ungültiges Sicherheitstoken. Bitte versuchen Sie es erneut.', 'error')
+            return redirect(url_for('admin_import'))
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            flash('Bitte eine CSV-Datei auswählen.', 'error')
+            return redirect(url_for('admin_import'))
+        try:
+            text = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            # Excel speichert CSV unter Windows oft als cp1252
+            upload.seek(0)
+            text = upload.read().decode('cp1252', errors='replace')
+        
+        dry_run = request.form.get('action') != 'import'
+        report = import_bookings(text, dry_run=dry_run)
+        if report['error']:
+            flash(report['error'], 'error')
+        elif report['error_count']:
+            flash(f"{report['error_count']} fehlerhafte Zeile(n) - es wurde nichts importiert.", 'error')
+        elif report['imported']:
+            flash(f"✅ {report['imported']} Buchungen importiert.", 'success')
+        else:
+            flash(f"Alle {len(report['rows'])} Zeilen sind gültig. Zum Anlegen „Importieren“ wählen.", 'success')
+    
+    return render_template('admin_import.html', report=report, max_rows=MAX_IMPORT_ROWS)
+
+# Route: Export der Buchungen (CSV/XLSX, gestreamt)
+@app.route('/admin/export', methods=['GET'])
+@admin_required
+def admin_export():
+    """Formular; mit ?format=csv|xlsx wird die Datei gestreamt (eine Zeile pro Schüler*in)"""
+    from flask import stream_with_context
+    from archive import current_school_year, school_year_bounds
+    from config import SCHOOL_CLASSES
+    from export import EXPORT_FORMATS, iter_export_rows
+    from models import get_all_users
+    
+    export_format = request.args.get('format', '')
+    if export_format not in EXPORT_FORMATS:
+        first_day, next_year = school_year_bounds(current_school_year())
+        return render_template('admin_export.html',
+                               start_date=first_day,
+                               end_date=(date.fromisoformat(next_year) - timedelta(days=1)).isoformat(),
+                               teachers=[u for u in get_all_users() if u['role'] == 'teacher'],
+                               school_classes=SCHOOL_CLASSES)
+    
+    start_date = request.args.get('start_date', '')
+    end_date = request.args.get('end_date', '')
+    try:
+        date.fromisoformat(start_date)
+        date.fromisoformat(end_date)
+    except ValueError:
+        flash('Bitte einen gültigen Zeitraum angeben.', 'error')
+        return redirect(url_for('admin_export'))
+    teacher_id = request.args.get('teacher_id', type=int)
+    school_class = request.args.get('school_class', '').strip() or None
+    include_archive = request.args.get('archive') == '1'
+    
+    content_type, stream = EXPORT_FORMATS[export_format]
+    rows = iter_export_rows(start_date, end_date, teacher_id=teacher_id, school_class=school_class,
+                            include_archive=include_archive)
+    response = Response(stream_with_context(stream(rows)), content_type=content_type)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="sportoase-buchungen-{start_date}-{end_date}.{export_format}"')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Route: Langsamste Traces und Aufschlüsselung nach Abhängigkeit
+@app.route('/admin/traces', methods=['GET'])
+@admin_required
+def admin_traces():
+    """Langsamste Traces aus TRACE_FILE und Mittelwerte pro Route"""
+    from tracing import is_enabled, trace_file, trace_summary
+    
+    return render_template('admin_traces.html',
+                           enabled=is_enabled(),
+                           trace_file=trace_file(),
+                           summary=trace_summary() if trace_file() else None)
+
+# Route: Wasserfall eines Traces
+@app.route('/admin/traces/<trace_id>', methods=['GET'])
+@admin_required
+def admin_trace(trace_id):
+    """Zeigt die Spans eines Traces als Wasserfall"""
+    from tracing import find_trace
+    
+    trace = find_trace(trace_id)
+    if trace is None:
+        flash('Trace nicht gefunden (evtl. bereits rotiert).', 'error')
+        return redirect(url_for('admin_traces'))
+    
+    return render_template('admin_traces.html', trace=trace)
+
+# Route: Gespeicherte Request-Profile (Sampling-Profiler)
+@app.route('/admin/profiles', methods=['GET', 'POST'])
+@admin_required
+def admin_profiles():
+    """Listet die gespeicherten Profile aller Worker"""
+    from profiler import clear_profiles, list_profiles
+    
+    if request.method == 'POST':
+        csrf_token = request.form.get('csrf_token', '')
+        if not validate_csrf_token(csrf_token):
+            flash('Ungültiges Sicherheitstoken. Bitte versuchen Sie es erneut.', 'error')
+            return redirect(url_for('admin_profiles'))
+        clear_profiles()
+        flash('Alle Profile gelöscht.', 'success')
+        return redirect(url_for('admin_profiles'))
+    
+    return render_template('admin_profiles.html', profiles=list_profiles())
+
+# Route: Flamegraph eines Profils
+@app.route('/admin/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def admin_profile(profile_id):
+    """Zeigt ein Profil als Flamegraph"""
+    from profiler import load_profile, render_flamegraph
+    
+    profile = load_profile(profile_id)
+    if profile is None:
+        flash('Profil nicht gefunden (evtl. bereits gelöscht).', 'error')
+        return redirect(url_for('admin_profiles'))
+    
+    return render_template('admin_profiles.html', profile=profile,
+                           flamegraph=render_flamegraph(profile['stacks']))
+
+# Route: Profil im Collapsed-Stack-Format (flamegraph.pl, speedscope)
+@app.route('/admin/profiles/<profile_id>/collapsed', methods=['GET'])
+@admin_required
+def admin_profile_collapsed(profile_id):
+    """Liefert die Stacks eines Profils als Textdatei"""
+    from profiler import collapsed_text, load_profile
+    
+    profile = load_profile(profile_id)
+    if profile is None:
+        return 'Profil nicht gefunden', 404
+    
+    return Response(collapsed_text(profile['stacks']), content_type='text/plain; charset=utf-8',
+                    headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.txt'})
+
+# Route: Prometheus-Metriken aller Worker
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Metriken im Prometheus-Textformat (Admins oder Scraper mit METRICS_TOKEN)"""
+    from metrics import PROMETHEUS_CONTENT_TYPE, metrics_token_valid, render_metrics
+    
+    def render():
+        return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE,
+                        headers={'Cache-Control': 'no-store'})
+    
+    if metrics_token_valid(request.headers.get('Authorization')):
+        return render()
+    return admin_required(render)()
+
 # Error-Handler für Production mit Fallback
 @app.errorhandler(404)
 def not_found_error(error):
@@ -2420,30 +2886,6 @@ def forbidden_error(error):
     except Exception:
         return '<h1>403 - Zugriff verweigert</h1><p><a href="/">Zur Startseite</a></p>', 403
 
-# Logging-Konfiguration für Production
-import logging
-from logging.handlers import RotatingFileHandler
-import os
-
-if os.environ.get('FLASK_ENV') == 'production' or not os.environ.get('FLASK_DEBUG'):
-    if not os.path.exists('logs'):
-        try:
-            os.mkdir('logs')
-        except OSError:
-            pass
-    
-    try:
-        file_handler = RotatingFileHandler('logs/sportoase.log', maxBytes=10240000, backupCount=10)
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('SportOase Buchungssystem gestartet (Production Mode)')
-    except Exception as e:
-        print(f"Fehler beim Einrichten des Logging-Handlers: {e}")
-
 if __name__ == '__main__':
     # Starte die Anwendung
     app.run(host='0.0.0.0', port=5000, debug=True)
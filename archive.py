@@ -0,0 +1,193 @@
+# Archiv abgeschlossener Schuljahre
+#
+# Buchungen, gesperrte Slots und Benachrichtigungen wachsen mit jedem
+# Schuljahr, gelesen werden aber fast nur die laufenden Wochen. Beim
+# Jahreswechsel verschiebt archive_school_year() ein abgeschlossenes
+# Schuljahr in die Tabellen bookings_archive, blocked_slots_archive und
+# notifications_archive (Migration 6). Die Live-Tabellen und ihre Indizes
+# bleiben so klein wie ein Schuljahr.
+#
+# Archivtabellen statt Range-Partitionen: sie funktionieren auf PostgreSQL
+# und SQLite gleich und brauchen keinen Umbau der bestehenden Tabellen.
+#
+# Ein Schuljahr beginnt am SCHOOL_YEAR_START (config.py, 1. August) und wird
+# über sein Startjahr bezeichnet (2025 = 2025/26). Verschoben wird in Blöcken
+# von batch_size Buchungen, jeder Block in einer eigenen kurzen Transaktion;
+# ein abgebrochener Lauf kann einfach wiederholt werden.
+#
+# Admin-Ansicht, "Meine Buchungen" und Sperrverwaltung lesen standardmäßig nur
+# die Live-Tabellen, mit ?archive=1 zusätzlich das Archiv.
+#
+# Ausführen:
+#   python archive.py            # Übersicht pro Schuljahr
+#   python archive.py 2025       # Schuljahr 2025/26 archivieren
+
+import logging
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import func, insert, literal, select
+
+from config import SCHOOL_YEAR_START
+from database import db
+from models import (BlockedSlot, BlockedSlotArchive, Booking, BookingArchive,
+                    Notification, NotificationArchive)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+BATCH_PAUSE = 0.05
+
+
+def school_year_of(day):
+    """Startjahr des Schuljahres für ein Datum oder 'YYYY-MM-DD'"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return day.year if (day.month, day.day) >= SCHOOL_YEAR_START else day.year - 1
+
+
+def school_year_label(start_year):
+    """2025 → '2025/26'"""
+    return f"{start_year}/{(start_year + 1) % 100:02d}"
+
+
+def school_year_bounds(start_year):
+    """Erster Tag des Schuljahres und erster Tag des folgenden (als 'YYYY-MM-DD')"""
+    month, day = SCHOOL_YEAR_START
+    return (date(start_year, month, day).isoformat(),
+            date(start_year + 1, month, day).isoformat())
+
+
+def current_school_year():
+    return school_year_of(date.today())
+
+
+def _count_by_year(model, counts, key):
+    """Zeilen pro Schuljahr über eine Gruppierung nach Monat (eine Query pro Tabelle)"""
+    month = func.substr(model.date, 1, 7)
+    for value, count in db.session.query(month, func.count()).group_by(month):
+        if not value:
+            continue
+        year = school_year_of(f"{value}-01")
+        counts.setdefault(year, {'bookings': 0, 'blocked': 0, 'archived_bookings': 0,
+                                 'archived_blocked': 0})[key] += count
+
+
+def archive_overview():
+    """
+    Zeilen pro Schuljahr in Live- und Archivtabellen für /admin/archive.
+
+    Returns:
+        Liste von Dicts (neuestes Schuljahr zuerst) mit school_year, label,
+        closed (archivierbar), bookings, blocked, archived_bookings, archived_blocked
+    """
+    counts = {}
+    _count_by_year(Booking, counts, 'bookings')
+    _count_by_year(BlockedSlot, counts, 'blocked')
+    _count_by_year(BookingArchive, counts, 'archived_bookings')
+    _count_by_year(BlockedSlotArchive, counts, 'archived_blocked')
+    current = current_school_year()
+    return [dict(entry, school_year=year, label=school_year_label(year), closed=year < current)
+            for year, entry in sorted(counts.items(), reverse=True)]
+
+
+def _copy_columns(live, archive):
+    """Spalten für INSERT ... SELECT: alle Live-Spalten plus school_year"""
+    names = [column.name for column in live.__table__.columns]
+    return ([archive.__table__.c[name] for name in names] + [archive.__table__.c.school_year],
+            [live.__table__.c[name] for name in names])
+
+
+def _move_bookings(start_year, first, last, batch_size):
+    """Buchungen samt Benachrichtigungen blockweise verschieben"""
+    archive_columns, live_columns = _copy_columns(Booking, BookingArchive)
+    note_archive_columns, note_live_columns = _copy_columns(Notification, NotificationArchive)
+    year = literal(start_year)
+    moved = notifications = 0
+    while True:
+        ids = [row[0] for row in db.session.query(Booking.id)
+               .filter(Booking.date >= first, Booking.date < last)
+               .order_by(Booking.id).limit(batch_size)]
+        if not ids:
+            return moved, notifications
+        db.session.execute(insert(BookingArchive).from_select(
+            archive_columns, select(*live_columns, year).where(Booking.id.in_(ids))))
+        result = db.session.execute(insert(NotificationArchive).from_select(
+            note_archive_columns, select(*note_live_columns, year).where(Notification.booking_id.in_(ids))))
+        notifications += result.rowcount or 0
+        db.session.query(Notification).filter(Notification.booking_id.in_(ids)).delete(synchronize_session=False)
+        db.session.query(Booking).filter(Booking.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        moved += len(ids)
+        time.sleep(BATCH_PAUSE)
+
+
+def _move_blocked_slots(start_year, first, last, batch_size):
+    archive_columns, live_columns = _copy_columns(BlockedSlot, BlockedSlotArchive)
+    year = literal(start_year)
+    moved = 0
+    while True:
+        ids = [row[0] for row in db.session.query(BlockedSlot.id)
+               .filter(BlockedSlot.date >= first, BlockedSlot.date < last)
+               .order_by(BlockedSlot.id).limit(batch_size)]
+        if not ids:
+            return moved
+        db.session.execute(insert(BlockedSlotArchive).from_select(
+            archive_columns, select(*live_columns, year).where(BlockedSlot.id.in_(ids))))
+        db.session.query(BlockedSlot).filter(BlockedSlot.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        moved += len(ids)
+        time.sleep(BATCH_PAUSE)
+
+
+def archive_school_year(start_year, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Verschiebt ein abgeschlossenes Schuljahr in die Archivtabellen.
+
+    Jeder Block (Kopie ins Archiv + Löschen aus der Live-Tabelle) ist eine
+    eigene Transaktion; bricht der Lauf ab, sind alle fertigen Blöcke
+    vollständig verschoben und ein erneuter Aufruf macht beim Rest weiter.
+
+    Args:
+        start_year: Startjahr des Schuljahres (2025 = 2025/26)
+
+    Returns:
+        Dict mit bookings, notifications, blocked (Anzahl verschobener Zeilen)
+
+    Raises:
+        ValueError: wenn das Schuljahr noch läuft oder in der Zukunft liegt
+    """
+    if start_year >= current_school_year():
+        raise ValueError(f"Schuljahr {school_year_label(start_year)} ist noch nicht abgeschlossen")
+    first, last = school_year_bounds(start_year)
+    started = time.perf_counter()
+    try:
+        bookings, notifications = _move_bookings(start_year, first, last, batch_size)
+        blocked = _move_blocked_slots(start_year, first, last, batch_size)
+    except Exception:
+        db.session.rollback()
+        logger.exception(f"Archivierung {school_year_label(start_year)} abgebrochen")
+        raise
+    logger.info(
+        f"Schuljahr {school_year_label(start_year)} archiviert: {bookings} Buchungen, "
+        f"{notifications} Benachrichtigungen, {blocked} Sperren ({time.perf_counter() - started:.1f}s)",
+        extra={'school_year': start_year},
+    )
+    return {'bookings': bookings, 'notifications': notifications, 'blocked': blocked}
+
+
+if __name__ == '__main__':
+    from database import create_cli_app
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    with create_cli_app().app_context():
+        if len(sys.argv) > 1:
+            result = archive_school_year(int(sys.argv[1]))
+            print(f"{result['bookings']} Buchungen, {result['notifications']} Benachrichtigungen, "
+                  f"{result['blocked']} Sperren archiviert")
+        else:
+            for entry in archive_overview():
+                print(f"{entry['label']:>8}  live: {entry['bookings']:>6} Buchungen {entry['blocked']:>5} Sperren"
+                      f"   Archiv: {entry['archived_bookings']:>6} Buchungen {entry['archived_blocked']:>5} Sperren"
+                      f"{'' if entry['closed'] else '   (laufend)'}")
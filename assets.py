@@ -0,0 +1,98 @@
+# Statische Assets mit Fingerprint (static/dist)
+#
+# build_assets.py erzeugt aus static/ inhaltsadressierte Dateien
+# (z.B. dist/style.3f2a1b9c0d.css), vorkomprimierte .gz/.br-Varianten und
+# verkleinerte Logo-Varianten und schreibt static/dist/manifest.json.
+#
+# In Templates:  {{ static_url('style.css') }}
+#                {{ static_url('logo.png', width=400, fmt='webp') }}
+#
+# Ohne Build (lokale Entwicklung) liefert static_url die Originaldatei.
+
+import json
+import logging
+import mimetypes
+import os
+
+from flask import request, send_from_directory, url_for
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Fingerprint-Dateien ändern sich nie → ein Jahr cachen, nie revalidieren
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Vorkomprimierte Varianten in Reihenfolge der Präferenz
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = {}
+
+
+def variant_name(filename, width=None, fmt=None):
+    """Manifest-Schlüssel einer Variante, z.B. logo.png, 400, webp → logo@400.webp"""
+    if width is None and fmt is None:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    suffix = f'@{width}' if width else ''
+    return f"{stem}{suffix}.{fmt or ext.lstrip('.')}"
+
+
+def load_manifest(static_folder):
+    """Liest static/dist/manifest.json (leer, wenn kein Build vorliegt)"""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Asset-Manifest {path} nicht lesbar: {e}")
+        return {}
+
+
+def static_url(filename, width=None, fmt=None):
+    """
+    URL einer statischen Datei, bevorzugt die Fingerprint-Variante aus dem Build.
+
+    Args:
+        filename: Pfad relativ zu static/, z.B. 'style.css'
+        width: gewünschte Breite einer Bild-Variante (nur wenn gebaut)
+        fmt: gewünschtes Format einer Bild-Variante, z.B. 'webp'
+    """
+    built = _manifest.get(variant_name(filename, width, fmt))
+    if built is None:
+        return url_for('static', filename=filename)
+    return url_for('static', filename=built)
+
+
+def init_assets(app):
+    """Registriert static_url in Jinja und die Auslieferung von static/dist"""
+    _manifest.clear()
+    _manifest.update(load_manifest(app.static_folder))
+    if _manifest:
+        logger.info(f"Asset-Manifest geladen ({len(_manifest)} Dateien)")
+
+    app.add_template_global(static_url)
+    dist_folder = os.path.join(app.static_folder, DIST_DIR)
+
+    # Spezifischer als /static/<path:filename> und hat deshalb Vorrang
+    @app.route(f'{app.static_url_path}/{DIST_DIR}/<path:filename>')
+    def static_dist(filename):
+        """Liefert Fingerprint-Assets mit immutable-Caching und .br/.gz-Varianten aus"""
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = None
+        for encoding, ext in PRECOMPRESSED:
+            if request.accept_encodings[encoding] and os.path.isfile(os.path.join(dist_folder, filename + ext)):
+                response = send_from_directory(dist_folder, filename + ext, mimetype=mimetype,
+                                               max_age=IMMUTABLE_MAX_AGE)
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(dist_folder, filename, mimetype=mimetype,
+                                           max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
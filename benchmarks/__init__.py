@@ -0,0 +1,2 @@
+# Last- und Performance-Werkzeuge für das SportOase-Buchungssystem
+# Aufruf jeweils aus dem Projektverzeichnis, z.B.: python -m benchmarks.loadtest --help
@@ -0,0 +1,132 @@
+# Größen-Budget für das HTML der Hauptseiten
+#
+# Rendert die Seiten über den Flask-Test-Client (Admin- und Lehrkraft-Ansicht)
+# gegen eine temporäre SQLite-Datenbank und bricht mit Exit-Code 1 ab, wenn
+#   - eine Seite ihr Budget (unkomprimierte Bytes) überschreitet oder
+#   - eine Seite mehr als INLINE_BUDGET Bytes Inline-<style>/<script> enthält.
+#
+# CSS und JavaScript gehören nach static/ (siehe build_assets.py), damit der
+# Browser sie cachen kann und sie nicht mit jeder HTML-Antwort übertragen werden.
+# Inline bleibt nur kleiner seitenspezifischer Code, der Template-Daten braucht.
+#
+# Beispiel (aus dem Projektverzeichnis):
+#
+#   python -m benchmarks.check_html_size --runs 20
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget in Bytes je Seite und Rolle (leere Datenbank, ohne Buchungen)
+PAGE_BUDGETS = (
+    ('admin', '/dashboard', 90_000),
+    ('teacher', '/dashboard', 75_000),
+    ('admin', '/calendar', 24_000),
+    ('admin', '/meine-buchungen', 8_000),
+    ('admin', '/admin', 12_000),
+    ('admin', '/admin/manage_slots', 21_000),
+    ('teacher', '/book/{day}/3', 16_000),
+)
+
+# Inline-<style>/<script> je Seite in Bytes
+INLINE_BUDGET = 4096
+
+INLINE_BLOCK = re.compile(r'<(style|script)(?![^>]*\bsrc=)[^>]*>(.*?)</\1>', re.I | re.S)
+
+
+def next_school_day(days_ahead=7):
+    """Nächster Wochentag (Mo-Fr) mindestens days_ahead Tage in der Zukunft"""
+    day = date.today() + timedelta(days=days_ahead)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def create_client(app, user):
+    """Test-Client mit eingeloggter Session für user"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user['id']
+        session['user_role'] = user['role']
+        session['user_username'] = user['username']
+    return client
+
+
+def setup_test_app(name):
+    """
+    Importiert app gegen eine temporäre SQLite-Datenbank und legt je einen
+    Admin und eine Lehrkraft an.
+
+    Returns:
+        (app, {'admin': user_dict, 'teacher': user_dict})
+    """
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault('SESSION_SECRET', name)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, f'{name}.sqlite')
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    from app import app
+    from database import db
+    from models import create_user, get_user_by_username
+
+    app.config['SESSION_COOKIE_SECURE'] = False
+    with app.app_context():
+        db.create_all()
+        create_user(f'{name}-admin', 'x', 'admin', f'{name}-admin@kgs-pattensen.de')
+        create_user(f'{name}-teacher', 'x', 'teacher', f'{name}-teacher@kgs-pattensen.de')
+        users = {
+            'admin': get_user_by_username(f'{name}-admin'),
+            'teacher': get_user_by_username(f'{name}-teacher'),
+        }
+    return app, users
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML-Größen-Budget der Hauptseiten prüfen')
+    parser.add_argument('--runs', type=int, default=10, help='Renderdurchläufe je Seite für die Zeitmessung')
+    args = parser.parse_args()
+
+    app, users = setup_test_app('html-size')
+    clients = {role: create_client(app, user) for role, user in users.items()}
+    day = next_school_day().isoformat()
+
+    failed = False
+    print(f"{'Seite':<32} {'Rolle':<8} {'Bytes':>8} {'Budget':>8} {'Inline':>7} {'Median':>9}")
+    for role, path, budget in PAGE_BUDGETS:
+        path = path.format(day=day)
+        client = clients[role]
+        timings = []
+        for _ in range(max(1, args.runs)):
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+        html = response.get_data(as_text=True)
+        size = len(response.get_data())
+        inline = sum(len(match.group(2).encode('utf-8')) for match in INLINE_BLOCK.finditer(html))
+        median = sorted(timings)[len(timings) // 2]
+        status = '✅'
+        if response.status_code != 200:
+            status = f'❌ HTTP {response.status_code}'
+            failed = True
+        elif size > budget:
+            status = '❌ über Budget'
+            failed = True
+        elif inline > INLINE_BUDGET:
+            status = '❌ zu viel Inline-<style>/<script>'
+            failed = True
+        print(f"{path:<32} {role:<8} {size:>8} {budget:>8} {inline:>7} {median:>7.1f}ms {status}")
+
+    if failed:
+        sys.exit(1)
+    print("✅ HTML-Größen im Budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# Import-Zeit-Budget für den Kaltstart der App
+#
+# Startet mehrmals einen frischen Interpreter mit `python -X importtime -c "import app"`
+# und bricht mit Exit-Code 1 ab, wenn
+#   - die kumulierte Import-Zeit von `app` (bester Lauf) das Budget überschreitet oder
+#   - ein Modul geladen wird, das erst bei der ersten Verwendung importiert werden soll.
+#
+# Beispiel (aus dem Projektverzeichnis):
+#
+#   python -m benchmarks.check_import_time --budget-ms 500
+#
+# DATABASE_URL wird für den Test auf eine temporäre SQLite-Datei gesetzt,
+# es wird keine Verbindung zur Produktionsdatenbank aufgebaut.
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schwere Module, die beim Start nicht geladen werden dürfen
+LAZY_MODULES = (
+    'resend',          # email_service.send_email_resend
+    'requests',        # Replit Connector / resend
+    'authlib',         # oauth_config.init_oauth
+    'pytz',            # ersetzt durch zoneinfo (period_clock)
+    'googleapiclient',
+    'google.auth',
+)
+
+DEFAULT_BUDGET_MS = 500
+
+
+def measure_import(database_url):
+    """
+    Importiert app in einem frischen Prozess.
+
+    Returns:
+        (kumulierte Zeit von app in ms, Menge aller importierten Modulnamen)
+    """
+    env = dict(os.environ, SESSION_SECRET='importtime', DATABASE_URL=database_url)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app fehlgeschlagen:\n{result.stderr[-2000:]}")
+
+    app_us = None
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        module = name.strip()
+        modules.add(module)
+        if name.rstrip() == ' app' and cumulative.strip().isdigit():
+            app_us = int(cumulative.strip())
+    if app_us is None:
+        raise RuntimeError("Keine importtime-Zeile für app gefunden")
+    return app_us / 1000.0, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-Zeit-Budget für app.py prüfen')
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.environ.get('IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = 'sqlite:///' + os.path.join(tmp, 'importtime.sqlite')
+        # Erster Lauf erzeugt die .pyc-Dateien und zählt nicht
+        measure_import(database_url)
+        timings = []
+        loaded = set()
+        for _ in range(max(1, args.runs)):
+            ms, modules = measure_import(database_url)
+            timings.append(ms)
+            loaded |= modules
+
+    best = min(timings)
+    print(f"import app: bester Lauf {best:.1f} ms, Median {sorted(timings)[len(timings) // 2]:.1f} ms "
+          f"(Budget {args.budget_ms:.0f} ms, {len(timings)} Läufe)")
+
+    failed = False
+    eager = sorted(m for m in loaded
+                   if any(m == lazy or m.startswith(lazy + '.') for lazy in LAZY_MODULES))
+    if eager:
+        print(f"❌ Beim Start geladen, sollte lazy sein: {', '.join(eager)}")
+        failed = True
+    if best > args.budget_ms:
+        print(f"❌ Import-Budget überschritten: {best:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Import-Zeit im Budget")
+
+
+if __name__ == '__main__':
+    main()
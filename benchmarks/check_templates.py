@@ -0,0 +1,78 @@
+# Prüft, dass alle Templates vorab kompilierbar sind
+#
+# Kompiliert jedes Template aus templates/ mit der Jinja-Umgebung der App
+# (gleiche Filter und Globals) und bricht mit Exit-Code 1 ab, wenn eines
+# einen Syntaxfehler oder einen unbekannten Filter/Test enthält. Zusätzlich
+# werden die Ladezeiten verglichen:
+#   kalt       - Quelltext parsen und kompilieren (erster Aufruf ohne Cache)
+#   bytecode   - aus dem FileSystemBytecodeCache laden (neuer Worker)
+#   vorab      - bereits im Speicher (nach precompile_templates)
+#
+# Beispiel (aus dem Projektverzeichnis):
+#
+#   python -m benchmarks.check_templates
+
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    cache_dir = tempfile.mkdtemp()
+    os.environ.setdefault('SESSION_SECRET', 'check-templates')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(cache_dir, 'templates.sqlite')
+    os.environ['JINJA_CACHE_DIR'] = cache_dir
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    from jinja2 import TemplateError
+
+    from app import app
+    from template_cache import precompile_templates, template_names
+
+    env = app.jinja_env
+    names = template_names(app)
+    failed = []
+    for name in names:
+        source, filename, _ = env.loader.get_source(env, name)
+        try:
+            env.compile(source, name, filename)
+        except TemplateError as e:
+            failed.append(name)
+            print(f"❌ {name}: {e}")
+
+    if failed:
+        print(f"❌ {len(failed)} von {len(names)} Templates nicht kompilierbar")
+        sys.exit(1)
+
+    def load_all():
+        started = time.perf_counter()
+        for name in names:
+            env.get_template(name)
+        return (time.perf_counter() - started) * 1000
+
+    bytecode_cache = env.bytecode_cache
+    env.bytecode_cache = None
+    env.cache.clear()
+    cold_ms = load_all()
+
+    env.bytecode_cache = bytecode_cache
+    env.cache.clear()
+    load_all()  # füllt den Bytecode-Cache
+    env.cache.clear()
+    bytecode_ms = load_all()
+
+    env.cache.clear()
+    count, precompile_ms = precompile_templates(app)
+    warm_ms = load_all()
+
+    print(f"{count} Templates: kalt {cold_ms:.1f} ms, aus Bytecode-Cache {bytecode_ms:.1f} ms, "
+          f"vorab geladen {warm_ms:.2f} ms (precompile {precompile_ms:.1f} ms)")
+    print("✅ Alle Templates kompilierbar")
+
+
+if __name__ == '__main__':
+    main()
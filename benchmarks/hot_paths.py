@@ -0,0 +1,264 @@
+# Zeitmessung der wichtigsten Routen gegen ein synthetisches Schuljahr
+#
+# Legt (ohne --database-url) eine temporäre SQLite-Datenbank an, füllt sie mit
+# benchmarks.school_year und misst über den Flask-Test-Client:
+#   dashboard (Admin/Lehrkraft), calendar_view, book (POST), meine_buchungen,
+#   admin, bulk_block_slots und die Benachrichtigungs-APIs.
+#
+# Pro Fall werden min/p50/p95/Mittelwert in ms und die SQL-Statements pro Aufruf
+# erfasst. Mit --output entsteht eine JSON-Baseline, mit --compare wird gegen
+# eine Baseline verglichen (Exit-Code 1, wenn min um mehr als --tolerance steigt
+# oder mehr SQL-Statements anfallen). Verglichen wird min statt p50, weil es auf
+# geteilten Maschinen deutlich weniger schwankt. Zeiten sind nur auf derselben
+# Maschine vergleichbar, die SQL-Anzahl dagegen überall.
+#
+# Beispiele (aus dem Projektverzeichnis):
+#
+#   python -m benchmarks.hot_paths --output benchmarks/baselines/sqlite.json
+#   python -m benchmarks.hot_paths --compare benchmarks/baselines/sqlite.json
+#   python -m benchmarks.hot_paths --database-url postgresql://localhost/sportoase_bench
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_RUNS = 30
+WARMUP_RUNS = 2
+DEFAULT_TOLERANCE = 1.0
+SQL_TOLERANCE = 0.5
+
+# Name → (Rolle, Pfad); Platzhalter werden aus dem Datenbestand gefüllt
+GET_CASES = (
+    ('dashboard_admin', 'admin', '/dashboard?date={busy_day}'),
+    ('dashboard_teacher', 'teacher', '/dashboard?date={busy_day}'),
+    ('calendar_view', 'teacher', '/calendar/{year}/{month}'),
+    ('meine_buchungen', 'teacher', '/meine-buchungen'),
+    ('admin', 'admin', '/admin'),
+    ('notifications_recent', 'admin', '/api/notifications/recent?limit=10'),
+    ('notifications_unread_count', 'admin', '/api/notifications/unread_count'),
+)
+
+
+class SqlCounter:
+    """Zählt SQL-Statements über ein Engine-Event"""
+
+    def __init__(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        self.count = 0
+        event.listen(Engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def percentile(sorted_values, pct):
+    """Perzentil (nearest rank) aus einer sortierten Liste"""
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def measure(func, runs, sql_counter):
+    """
+    Führt func WARMUP_RUNS + runs mal aus.
+
+    Returns:
+        Dict mit min/p50/p95/mean (ms), sql pro Aufruf und dem Status des letzten Aufrufs
+    """
+    for index in range(WARMUP_RUNS):
+        func(index)
+    timings = []
+    sql_before = sql_counter.count
+    status = None
+    for index in range(WARMUP_RUNS, WARMUP_RUNS + runs):
+        started = time.perf_counter()
+        status = func(index)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'min_ms': round(timings[0], 2),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'sql_per_call': round((sql_counter.count - sql_before) / runs, 1),
+        'status': status,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def find_bookable_slots(count, today):
+    """Zukünftige, nicht gesperrte Stunden mit mindestens einem freien Platz"""
+    from sqlalchemy import func
+    from database import db
+    from models import Booking, BlockedSlot
+    from benchmarks.school_year import school_days
+    from config import PERIOD_TIMES
+
+    blocked = {(row.date, row.period) for row in db.session.query(BlockedSlot.date, BlockedSlot.period)}
+    booked = {(row.date, row.period): row.bookings for row in db.session.query(
+        Booking.date, Booking.period, func.count(Booking.id).label('bookings')
+    ).group_by(Booking.date, Booking.period)}
+    exclusive = {(row.date, row.period) for row in db.session.query(Booking.date, Booking.period)
+                 .filter(Booking.is_exclusive.is_(True))}
+    slots = []
+    for day in school_days(today + timedelta(days=2), today + timedelta(days=365)):
+        for period in sorted(PERIOD_TIMES):
+            key = (day.isoformat(), period)
+            # Höchstens 3 Buchungen à max. 3 Schüler*innen → bei <= 1 Buchung sicher frei
+            if key in blocked or key in exclusive or booked.get(key, 0) > 1:
+                continue
+            slots.append(key)
+            if len(slots) == count:
+                return slots
+    raise RuntimeError(f"Nur {len(slots)} buchbare Stunden gefunden, {count} benötigt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hot Paths gegen ein synthetisches Schuljahr messen')
+    parser.add_argument('--database-url', help='Leere Datenbank (Standard: temporäre SQLite-Datei)')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--seed', type=int, default=2026)
+    parser.add_argument('--output', help='Ergebnis als JSON-Baseline speichern')
+    parser.add_argument('--compare', help='Mit einer JSON-Baseline vergleichen')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Erlaubter Anstieg von min beim Vergleich (1.0 = doppelt so langsam)')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tmp, 'hot_paths.sqlite')
+    os.environ.setdefault('SESSION_SECRET', 'hot-paths')
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    from app import app
+    from database import db
+    from migrations import run_migrations
+    from models import Booking, Notification, User, bulk_block_slots, bulk_unblock_slots
+    from benchmarks.check_html_size import create_client
+    from benchmarks.school_year import ADMIN_USERNAME, DEFAULT_END, seed_school_year
+
+    app.config['SESSION_COOKIE_SECURE'] = False
+    today = date.today()
+    runs = max(1, args.runs)
+    with app.app_context():
+        run_migrations(db.engine)
+        database = db.engine.dialect.name
+        started = time.perf_counter()
+        counts = seed_school_year(seed=args.seed, today=today)
+        print(f"Schuljahr angelegt in {time.perf_counter() - started:.1f}s: "
+              + ', '.join(f"{value} {key}" for key, value in counts.items()))
+
+        admin = User.query.filter_by(username=ADMIN_USERNAME).first().to_dict()
+        # Lehrkraft mit den meisten Buchungen (größte "Meine Buchungen"-Seite)
+        teacher_id = db.session.query(Booking.teacher_id).group_by(Booking.teacher_id) \
+            .order_by(db.func.count(Booking.id).desc()).first()[0]
+        teacher = User.query.get(teacher_id).to_dict()
+        busy_day = db.session.query(Booking.date).filter(Booking.date > today.isoformat()) \
+            .group_by(Booking.date).order_by(db.func.count(Booking.id).desc()).first()[0]
+        unread_ids = [row.id for row in db.session.query(Notification.id)
+                      .filter(Notification.is_read.is_(False)).order_by(Notification.id).limit(WARMUP_RUNS + runs)]
+        book_slots = find_bookable_slots(WARMUP_RUNS + runs, today)
+
+    clients = {'admin': create_client(app, admin), 'teacher': create_client(app, teacher)}
+    for client in clients.values():
+        with client.session_transaction() as session:
+            session['csrf_token'] = 'hot-paths'
+    placeholders = {'busy_day': busy_day, 'year': today.year, 'month': today.month}
+    sql_counter = SqlCounter()
+    results = {}
+
+    for name, role, path in GET_CASES:
+        client, url = clients[role], path.format(**placeholders)
+        results[name] = measure(lambda index: client.get(url).status_code, runs, sql_counter)
+
+    def book(index):
+        day, period = book_slots[index]
+        return clients['teacher'].post(f'/book/{day}/{period}', data={
+            'teacher_name': 'Benchmark', 'teacher_class': '5a', 'num_students': '1',
+            'student_name_0': f'Benchmark Kind {index}', 'student_class_0': '5a', 'module': 'Aktivierung',
+        }).status_code
+    results['book_post'] = measure(book, runs, sql_counter)
+
+    def mark_read(index):
+        if index >= len(unread_ids):
+            return None
+        return clients['admin'].post(f'/api/notifications/{unread_ids[index]}/mark_read',
+                                     json={'csrf_token': 'hot-paths'}).status_code
+    if len(unread_ids) >= WARMUP_RUNS + runs:
+        results['notifications_mark_read'] = measure(mark_read, runs, sql_counter)
+
+    def block_week(index):
+        # Eine Woche nach dem Datenbestand sperren (ohne vorhandene Sperren),
+        # freigegeben wird erst nach der Messung
+        monday = DEFAULT_END + timedelta(days=7 * (index + 1) - DEFAULT_END.weekday())
+        friday = monday + timedelta(days=4)
+        with app.app_context():
+            result = bulk_block_slots(monday.isoformat(), friday.isoformat(), admin['id'], 'Benchmark')
+        return 'ok' if result['success'] else 'error'
+    results['bulk_block_slots'] = measure(block_week, runs, sql_counter)
+    with app.app_context():
+        bulk_unblock_slots((DEFAULT_END + timedelta(days=1)).isoformat(),
+                           (DEFAULT_END + timedelta(days=7 * (WARMUP_RUNS + runs + 1))).isoformat())
+
+    print(f"{'Fall':<28} {'min':>8} {'p50':>8} {'p95':>8} {'SQL':>6}  Status")
+    for name, result in results.items():
+        print(f"{name:<28} {result['min_ms']:>8.2f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+              f"{result['sql_per_call']:>6.1f}  {result['status']}")
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': database,
+            'runs': runs,
+            'seed': args.seed,
+            'data': counts,
+        },
+        'results': results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"✅ Baseline gespeichert: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = []
+        print(f"\n{'Fall':<28} {'min alt':>9} {'min neu':>9} {'Δ':>7} {'SQL alt':>8} {'SQL neu':>8}")
+        for name, result in results.items():
+            old = baseline.get(name)
+            if not old:
+                continue
+            change = (result['min_ms'] - old['min_ms']) / old['min_ms'] if old['min_ms'] else 0.0
+            print(f"{name:<28} {old['min_ms']:>9.2f} {result['min_ms']:>9.2f} {change:>+7.0%} "
+                  f"{old['sql_per_call']:>8.1f} {result['sql_per_call']:>8.1f}")
+            if change > args.tolerance or result['sql_per_call'] > old['sql_per_call'] + SQL_TOLERANCE:
+                regressions.append(name)
+        if regressions:
+            print(f"❌ Regression: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Keine Regression gegenüber der Baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# Lasttest für /dashboard und /book unter den verschiedenen Server-Profilen
+#
+# Beispiele (aus dem Projektverzeichnis):
+#
+#   # Gegen einen bereits laufenden Server
+#   python -m benchmarks.loadtest --base-url http://127.0.0.1:5000 \
+#       --email lehrer@kgs-pattensen.de
+#
+#   # Startet Gunicorn nacheinander mit jedem Profil und vergleicht
+#   python -m benchmarks.loadtest --spawn --profiles sync,gthread,gevent \
+#       --email lehrer@kgs-pattensen.de
+#
+# Der Login läuft über /iserv/embed. Der Benutzer muss daher bereits in der
+# Datenbank existieren und ISERV_EMBED_SECRET darf für den Test nicht gesetzt sein.
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+
+def next_school_day(days_ahead=2):
+    """Gibt den nächsten Wochentag (Mo-Fr) mindestens days_ahead Tage in der Zukunft zurück"""
+    day = date.today() + timedelta(days=days_ahead)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def percentile(sorted_values, pct):
+    """Perzentil (nearest rank) aus einer sortierten Liste"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Client:
+    """Einfacher HTTP-Client mit Keep-Alive und manueller Cookie-Verwaltung.
+
+    Die Session-Cookies sind als Secure markiert; ein normaler Cookie-Jar würde
+    sie über http:// nicht zurückschicken, deshalb wird der Header selbst gesetzt.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.cookies = {}
+        self.conn = None
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self.conn
+
+    def request(self, method, path, body=None):
+        headers = {'Connection': 'keep-alive'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+        if body is not None:
+            body = urlencode(body)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        reused = self.conn is not None
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # Keep-Alive-Verbindung vom Server geschlossen: wie ein Browser
+            # GET-Requests einmal über eine neue Verbindung wiederholen
+            self.close()
+            if not reused or method != 'GET':
+                raise
+            return self.request(method, path, body)
+        except (http.client.HTTPException, OSError):
+            # Verbindung verworfen (z.B. Worker-Recycling) - beim nächsten Mal neu aufbauen
+            self.close()
+            raise
+        for header, value in response.getheaders():
+            if header.lower() == 'set-cookie':
+                name, _, rest = value.partition('=')
+                self.cookies[name.strip()] = rest.split(';', 1)[0]
+        return response.status, payload
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def login(client, email):
+    """Meldet den Client über den IServ-Embed-Login an"""
+    user = email.split('@')[0]
+    status, _ = client.request('GET', '/iserv/embed?' + urlencode({'user': user, 'email': email}))
+    if status != 302 or 'session' not in client.cookies:
+        raise RuntimeError(f"Login für {email} fehlgeschlagen (Status {status})")
+
+
+def run_load(base_url, email, paths, concurrency, duration):
+    """
+    Führt den Lasttest aus: concurrency Threads rufen die Pfade reihum auf.
+
+    Returns:
+        Dict pfad → {'latencies': [...], 'errors': int}
+    """
+    results = {path: {'latencies': [], 'errors': 0} for path in paths}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        client = Client(base_url)
+        try:
+            login(client, email)
+        except Exception as e:
+            print(f"   Login-Fehler: {e}")
+            with lock:
+                for path in paths:
+                    results[path]['errors'] += 1
+            return
+        i = offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status, _ = client.request('GET', path)
+                ok = status < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    results[path]['latencies'].append(elapsed)
+                else:
+                    results[path]['errors'] += 1
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def print_report(label, results, duration):
+    """Gibt Durchsatz und Latenz-Perzentile pro Pfad aus"""
+    print(f"\n=== Profil: {label} ===")
+    print(f"{'Pfad':<32} {'Req':>6} {'Req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Fehler':>7}")
+    for path, data in results.items():
+        latencies = sorted(data['latencies'])
+        count = len(latencies)
+        print(
+            f"{path:<32} {count:>6} {count / duration:>8.1f} "
+            f"{percentile(latencies, 50) * 1000:>8.1f} "
+            f"{percentile(latencies, 95) * 1000:>8.1f} "
+            f"{percentile(latencies, 99) * 1000:>8.1f} "
+            f"{data['errors']:>7}"
+        )
+
+
+def wait_for_port(host, port, timeout=30):
+    """Wartet, bis der Server Verbindungen annimmt"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def spawn_server(profile, port):
+    """Startet Gunicorn mit dem angegebenen Profil"""
+    env = dict(os.environ, SERVER_PROFILE=profile)
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '--config', 'gunicorn_config.py',
+        '--bind', f'127.0.0.1:{port}',
+        'main:app',
+    ]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lasttest für /dashboard und /book')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--email', required=True, help='E-Mail eines bestehenden Benutzers')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=20.0, help='Sekunden pro Profil')
+    parser.add_argument('--spawn', action='store_true', help='Gunicorn pro Profil selbst starten')
+    parser.add_argument('--profiles', default='sync,gthread,gevent')
+    parser.add_argument('--port', type=int, default=5055, help='Port für --spawn')
+    args = parser.parse_args()
+
+    book_date = next_school_day().strftime('%Y-%m-%d')
+    paths = ['/dashboard', f'/book/{book_date}/3']
+
+    if not args.spawn:
+        results = run_load(args.base_url, args.email, paths, args.concurrency, args.duration)
+        print_report(args.base_url, results, args.duration)
+        return
+
+    for profile in [p.strip() for p in args.profiles.split(',') if p.strip()]:
+        server = spawn_server(profile, args.port)
+        try:
+            if not wait_for_port('127.0.0.1', args.port):
+                print(f"\n=== Profil: {profile} === Server nicht gestartet (Abhängigkeiten installiert?)")
+                continue
+            base_url = f'http://127.0.0.1:{args.port}'
+            results = run_load(base_url, args.email, paths, args.concurrency, args.duration)
+            print_report(profile, results, args.duration)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Übertragene Bytes der Hauptrouten ohne und mit Komprimierung
+#
+# Rendert die Routen über den Flask-Test-Client gegen eine temporäre
+# SQLite-Datenbank mit einer voll gebuchten Woche und fragt jede Route mit
+# Accept-Encoding identity, gzip und br ab (siehe compression.py).
+#
+# Beispiel (aus dem Projektverzeichnis):
+#
+#   python -m benchmarks.measure_wire_size
+
+import argparse
+import time
+from datetime import date, timedelta
+
+from benchmarks.check_html_size import create_client, next_school_day, setup_test_app
+
+ENCODINGS = ('identity', 'gzip', 'br')
+
+STUDENT_NAMES = ['Mia', 'Ben', 'Emma', 'Noah', 'Lina', 'Paul', 'Lea', 'Finn', 'Ida', 'Jonas']
+CLASSES = ['5a', '6b', '7c', '8a', '9b']
+
+
+def seed_week(app, teacher, monday, students_per_slot=3):
+    """Bucht jede Stunde der Woche mit einigen Schüler*innen"""
+    from config import PERIOD_TIMES
+    from models import create_booking
+
+    with app.app_context():
+        for offset in range(5):
+            day = monday + timedelta(days=offset)
+            for period in PERIOD_TIMES:
+                students = [
+                    {'name': f"{STUDENT_NAMES[(offset + period + i) % len(STUDENT_NAMES)]} Beispiel",
+                     'klasse': CLASSES[(period + i) % len(CLASSES)]}
+                    for i in range(students_per_slot)
+                ]
+                create_booking(
+                    date=day.isoformat(), weekday=day.strftime('%a'), period=period,
+                    teacher_id=teacher['id'], students=students,
+                    offer_type='frei', offer_label='Aktivierung',
+                    teacher_name='Frau Beispiel', teacher_class=CLASSES[period % len(CLASSES)],
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Übertragene Bytes mit und ohne Komprimierung messen')
+    parser.add_argument('--runs', type=int, default=5, help='Durchläufe je Route und Kodierung für die Zeitmessung')
+    args = parser.parse_args()
+
+    app, users = setup_test_app('wire-size')
+    day = next_school_day()
+    monday = day - timedelta(days=day.weekday())
+    seed_week(app, users['teacher'], monday)
+    clients = {role: create_client(app, user) for role, user in users.items()}
+
+    routes = (
+        ('admin', f'/dashboard?date={monday.isoformat()}'),
+        ('teacher', f'/dashboard?date={monday.isoformat()}'),
+        ('admin', '/admin'),
+        ('teacher', '/meine-buchungen'),
+        ('admin', f'/calendar/{date.today().year}/{date.today().month}'),
+        ('admin', f'/api/week/{monday.isoformat()}'),
+        ('admin', '/api/notifications/recent'),
+    )
+
+    header = f"{'Route':<34} {'Rolle':<8}" + ''.join(f" {enc:>9}" for enc in ENCODINGS) + f" {'br/id':>7} {'+ms br':>7}"
+    print(header)
+    total = dict.fromkeys(ENCODINGS, 0)
+    for role, path in routes:
+        client = clients[role]
+        sizes = {}
+        timings = {}
+        for encoding in ENCODINGS:
+            samples = []
+            for _ in range(max(1, args.runs)):
+                start = time.perf_counter()
+                response = client.get(path, headers={'Accept-Encoding': encoding})
+                samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, (path, response.status_code)
+            sizes[encoding] = len(response.get_data())
+            timings[encoding] = sorted(samples)[len(samples) // 2]
+            total[encoding] += sizes[encoding]
+        ratio = sizes['br'] / sizes['identity'] if sizes['identity'] else 1.0
+        overhead = timings['br'] - timings['identity']
+        print(f"{path[:34]:<34} {role:<8}" + ''.join(f" {sizes[enc]:>9}" for enc in ENCODINGS)
+              + f" {ratio:>6.0%} {overhead:>+6.1f}")
+
+    print(f"{'Summe':<43}" + ''.join(f" {total[enc]:>9}" for enc in ENCODINGS))
+
+
+if __name__ == '__main__':
+    main()
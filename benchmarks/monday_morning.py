@@ -0,0 +1,448 @@
+# Lasttest "Montagmorgen": 07:00-07:50 mit Login, Dashboard und Buchungen
+#
+# Spielt ein Szenario aus benchmarks/scenarios/*.json gegen einen lokal
+# gestarteten Gunicorn (benchmarks.monday_server) ab:
+#   1. legt eine Datenbank mit einem synthetischen Schuljahr an
+#      (benchmarks.school_year, ohne --database-url eine temporäre SQLite-Datei)
+#   2. startet Gunicorn mit dem Server-Profil des Szenarios; die Uhr der App
+#      läuft im Zeitraffer durch das Zeitfenster des Szenarios, E-Mails werden
+#      nur protokolliert (Dry-Run)
+#   3. concurrency virtuelle Lehrkräfte melden sich wiederholt über /iserv/embed
+#      an (HMAC-Token, kein IServ nötig), öffnen das Dashboard, buchen die
+#      Zielstunden des Szenarios und schauen in "Meine Buchungen"
+#   4. gibt Durchsatz, p50/p95/p99 und Fehlerquote pro Route sowie die
+#      Buchungsergebnisse aus und prüft danach alle Stunden auf Überbuchung
+#
+# Exit-Code 1 bei überbuchten Stunden oder Serverfehlern (Status >= 500).
+#
+# Beispiele (aus dem Projektverzeichnis):
+#
+#   python -m benchmarks.monday_morning
+#   python -m benchmarks.monday_morning --scenario benchmarks/scenarios/monday_morning_smoke.json
+#   python -m benchmarks.monday_morning --database-url postgresql://localhost/sportoase_load \
+#       --concurrency 40 --output /tmp/monday.json
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.loadtest import Client, percentile, wait_for_port
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCENARIO = os.path.join(PROJECT_DIR, 'benchmarks', 'scenarios', 'monday_morning.json')
+
+ROUTES = ('GET /iserv/embed', 'GET /dashboard', 'GET /book', 'POST /book', 'GET /meine-buchungen')
+
+FLASH_PATTERN = re.compile(r'class="message message-(\w+)">([^<]*)<')
+
+# Flash-Text → Buchungsergebnis (erster Treffer gilt)
+BOOKING_OUTCOMES = (
+    ('Buchung erfolgreich', 'gebucht'),
+    ('Exklusive Buchung eingereicht', 'gebucht'),
+    ('voll belegt', 'voll'),
+    ('Nicht genug Plätze', 'voll'),
+    ('Minuten vor Stundenbeginn', 'vorlaufzeit'),
+    ('Vergangenheit', 'vorlaufzeit'),
+    ('Doppelbuchung', 'doppelt'),
+    ('blockiert', 'gesperrt'),
+    ('Einzelangebot', 'gesperrt'),
+)
+
+
+def load_scenario(path):
+    with open(path, encoding='utf-8') as f:
+        scenario = json.load(f)
+    scenario['day'] = date.fromisoformat(scenario['day'])
+    return scenario
+
+
+def school_day_offset(day, offset):
+    """Der offset-te Schultag (Mo-Fr) ab day"""
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    for _ in range(offset):
+        day += timedelta(days=1)
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+    return day
+
+
+def clock_window(scenario):
+    """(Start, Ende) des Zeitfensters als datetime und Zeitraffer-Faktor"""
+    day = scenario['day']
+    start = datetime.combine(day, datetime.strptime(scenario['clock']['start'], '%H:%M').time())
+    end = datetime.combine(day, datetime.strptime(scenario['clock']['end'], '%H:%M').time())
+    speed = (end - start).total_seconds() / scenario['duration_seconds']
+    return start, end, speed
+
+
+def embed_path(secret, email):
+    """/iserv/embed-URL mit gültigem HMAC-Token wie von IServ erzeugt"""
+    timestamp = str(int(time.time()))
+    token = hmac.new(secret.encode(), f"{email}:{timestamp}".encode(), hashlib.sha256).hexdigest()
+    return '/iserv/embed?' + urlencode({
+        'user': email.split('@')[0], 'email': email, 'domain': 'kgs-pattensen.de',
+        'token': token, 'ts': timestamp,
+    })
+
+
+def flash_messages(payload):
+    return FLASH_PATTERN.findall(payload.decode('utf-8', 'replace'))
+
+
+def booking_outcome(payload):
+    for _, message in flash_messages(payload):
+        for needle, outcome in BOOKING_OUTCOMES:
+            if needle in message:
+                return outcome
+    return 'sonstiges'
+
+
+class Recorder:
+    """Sammelt Latenzen, Status und Buchungsergebnisse aller Threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.statuses = {route: Counter() for route in ROUTES}
+        self.outcomes = Counter()
+
+    def request(self, client, route, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            status, payload = client.request(method, path, body)
+        except Exception:
+            status, payload = 'exception', b''
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            self.statuses[route][status] += 1
+        return status, payload
+
+    def outcome(self, outcome):
+        with self.lock:
+            self.outcomes[outcome] += 1
+
+
+class ScenarioUser:
+    """Eine virtuelle Lehrkraft, die Sitzungen nach dem Szenario abspielt"""
+
+    def __init__(self, index, scenario, base_url, secret, teachers, recorder, deadline):
+        self.rng = random.Random(scenario['seed'] * 1000 + index)
+        self.scenario = scenario
+        self.base_url = base_url
+        self.secret = secret
+        self.teachers = teachers
+        self.recorder = recorder
+        self.deadline = deadline
+        self.targets = [(school_day_offset(scenario['day'], t['day_offset']), t['period'])
+                        for t in scenario['targets']]
+        self.weights = [t['weight'] for t in scenario['targets']]
+
+    def think(self):
+        low, high = self.scenario['think_time_ms']
+        time.sleep(self.rng.uniform(low, high) / 1000)
+
+    def dashboard(self, client, day=None):
+        path = '/dashboard' + (f'?date={day.isoformat()}' if day else '')
+        return self.recorder.request(client, 'GET /dashboard', 'GET', path)
+
+    def book(self, client, klasse):
+        from benchmarks.school_year import FIRST_NAMES, LAST_NAMES
+        from config import FREE_MODULES
+
+        session = self.scenario['session']
+        day, period = self.rng.choices(self.targets, weights=self.weights)[0]
+        path = f'/book/{day.isoformat()}/{period}'
+        status, payload = self.recorder.request(client, 'GET /book', 'GET', path)
+        if status == 302:
+            # Schon beim Öffnen abgelehnt (voll, Vorlaufzeit) → Dashboard mit Hinweis
+            _, payload = self.dashboard(client, day)
+            self.recorder.outcome(booking_outcome(payload))
+            return
+        if status != 200:
+            self.recorder.outcome('fehler')
+            return
+        self.think()
+
+        count = self.rng.randint(*session['students'])
+        form = {
+            'teacher_name': f'Lehrkraft {klasse}', 'teacher_class': klasse,
+            'num_students': str(count), 'module': self.rng.choice(FREE_MODULES),
+        }
+        for i in range(count):
+            form[f'student_name_{i}'] = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            form[f'student_class_{i}'] = klasse
+        if count == 1 and self.rng.random() < session['exclusive_rate']:
+            form['is_exclusive'] = '1'
+        if self.rng.random() < self.scenario['email']['confirmation_rate']:
+            form['send_email_confirmation'] = '1'
+
+        status, payload = self.recorder.request(client, 'POST /book', 'POST', path, form)
+        if status == 302:
+            # Browser folgt der Weiterleitung aufs Dashboard (mit Flash-Meldung)
+            _, payload = self.dashboard(client, day)
+            self.recorder.outcome(booking_outcome(payload))
+        elif status == 200:
+            self.recorder.outcome(booking_outcome(payload))
+        else:
+            self.recorder.outcome('fehler')
+
+    def session(self):
+        session = self.scenario['session']
+        klasse, email = self.rng.choice(self.teachers)
+        client = Client(self.base_url)
+        try:
+            status, _ = self.recorder.request(client, 'GET /iserv/embed', 'GET', embed_path(self.secret, email))
+            if status != 302 or 'session' not in client.cookies:
+                return
+            # Weiterleitung nach dem Login
+            self.dashboard(client)
+            for _ in range(self.rng.randint(*session['dashboard_views']) - 1):
+                self.think()
+                self.dashboard(client, self.rng.choice(self.targets)[0])
+            if self.rng.random() < session['book_rate'] and time.perf_counter() < self.deadline:
+                self.think()
+                self.book(client, klasse)
+            if self.rng.random() < session['meine_buchungen_rate'] and time.perf_counter() < self.deadline:
+                self.think()
+                self.recorder.request(client, 'GET /meine-buchungen', 'GET', '/meine-buchungen')
+        finally:
+            client.close()
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            self.session()
+            self.think()
+
+
+def seed_database(scenario):
+    """Legt das Schuljahr an und gibt [(Klasse, E-Mail)] der Lehrkräfte zurück"""
+    from app import app
+    from database import db
+    from migrations import run_migrations
+    from models import User
+    from config import SCHOOL_CLASSES
+    from benchmarks.school_year import ADMIN_USERNAME, seed_school_year, teacher_username
+
+    with app.app_context():
+        run_migrations(db.engine)
+        if User.query.filter_by(username=ADMIN_USERNAME).first():
+            print("Datenbank enthält bereits ein Benchmark-Schuljahr - wird weiterverwendet")
+        else:
+            started = time.perf_counter()
+            counts = seed_school_year(seed=scenario['seed'], occupancy=scenario['data']['occupancy'],
+                                      today=scenario['day'])
+            print(f"Schuljahr angelegt in {time.perf_counter() - started:.1f}s: "
+                  + ', '.join(f"{value} {key}" for key, value in counts.items()))
+        db.session.remove()
+        db.engine.dispose()
+    return [(klasse, f'{teacher_username(klasse)}@kgs-pattensen.de') for klasse in SCHOOL_CLASSES]
+
+
+def find_overbooked_slots(days):
+    """
+    Prüft alle Stunden der Szenario-Tage.
+
+    Returns:
+        Liste von (Datum, Stunde, Problem)
+    """
+    from app import app
+    from models import Booking
+    from config import MAX_STUDENTS_PER_PERIOD
+
+    problems = []
+    with app.app_context():
+        slots = {}
+        for booking in Booking.query.filter(Booking.date.in_([d.isoformat() for d in days])):
+            slots.setdefault((booking.date, booking.period), []).append(booking)
+        for (day, period), bookings in sorted(slots.items()):
+            students = [(s['name'], s['klasse']) for b in bookings for s in json.loads(b.students_json)]
+            if len(students) > MAX_STUDENTS_PER_PERIOD:
+                problems.append((day, period, f"{len(students)} Schüler*innen (max. {MAX_STUDENTS_PER_PERIOD})"))
+            if any(b.is_exclusive and b.is_approved for b in bookings) and len(bookings) > 1:
+                problems.append((day, period, "Einzelangebot mit weiteren Buchungen"))
+            duplicates = [name for name, count in Counter(students).items() if count > 1]
+            if duplicates:
+                problems.append((day, period, f"doppelt gebucht: {', '.join(n for n, _ in duplicates)}"))
+    return problems
+
+
+def count_emails(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+
+def route_report(recorder, duration):
+    report = {}
+    for route in ROUTES:
+        latencies = sorted(recorder.latencies[route])
+        statuses = recorder.statuses[route]
+        errors = sum(count for status, count in statuses.items()
+                     if status == 'exception' or status >= 400)
+        report[route] = {
+            'requests': len(latencies),
+            'rps': round(len(latencies) / duration, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'errors': errors,
+            'error_rate': round(errors / len(latencies), 4) if latencies else 0.0,
+            'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        }
+    return report
+
+
+def spawn_server(scenario, env, port, log_path):
+    server = scenario['server']
+    env = dict(env, SERVER_PROFILE=server['profile'], WEB_CONCURRENCY=str(server['workers']),
+               GUNICORN_THREADS=str(server.get('threads', 1)))
+    cmd = [
+        sys.executable, '-m', 'gunicorn',
+        '--config', 'gunicorn_config.py',
+        '--bind', f'127.0.0.1:{port}',
+        'benchmarks.monday_server:app',
+    ]
+    log = open(log_path, 'w', encoding='utf-8')
+    return subprocess.Popen(cmd, cwd=PROJECT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_server(server):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Montagmorgen-Lasttest mit Szenario-Datei')
+    parser.add_argument('--scenario', default=DEFAULT_SCENARIO)
+    parser.add_argument('--database-url', help='Leere Datenbank (Standard: temporäre SQLite-Datei)')
+    parser.add_argument('--concurrency', type=int, help='Überschreibt concurrency des Szenarios')
+    parser.add_argument('--duration', type=float, help='Überschreibt duration_seconds des Szenarios')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--output', help='Ergebnis als JSON speichern')
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    if args.concurrency:
+        scenario['concurrency'] = args.concurrency
+    if args.duration:
+        scenario['duration_seconds'] = args.duration
+    clock_start, _, speed = clock_window(scenario)
+
+    tmp = tempfile.mkdtemp(prefix='monday-morning-')
+    secret = secrets.token_hex(16)
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url or 'sqlite:///' + os.path.join(tmp, 'monday.sqlite'),
+        SESSION_SECRET=secrets.token_hex(16),
+        ISERV_EMBED_SECRET=secret,
+        METRICS_DIR=os.path.join(tmp, 'metrics'),
+        JINJA_CACHE_DIR=os.path.join(tmp, 'jinja'),
+        LOADTEST_CLOCK_START=clock_start.isoformat(),
+        LOADTEST_CLOCK_SPEED=str(speed),
+        LOADTEST_CLOCK_ANCHOR=os.path.join(tmp, 'clock_anchor'),
+        LOADTEST_EMAIL_LATENCY_MS=str(scenario['email']['latency_ms']),
+        LOADTEST_EMAIL_LOG=os.path.join(tmp, 'emails.jsonl'),
+    )
+    # Keine echten E-Mails, auch wenn lokal Zugangsdaten gesetzt sind
+    for name in ('RESEND_API_KEY', 'REPLIT_CONNECTORS_HOSTNAME', 'REPL_IDENTITY', 'WEB_REPL_RENEWAL'):
+        env.pop(name, None)
+    os.environ.update({key: env[key] for key in ('DATABASE_URL', 'SESSION_SECRET')})
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    print(f"Szenario {scenario['name']}: {scenario['day']} {scenario['clock']['start']}-"
+          f"{scenario['clock']['end']} in {scenario['duration_seconds']:.0f}s "
+          f"(Zeitraffer x{speed:.0f}), {scenario['concurrency']} Lehrkräfte gleichzeitig, "
+          f"Profil {scenario['server']['profile']}")
+    teachers = seed_database(scenario)
+
+    server_log = os.path.join(tmp, 'server.log')
+    server = spawn_server(scenario, env, args.port, server_log)
+    recorder = Recorder()
+    try:
+        if not wait_for_port('127.0.0.1', args.port):
+            print(f"❌ Server nicht gestartet, siehe {server_log}")
+            sys.exit(1)
+        base_url = f'http://127.0.0.1:{args.port}'
+        # Uhr der App starten und Lastphase beginnen
+        with open(env['LOADTEST_CLOCK_ANCHOR'], 'w', encoding='utf-8') as f:
+            f.write(repr(time.time()))
+        started = time.perf_counter()
+        deadline = started + scenario['duration_seconds']
+        users = [ScenarioUser(index, scenario, base_url, secret, teachers, recorder, deadline)
+                 for index in range(scenario['concurrency'])]
+        threads = [threading.Thread(target=user.run) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        stop_server(server)
+
+    routes = route_report(recorder, elapsed)
+    targets = sorted({school_day_offset(scenario['day'], t['day_offset']) for t in scenario['targets']})
+    problems = find_overbooked_slots(targets)
+    emails = count_emails(env['LOADTEST_EMAIL_LOG'])
+    total = sum(route['requests'] for route in routes.values())
+
+    print(f"\n{'Route':<22} {'Req':>6} {'Req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Fehler':>7}")
+    for route, data in routes.items():
+        print(f"{route:<22} {data['requests']:>6} {data['rps']:>7.1f} {data['p50_ms']:>8.1f} "
+              f"{data['p95_ms']:>8.1f} {data['p99_ms']:>8.1f} {data['error_rate']:>7.1%}")
+    print(f"Gesamt: {total} Requests in {elapsed:.1f}s ({total / elapsed:.1f} Req/s)")
+    print("Buchungen: " + ', '.join(f"{count} {outcome}" for outcome, count in recorder.outcomes.most_common()))
+    print(f"E-Mails (Dry-Run): {emails}")
+    print(f"Server-Log: {server_log}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'scenario': scenario['name'],
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'duration_seconds': round(elapsed, 1),
+                'concurrency': scenario['concurrency'],
+                'server': scenario['server'],
+                'routes': routes,
+                'bookings': dict(recorder.outcomes),
+                'emails': emails,
+                'overbooked': [list(problem) for problem in problems],
+            }, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"Ergebnis gespeichert: {args.output}")
+
+    server_errors = sum(count for data in routes.values() for status, count in data['statuses'].items()
+                        if status == 'exception' or int(status) >= 500)
+    if problems:
+        print(f"❌ {len(problems)} überbuchte Stunden:")
+        for day, period, problem in problems:
+            print(f"   {day} Stunde {period}: {problem}")
+    else:
+        print("✅ Keine überbuchten Stunden")
+    if problems or server_errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# WSGI-Einstieg für den Montagmorgen-Lasttest (benchmarks.monday_morning)
+#
+# Lädt die App unverändert und ersetzt nur, was lokal nicht verfügbar ist:
+#   - Uhr: PeriodClock läuft ab LOADTEST_CLOCK_START (ISO, Europe/Berlin) mit
+#     LOADTEST_CLOCK_SPEED-facher Geschwindigkeit. Gestartet wird sie, sobald
+#     der Lasttest seinen Startzeitpunkt nach LOADTEST_CLOCK_ANCHOR schreibt;
+#     bis dahin steht sie auf LOADTEST_CLOCK_START.
+#   - E-Mail: send_email_resend versendet nichts, wartet LOADTEST_EMAIL_LATENCY_MS
+#     (typische Resend-Antwortzeit) und schreibt eine Zeile nach LOADTEST_EMAIL_LOG.
+#   - OAuth: entfällt, der Lasttest meldet sich über /iserv/embed mit einem
+#     HMAC-Token für ISERV_EMBED_SECRET an.
+#
+# Start (macht benchmarks.monday_morning selbst):
+#
+#   gunicorn --config gunicorn_config.py benchmarks.monday_server:app
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import email_service
+import period_clock
+
+_clock_state = {'anchor': None}
+_email_lock = threading.Lock()
+
+
+def _clock_start():
+    start = datetime.fromisoformat(os.environ['LOADTEST_CLOCK_START'])
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=period_clock.BERLIN_TZ)
+    return start
+
+
+CLOCK_START = _clock_start()
+CLOCK_SPEED = float(os.environ.get('LOADTEST_CLOCK_SPEED', '1'))
+
+
+def _anchor():
+    if _clock_state['anchor'] is None:
+        try:
+            with open(os.environ['LOADTEST_CLOCK_ANCHOR'], encoding='utf-8') as f:
+                _clock_state['anchor'] = float(f.read())
+        except (KeyError, OSError, ValueError):
+            return None
+    return _clock_state['anchor']
+
+
+def scenario_now():
+    """Aktuelle Uhrzeit im Szenario"""
+    anchor = _anchor()
+    elapsed = max(0.0, time.time() - anchor) if anchor is not None else 0.0
+    return CLOCK_START + timedelta(seconds=elapsed * CLOCK_SPEED)
+
+
+_period_clock_init = period_clock.PeriodClock.__init__
+
+
+def _scenario_clock_init(self, now=None):
+    _period_clock_init(self, scenario_now() if now is None else now)
+
+
+def send_email_dry_run(to_email, subject, body_html, body_text=None):
+    """Ersatz für email_service.send_email_resend ohne Versand"""
+    latency_ms = float(os.environ.get('LOADTEST_EMAIL_LATENCY_MS', '0'))
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+    log_path = os.environ.get('LOADTEST_EMAIL_LOG')
+    if log_path:
+        line = json.dumps({'to': to_email, 'subject': subject, 'pid': os.getpid()}, ensure_ascii=False)
+        with _email_lock, open(log_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    return True
+
+
+period_clock.PeriodClock.__init__ = _scenario_clock_init
+email_service.send_email_resend = send_email_dry_run
+
+from app import app
@@ -0,0 +1,219 @@
+# Synthetisches Schuljahr für Benchmarks
+#
+# Legt in der konfigurierten Datenbank (DATABASE_URL) an:
+#   - einen Admin und eine Lehrkraft pro Klasse aus SCHOOL_CLASSES
+#   - Ferien- und Feiertagssperren aus SCHOOL_HOLIDAYS_2026/PUBLIC_HOLIDAYS_2026
+#     (über bulk_block_slots, wie /admin/setup_holidays_2026)
+#   - einige Beratungs-Sperren
+#   - Buchungen für die meisten freien Stunden (1-5 Schüler*innen, vereinzelt
+#     Einzelangebote) und je Buchung eine Admin-Benachrichtigung
+#
+# Die Daten sind mit --seed reproduzierbar. Standardzeitraum: zweites Halbjahr
+# 2025/26 und das Schuljahr 2026/27, damit es vergangene und kommende Wochen gibt.
+#
+# Beispiel (aus dem Projektverzeichnis, leere Datenbank):
+#
+#   DATABASE_URL=sqlite:////tmp/schuljahr.sqlite python -m benchmarks.school_year
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_START = date(2026, 1, 5)
+DEFAULT_END = date(2027, 7, 14)
+
+FIRST_NAMES = [
+    'Mia', 'Ben', 'Emma', 'Noah', 'Lina', 'Paul', 'Lea', 'Finn', 'Ida', 'Jonas',
+    'Ella', 'Elias', 'Mila', 'Luca', 'Clara', 'Leon', 'Sophie', 'Henry', 'Marie', 'Emil',
+    'Lena', 'Anton', 'Frieda', 'Theo', 'Hanna', 'Karl', 'Amelie', 'Oskar', 'Leni', 'Jakob',
+]
+LAST_NAMES = [
+    'Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker',
+    'Schulz', 'Hoffmann', 'Koch', 'Richter', 'Klein', 'Wolf', 'Schröder', 'Neumann',
+]
+
+STUDENTS_PER_CLASS = 25
+ADMIN_USERNAME = 'bench-admin'
+
+
+def school_days(start, end):
+    """Alle Wochentage (Mo-Fr) von start bis end"""
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def teacher_username(klasse):
+    return 'bench-' + ''.join(ch for ch in klasse.lower() if ch.isalnum())
+
+
+def class_roster(rng, classes):
+    """Schüler*innen-Namen je Klasse"""
+    roster = {}
+    for klasse in classes:
+        names = set()
+        while len(names) < STUDENTS_PER_CLASS:
+            names.add(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+        roster[klasse] = sorted(names)
+    return roster
+
+
+def seed_school_year(start=DEFAULT_START, end=DEFAULT_END, seed=2026, occupancy=0.85,
+                     consultation_blocks=40, today=None):
+    """
+    Füllt die Datenbank der App (app context erforderlich) mit einem Schuljahr.
+
+    Args:
+        occupancy: Anteil der freien Stunden mit mindestens einer Buchung
+        consultation_blocks: Anzahl zusätzlicher Beratungs-Sperren
+        today: Stichtag für "gelesen" (Benachrichtigungen älter als 7 Tage)
+
+    Returns:
+        Dict mit Anzahlen (users, blocked_slots, bookings, notifications)
+    """
+    from database import db
+    from config import (SCHOOL_CLASSES, FIXED_OFFERS, FREE_MODULES, MAX_STUDENTS_PER_PERIOD,
+                        PERIOD_TIMES, SCHOOL_HOLIDAYS_2026, PUBLIC_HOLIDAYS_2026)
+    from models import User, Booking, BlockedSlot, Notification, bulk_block_slots
+
+    rng = random.Random(seed)
+    today = today or date.today()
+    periods = sorted(PERIOD_TIMES)
+
+    # Benutzer: ein Admin, eine Lehrkraft pro Klasse
+    admin = User(username=ADMIN_USERNAME, email='bench-admin@kgs-pattensen.de', role='admin')
+    admin.set_password('bench')
+    teachers = {}
+    for klasse in SCHOOL_CLASSES:
+        username = teacher_username(klasse)
+        teachers[klasse] = User(username=username, email=f'{username}@kgs-pattensen.de', role='teacher')
+    db.session.add(admin)
+    db.session.add_all(teachers.values())
+    db.session.commit()
+
+    # Ferien und Feiertage wie /admin/setup_holidays_2026
+    for holiday_start, holiday_end, reason, icon in SCHOOL_HOLIDAYS_2026 + PUBLIC_HOLIDAYS_2026:
+        bulk_block_slots(holiday_start, holiday_end, admin.id, reason, icon=icon)
+    blocked = {(row.date, row.period) for row in db.session.query(BlockedSlot.date, BlockedSlot.period)}
+
+    days = [day for day in school_days(start, end)
+            if not all((day.isoformat(), period) in blocked for period in periods)]
+    consultation_rows = []
+    for day in rng.sample(days, min(consultation_blocks, len(days))):
+        period = rng.choice(periods)
+        if (day.isoformat(), period) in blocked:
+            continue
+        blocked.add((day.isoformat(), period))
+        consultation_rows.append({
+            'date': day.isoformat(), 'weekday': day.strftime('%a'), 'period': period,
+            'reason': 'Beratung', 'icon': '🔧', 'blocked_by': admin.id,
+            'created_at': datetime.combine(day - timedelta(days=3), datetime.min.time()),
+        })
+    if consultation_rows:
+        db.session.execute(BlockedSlot.__table__.insert(), consultation_rows)
+
+    # Buchungen
+    roster = class_roster(rng, SCHOOL_CLASSES)
+    booking_rows = []
+    for day in days:
+        weekday = day.strftime('%a')
+        for period in periods:
+            if (day.isoformat(), period) in blocked or rng.random() > occupancy:
+                continue
+            fixed_label = FIXED_OFFERS.get(weekday, {}).get(period)
+            free_places = MAX_STUDENTS_PER_PERIOD
+            booked = set()
+            # Meist 1-3 Buchungen pro Stunde, jeweils aus einer Klasse
+            for _ in range(rng.choice((1, 1, 2, 2, 3))):
+                if free_places == 0:
+                    break
+                klasse = rng.choice(SCHOOL_CLASSES)
+                exclusive = free_places == MAX_STUDENTS_PER_PERIOD and rng.random() < 0.02
+                count = 1 if exclusive else rng.randint(1, min(3, free_places))
+                candidates = [name for name in roster[klasse] if (name, klasse) not in booked]
+                students = [{'name': name, 'klasse': klasse} for name in rng.sample(candidates, count)]
+                booked.update((s['name'], klasse) for s in students)
+                free_places = 0 if exclusive else free_places - count
+                created_at = datetime.combine(day - timedelta(days=rng.randint(1, 14)),
+                                              datetime.min.time()) + timedelta(minutes=rng.randint(420, 1080))
+                booking_rows.append({
+                    'date': day.isoformat(), 'weekday': weekday, 'period': period,
+                    'teacher_id': teachers[klasse].id, 'teacher_name': f'Lehrkraft {klasse}',
+                    'teacher_class': klasse,
+                    'students_json': json.dumps(students, ensure_ascii=False),
+                    'offer_type': 'fest' if fixed_label else 'frei',
+                    'offer_label': fixed_label or rng.choice(FREE_MODULES),
+                    'notes': None, 'is_exclusive': exclusive, 'is_approved': True,
+                    'created_at': created_at,
+                })
+    if booking_rows:
+        db.session.execute(Booking.__table__.insert(), booking_rows)
+    db.session.commit()
+
+    # Eine Benachrichtigung pro Buchung, ältere sind gelesen
+    read_before = datetime.combine(today - timedelta(days=7), datetime.min.time())
+    notification_rows = []
+    for booking in db.session.query(Booking.id, Booking.date, Booking.period, Booking.teacher_name,
+                                    Booking.offer_label, Booking.students_json, Booking.created_at):
+        count = len(json.loads(booking.students_json))
+        is_read = booking.created_at < read_before
+        notification_rows.append({
+            'booking_id': booking.id, 'recipient_role': 'admin', 'notification_type': 'new_booking',
+            'message': (f"Neue Buchung: {booking.teacher_name} hat {count} Schüler für "
+                        f"{booking.offer_label} am {booking.date} (Stunde {booking.period}) angemeldet."),
+            'is_read': is_read,
+            'read_at': booking.created_at + timedelta(hours=2) if is_read else None,
+            'created_at': booking.created_at,
+            'metadata_json': None,
+        })
+    if notification_rows:
+        db.session.execute(Notification.__table__.insert(), notification_rows)
+    db.session.commit()
+
+    return {
+        'users': 1 + len(teachers),
+        'blocked_slots': len(blocked),
+        'bookings': len(booking_rows),
+        'notifications': len(notification_rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetisches Schuljahr in DATABASE_URL anlegen')
+    parser.add_argument('--start', type=date.fromisoformat, default=DEFAULT_START)
+    parser.add_argument('--end', type=date.fromisoformat, default=DEFAULT_END)
+    parser.add_argument('--seed', type=int, default=2026)
+    parser.add_argument('--occupancy', type=float, default=0.85)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        parser.error('DATABASE_URL muss gesetzt sein (z.B. sqlite:////tmp/schuljahr.sqlite)')
+    os.environ.setdefault('SESSION_SECRET', 'school-year')
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    from app import app
+    from database import db
+    from migrations import run_migrations
+    from models import User
+
+    with app.app_context():
+        run_migrations(db.engine)
+        if User.query.filter_by(username=ADMIN_USERNAME).first():
+            parser.error('Die Datenbank enthält bereits ein Benchmark-Schuljahr')
+        started = time.perf_counter()
+        counts = seed_school_year(args.start, args.end, seed=args.seed, occupancy=args.occupancy)
+    print(f"✅ Schuljahr {args.start} - {args.end} angelegt in {time.perf_counter() - started:.1f}s: "
+          + ', '.join(f"{value} {key}" for key, value in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+# Sammel-Import von Buchungen aus einer CSV-Datei (/admin/import)
+#
+# Geplante Gruppentermine eines Halbjahres kommen als eine Datei statt als
+# einzelne Buchungen über admin_create_booking(). Geprüft werden alle Zeilen
+# gegen die Datenbank mit je einer Query über den betroffenen Zeitraum
+# (Buchungen, Sperren, Slot-Namen, Benutzer) statt Einzelabfragen pro Zeile:
+#   - Kapazität (MAX_STUDENTS_PER_PERIOD, inkl. früherer Zeilen der Datei)
+#   - gesperrte Slots
+#   - genehmigte Einzelangebote im Slot
+#   - Schüler*innen, die im Slot schon gebucht sind (auch doppelt in der Datei)
+#
+# Fehlerhafte Zeilen werden mit Zeilennummer gemeldet; dann wird nichts
+# importiert. Sind alle Zeilen gültig, werden sie in einer Transaktion
+# angelegt (ein executemany, ein Commit).
+#
+# Format (Kopfzeile erforderlich, Trennzeichen ; oder ,):
+#   Datum;Stunde;Lehrkraft;Name;Klasse;Modul;Notizen;Schüler 1;Schüler 2;...
+#   2026-11-02;3;mueller;Frau Müller;7a;Aktivierung;;Mia Schulz (7a);Ben Koch
+#
+# Datum als YYYY-MM-DD oder TT.MM.JJJJ. Lehrkraft ist Benutzername oder
+# E-Mail. Name (Anzeigename) ist optional, sonst der Benutzername. Schüler*innen
+# als "Name (Klasse)" oder nur "Name" (dann gilt die Spalte Klasse). Modul nur
+# für freie Stunden, bei festen Angeboten gilt deren Bezeichnung.
+
+import csv
+import io
+import json
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from config import FIXED_OFFERS, FREE_MODULES, MAX_STUDENTS_PER_PERIOD, PERIOD_TIMES
+from database import db
+from models import BlockedSlot, Booking, SlotName, User
+
+logger = logging.getLogger(__name__)
+
+MAX_IMPORT_ROWS = 5000
+
+REQUIRED_COLUMNS = ('datum', 'stunde', 'lehrkraft')
+STUDENT_COLUMN_PREFIXES = ('schüler', 'schueler')
+
+_STUDENT_WITH_CLASS = re.compile(r'^(.*?)\s*\(([^()]*)\)\s*$')
+
+
+def _parse_date(value):
+    for fmt in ('%Y-%m-%d', '%d.%m.%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_student(value, default_class):
+    match = _STUDENT_WITH_CLASS.match(value)
+    if match:
+        return {'name': match.group(1).strip(), 'klasse': match.group(2).strip()}
+    return {'name': value.strip(), 'klasse': default_class}
+
+
+def _student_key(student):
+    # Wie check_student_double_booking: Name und Klasse ohne Groß-/Kleinschreibung
+    return (student['name'].strip().lower(), student['klasse'].strip().lower())
+
+
+def read_csv(text):
+    """
+    Liest die CSV-Datei in Zeilen-Dicts.
+
+    Returns:
+        (rows, error): rows als Liste von (Zeilennummer, Dict mit Kleinbuchstaben-
+        Spalten und 'students' als Liste der Schülerzellen); error als Text oder None
+    """
+    text = text.lstrip('\ufeff')
+    try:
+        delimiter = csv.Sniffer().sniff(text[:4096], delimiters=';,\t').delimiter
+    except csv.Error:
+        delimiter = ';'
+    reader = csv.reader(io.StringIO(text), delimiter=delimiter)
+    header = next(reader, None)
+    if not header:
+        return [], 'Die Datei ist leer.'
+    header = [column.strip().lower() for column in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        return [], f"Spalte(n) fehlen in der Kopfzeile: {', '.join(missing)}"
+    student_indexes = [i for i, column in enumerate(header) if column.startswith(STUDENT_COLUMN_PREFIXES)]
+
+    rows = []
+    for cells in reader:
+        if not any(cell.strip() for cell in cells):
+            continue
+        if len(rows) >= MAX_IMPORT_ROWS:
+            return [], f"Höchstens {MAX_IMPORT_ROWS} Zeilen pro Import."
+        row = {column: (cells[i].strip() if i < len(cells) else '') for i, column in enumerate(header)}
+        # Zellen rechts der Kopfzeile zählen als weitere Schüler*innen ("Schüler 1;Schüler 2;...")
+        extra = range(len(header), len(cells))
+        row['students'] = [cells[i].strip() for i in (*student_indexes, *extra) if i < len(cells) and cells[i].strip()]
+        rows.append((reader.line_num, row))
+    if not rows:
+        return [], 'Die Datei enthält keine Buchungen.'
+    return rows, None
+
+
+def _load_slot_state(first_day, last_day):
+    """Belegung, Schüler*innen und Einzelangebote pro (Datum, Stunde) im Zeitraum - eine Query"""
+    state = {}
+    rows = db.session.query(
+        Booking.date, Booking.period, Booking.students_json, Booking.is_exclusive, Booking.is_approved,
+        Booking.offer_label, Booking.teacher_name
+    ).filter(Booking.date >= first_day, Booking.date <= last_day)
+    for booking_date, period, students_json, is_exclusive, is_approved, offer_label, teacher_name in rows:
+        slot = state.setdefault((booking_date, period), {'count': 0, 'students': {}, 'exclusive': False})
+        students = json.loads(students_json) if students_json else []
+        slot['count'] += len(students)
+        for student in students:
+            slot['students'].setdefault(_student_key(student), f"'{offer_label}' bei {teacher_name}")
+        if is_exclusive and is_approved:
+            slot['exclusive'] = True
+    return state
+
+
+def _load_blocked(first_day, last_day):
+    return {(blocked_date, period): reason for blocked_date, period, reason in db.session.query(
+        BlockedSlot.date, BlockedSlot.period, BlockedSlot.reason
+    ).filter(BlockedSlot.date >= first_day, BlockedSlot.date <= last_day)}
+
+
+def _load_teachers():
+    """Benutzer nach Benutzername und E-Mail (Kleinbuchstaben)"""
+    teachers = {}
+    for user_id, username, email in db.session.query(User.id, User.username, User.email):
+        teachers[username.lower()] = (user_id, username)
+        if email:
+            teachers.setdefault(email.lower(), (user_id, username))
+    return teachers
+
+
+def _offer_for(weekday, period, slot_names, module):
+    """(offer_type, offer_label) wie get_period_info in app.py, oder (None, Fehler)"""
+    if weekday in FIXED_OFFERS and period in FIXED_OFFERS[weekday]:
+        return 'fest', slot_names.get((weekday, period)) or FIXED_OFFERS[weekday][period]
+    if not module:
+        return None, 'Modul fehlt (freie Stunde)'
+    if module not in FREE_MODULES:
+        return None, f"Modul '{module}' unbekannt (erlaubt: {', '.join(FREE_MODULES)})"
+    return 'frei', module
+
+
+def validate_rows(rows):
+    """
+    Prüft alle Zeilen gegen die Datenbank und untereinander.
+
+    Returns:
+        Liste von Dicts pro Zeile: line, errors (Liste), booking (Spalten für
+        Booking oder None), summary (Kurzbeschreibung für den Bericht)
+    """
+    parsed = []
+    for line, row in rows:
+        errors = []
+        booking_date = _parse_date(row['datum'])
+        if booking_date is None:
+            errors.append(f"Ungültiges Datum '{row['datum']}'")
+        elif booking_date.weekday() >= 5:
+            errors.append('Wochenende')
+        try:
+            period = int(row['stunde'])
+            if period not in PERIOD_TIMES:
+                raise ValueError
+        except ValueError:
+            period = None
+            errors.append(f"Ungültige Stunde '{row['stunde']}'")
+        students = [_parse_student(value, row.get('klasse', '')) for value in row['students']]
+        if not students:
+            errors.append('Keine Schüler*innen angegeben')
+        elif any(not s['name'] or not s['klasse'] for s in students):
+            errors.append('Schüler*in ohne Name oder Klasse')
+        parsed.append((line, row, booking_date, period, students, errors))
+
+    days = [p[2] for p in parsed if p[2] is not None]
+    first_day, last_day = (min(days).isoformat(), max(days).isoformat()) if days else ('', '')
+    slots = _load_slot_state(first_day, last_day) if days else {}
+    blocked = _load_blocked(first_day, last_day) if days else {}
+    teachers = _load_teachers()
+    slot_names = {(weekday, period): label for weekday, period, label in
+                  db.session.query(SlotName.weekday, SlotName.period, SlotName.label)}
+
+    results = []
+    for line, row, booking_date, period, students, errors in parsed:
+        teacher = teachers.get(row['lehrkraft'].lower())
+        if teacher is None:
+            errors.append(f"Lehrkraft '{row['lehrkraft']}' nicht gefunden")
+        summary = f"{row['datum']}, {row['stunde']}. Stunde, {len(students)} Schüler*innen"
+        booking = None
+        if booking_date is not None and period is not None:
+            date_str = booking_date.isoformat()
+            weekday = booking_date.strftime('%a')
+            offer_type, offer_label = _offer_for(weekday, period, slot_names, row.get('modul', ''))
+            if offer_type is None:
+                errors.append(offer_label)
+            if (date_str, period) in blocked:
+                errors.append(f"Slot gesperrt ({blocked[(date_str, period)]})")
+            slot = slots.setdefault((date_str, period), {'count': 0, 'students': {}, 'exclusive': False})
+            if slot['exclusive']:
+                errors.append('Slot für ein Einzelangebot reserviert')
+            if slot['count'] + len(students) > MAX_STUDENTS_PER_PERIOD:
+                errors.append(f"Nicht genug Plätze ({MAX_STUDENTS_PER_PERIOD - slot['count']} frei)")
+            keys = [_student_key(s) for s in students]
+            for student, key in zip(students, keys):
+                where = slot['students'].get(key)
+                if where is not None:
+                    errors.append(f"{student['name']} ({student['klasse']}) ist bereits in {where} gebucht")
+            if len(set(keys)) < len(keys):
+                errors.append('Schüler*in mehrfach in derselben Zeile')
+            if not errors:
+                # Gültige Zeilen belegen den Slot für die folgenden Zeilen der Datei
+                slot['count'] += len(students)
+                for key in keys:
+                    slot['students'][key] = f"Zeile {line}"
+                teacher_id, username = teacher
+                booking = {
+                    'date': date_str,
+                    'weekday': weekday,
+                    'period': period,
+                    'teacher_id': teacher_id,
+                    'teacher_name': row.get('name') or username,
+                    'teacher_class': row.get('klasse') or None,
+                    'students_json': json.dumps(students, ensure_ascii=False),
+                    'offer_type': offer_type,
+                    'offer_label': offer_label,
+                    'notes': row.get('notizen') or None,
+                    'is_exclusive': False,
+                    'is_approved': True,
+                }
+                summary = f"{booking_date.strftime('%d.%m.%Y')}, {period}. Stunde, {offer_label}, " \
+                          f"{len(students)} Schüler*innen"
+        results.append({'line': line, 'errors': errors, 'booking': booking, 'summary': summary})
+    return results
+
+
+def import_bookings(text, dry_run=False):
+    """
+    Prüft eine CSV-Datei und legt bei fehlerfreien Zeilen alle Buchungen an.
+
+    Args:
+        text: Inhalt der CSV-Datei
+        dry_run: nur prüfen, nichts anlegen
+
+    Returns:
+        Dict mit 'error' (Dateifehler oder None), 'rows' (Ergebnis pro Zeile),
+        'error_count' und 'imported' (Anzahl angelegter Buchungen)
+    """
+    rows, error = read_csv(text)
+    if error:
+        return {'error': error, 'rows': [], 'error_count': 0, 'imported': 0}
+    results = validate_rows(rows)
+    error_count = sum(1 for result in results if result['errors'])
+    report = {'error': None, 'rows': results, 'error_count': error_count, 'imported': 0}
+    if error_count or dry_run:
+        return report
+
+    created_at = datetime.now()
+    try:
+        db.session.execute(insert(Booking), [dict(result['booking'], created_at=created_at)
+                                             for result in results])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Sammel-Import fehlgeschlagen: {e}")
+        report['error'] = 'Fehler beim Speichern, es wurde nichts importiert.'
+        return report
+    report['imported'] = len(results)
+    logger.info(f"Sammel-Import: {len(results)} Buchungen angelegt", extra={'bookings': len(results)})
+    return report
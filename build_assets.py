@@ -0,0 +1,156 @@
+# Build-Schritt für statische Assets (läuft beim Deployment nach pip install)
+#
+#   python build_assets.py
+#
+# Erzeugt in static/dist/:
+#   - style.<hash>.css             minifiziert, dazu .gz und .br (falls brotli installiert)
+#   - css/<seite>.<hash>.css       seitenspezifische Styles, ebenso
+#   - js/<bundle>.<hash>.js        Skripte (unverändert), dazu .gz und .br
+#   - logo@400.<hash>.png/.webp    verkleinerte Logos (falls Pillow installiert)
+#   - manifest.json                Originalname → Fingerprint-Pfad (für static_url)
+#
+# Fehlt Pillow oder brotli, werden die betroffenen Varianten übersprungen;
+# static_url fällt dann auf die Originaldatei zurück.
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from assets import DIST_DIR, MANIFEST_NAME, variant_name
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# CSS-Dateien, die minifiziert und vorkomprimiert werden
+STYLESHEETS = ['style.css', 'css/calendar.css', 'css/manage_slots.css']
+
+# Skripte werden nur mit Fingerprint versehen und vorkomprimiert
+SCRIPTS = ['js/base.js', 'js/notifications.js', 'js/dashboard.js']
+
+# Logo-Varianten: Datei → Breiten in Pixeln (2x der größten CSS-Anzeigegröße)
+#   logo.png:     200px Login, 80px Kontaktbox
+#   logo-ers.png: 32px hoch in der Navigation (1024x208 → 158x32)
+IMAGE_VARIANTS = {
+    'logo.png': [400, 160],
+    'logo-ers.png': [316],
+}
+IMAGE_FORMATS = ['png', 'webp']
+
+# Unter dieser Größe lohnt sich keine vorkomprimierte Variante
+MIN_PRECOMPRESS_BYTES = 1024
+
+
+def minify_css(css):
+    """Entfernt Kommentare und überflüssige Leerzeichen (ohne Werte umzuschreiben)"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def fingerprint(data):
+    """Kurzer Inhalts-Hash für Dateinamen"""
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def write_dist_file(logical_name, data, manifest):
+    """Schreibt data als <stem>.<hash><ext> nach static/dist und trägt es ins Manifest ein"""
+    stem, ext = os.path.splitext(logical_name)
+    built_name = f"{stem}.{fingerprint(data)}{ext}"
+    path = os.path.join(STATIC_DIR, DIST_DIR, built_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    manifest[logical_name] = f"{DIST_DIR}/{built_name}"
+    return path
+
+
+def precompress(path, data):
+    """Legt .gz- und (falls verfügbar) .br-Varianten neben der Datei an"""
+    if len(data) < MIN_PRECOMPRESS_BYTES:
+        return []
+    sizes = []
+    with open(path + '.gz', 'wb') as f:
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        f.write(gz)
+        sizes.append(f"gzip {len(gz) // 1024} KB")
+    try:
+        import brotli
+    except ImportError:
+        return sizes
+    br = brotli.compress(data, quality=11)
+    with open(path + '.br', 'wb') as f:
+        f.write(br)
+    sizes.append(f"br {len(br) // 1024} KB")
+    return sizes
+
+
+def build_stylesheets(manifest):
+    for name in STYLESHEETS:
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+            source = f.read()
+        data = minify_css(source).encode('utf-8')
+        path = write_dist_file(name, data, manifest)
+        sizes = precompress(path, data)
+        print(f"   {name}: {len(source.encode('utf-8')) // 1024} KB → {len(data) // 1024} KB"
+              + (f" ({', '.join(sizes)})" if sizes else ""))
+
+
+def build_scripts(manifest):
+    for name in SCRIPTS:
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            data = f.read()
+        path = write_dist_file(name, data, manifest)
+        sizes = precompress(path, data)
+        print(f"   {name}: {len(data) // 1024} KB" + (f" ({', '.join(sizes)})" if sizes else ""))
+
+
+def build_images(manifest):
+    try:
+        from PIL import Image
+    except ImportError:
+        print("⚠️ Pillow nicht installiert - Logo-Varianten werden übersprungen")
+        return
+
+    from io import BytesIO
+
+    for name, widths in IMAGE_VARIANTS.items():
+        with Image.open(os.path.join(STATIC_DIR, name)) as original:
+            original.load()
+            for width in widths:
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.LANCZOS)
+                for fmt in IMAGE_FORMATS:
+                    buffer = BytesIO()
+                    if fmt == 'webp':
+                        resized.save(buffer, 'WEBP', quality=85, method=6)
+                    else:
+                        resized.save(buffer, 'PNG', optimize=True)
+                    data = buffer.getvalue()
+                    write_dist_file(variant_name(name, width, fmt), data, manifest)
+                    print(f"   {variant_name(name, width, fmt)}: {width}x{height}, {len(data) // 1024} KB")
+
+
+def main():
+    dist = os.path.join(STATIC_DIR, DIST_DIR)
+    # Alte Builds entfernen, damit static/dist nicht wächst
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+
+    manifest = {}
+    print("🔧 Baue statische Assets...")
+    build_stylesheets(manifest)
+    build_scripts(manifest)
+    build_images(manifest)
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"✅ {len(manifest)} Assets in static/{DIST_DIR}/ ({MANIFEST_NAME})")
+
+
+if __name__ == '__main__':
+    main()
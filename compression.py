@@ -0,0 +1,243 @@
+# Komprimierung von HTML/JSON-Antworten (WSGI-Middleware)
+#
+# Antworten mit komprimierbarem Content-Type werden je nach Accept-Encoding
+# mit brotli (falls installiert) oder gzip komprimiert. Übersprungen werden:
+#   - kleine Antworten unter COMPRESS_MIN_SIZE Bytes
+#   - Antworten mit eigenem Content-Encoding (z.B. .br/.gz aus static/dist)
+#   - /static/dist/ (dort liegen vorkomprimierte Varianten, siehe assets.py)
+#   - HEAD, 204/206/304 und Cache-Control: no-transform
+#
+# Antworten mit Content-Length werden am Stück komprimiert. Gestreamte
+# Antworten (Generator, ohne Content-Length) werden Chunk für Chunk komprimiert
+# und nach jedem Chunk geflusht, damit der Client die Daten sofort erhält.
+#
+# Umgebungsvariablen:
+#   COMPRESSION=0        abschalten (z.B. wenn ein Proxy davor komprimiert)
+#   COMPRESS_MIN_SIZE    Mindestgröße in Bytes (Standard 500)
+#   COMPRESS_LEVEL       gzip-Level 1-9 (Standard 6)
+
+import logging
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+from server_profile import env_bool, env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_SIZE = 500
+DEFAULT_GZIP_LEVEL = 6
+
+# Brotli-Qualität für dynamische Antworten: 4 ist ähnlich schnell wie gzip -6,
+# aber kleiner. Statische Dateien baut build_assets.py mit Qualität 11.
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+SKIP_STATUS = (204, 206, 304)
+
+_brotli = None
+
+
+def _load_brotli():
+    """Importiert brotli beim ersten Bedarf (False, wenn nicht installiert)"""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Wählt die Kodierung aus dem Accept-Encoding-Header.
+
+    Returns:
+        'br', 'gzip' oder None
+    """
+    if not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    br_quality = accept['br'] if _load_brotli() else 0
+    gzip_quality = accept['gzip']
+    if br_quality and br_quality >= gzip_quality:
+        return 'br'
+    if gzip_quality:
+        return 'gzip'
+    return None
+
+
+class _Gzip:
+    """gzip-Stream mit zlib (wbits=31 → gzip-Header und -Trailer)"""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = _load_brotli().Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Komprimiert WSGI-Antworten nach Accept-Encoding"""
+
+    def __init__(self, app, min_size=DEFAULT_MIN_SIZE, level=DEFAULT_GZIP_LEVEL, skip_prefixes=()):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    def _compressor(self, encoding):
+        return _Brotli() if encoding == 'br' else _Gzip(self.level)
+
+    def _is_candidate(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return False
+        return not environ.get('PATH_INFO', '').startswith(self.skip_prefixes)
+
+    def _should_compress(self, status, headers):
+        """Prüft Status und Header der Antwort (Größe wird separat geprüft)"""
+        if int(status.split(' ', 1)[0]) in SKIP_STATUS:
+            return False
+        content_type = ''
+        for name, value in headers:
+            name = name.lower()
+            if name == 'content-encoding':
+                return False
+            if name == 'cache-control' and 'no-transform' in value.lower():
+                return False
+            if name == 'content-type':
+                content_type = value.lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def __call__(self, environ, start_response):
+        if not self._is_candidate(environ):
+            return self.app(environ, start_response)
+
+        encoding = negotiate_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            # Aufruf an den Server erst, wenn feststeht, ob komprimiert wird
+            captured['args'] = (status, headers, exc_info)
+            return captured_write
+
+        def captured_write(data):
+            # Flask/Werkzeug verwenden write() nicht; nur zur WSGI-Vollständigkeit
+            captured.setdefault('written', []).append(data)
+
+        app_iter = self.app(environ, capture_start_response)
+        status, headers, exc_info = captured['args']
+
+        if not self._should_compress(status, headers):
+            return self._passthrough(start_response, captured, app_iter)
+
+        headers = [(name, value) for name, value in headers if name.lower() != 'vary'] + [
+            ('Vary', _merge_vary(headers))
+        ]
+        length = _header(headers, 'content-length')
+        if encoding is None or (length is not None and int(length) < self.min_size):
+            captured['args'] = (status, headers, exc_info)
+            return self._passthrough(start_response, captured, app_iter)
+
+        headers = [(name, _weak_etag(value) if name.lower() == 'etag' else value)
+                   for name, value in headers if name.lower() != 'content-length']
+        headers.append(('Content-Encoding', encoding))
+
+        if length is not None:
+            # Gepufferte Antwort: am Stück komprimieren, Content-Length neu setzen
+            try:
+                body = b''.join(captured.get('written', [])) + b''.join(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            compressor = self._compressor(encoding)
+            data = compressor.compress(body) + compressor.finish()
+            headers.append(('Content-Length', str(len(data))))
+            start_response(status, headers, exc_info)
+            return [data]
+
+        start_response(status, headers, exc_info)
+        return self._stream(self._compressor(encoding), captured.get('written', []), app_iter)
+
+    def _passthrough(self, start_response, captured, app_iter):
+        write = start_response(*captured['args'])
+        for data in captured.get('written', []):
+            write(data)
+        return app_iter
+
+    @staticmethod
+    def _stream(compressor, written, app_iter):
+        """Komprimiert einen gestreamten Body und flusht nach jedem Chunk"""
+        try:
+            for chunk in written:
+                yield compressor.compress(chunk) + compressor.flush()
+            for chunk in app_iter:
+                if chunk:
+                    yield compressor.compress(chunk) + compressor.flush()
+            yield compressor.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+
+def _header(headers, name):
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _merge_vary(headers):
+    """Ergänzt einen vorhandenen Vary-Header um Accept-Encoding"""
+    values = [v.strip() for key, value in headers if key.lower() == 'vary' for v in value.split(',')]
+    values = [v for v in values if v]
+    if not any(v.lower() == 'accept-encoding' for v in values):
+        values.append('Accept-Encoding')
+    return ', '.join(values)
+
+
+def _weak_etag(value):
+    """Komprimierte Bytes sind nicht identisch → starkes ETag als schwach kennzeichnen"""
+    return value if value.startswith('W/') else 'W/' + value
+
+
+def init_compression(app):
+    """Hängt die CompressionMiddleware vor app.wsgi_app"""
+    if not env_bool('COMPRESSION', True):
+        logger.info("Antwort-Komprimierung deaktiviert (COMPRESSION=0)")
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=env_int('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE),
+        level=env_int('COMPRESS_LEVEL', DEFAULT_GZIP_LEVEL),
+        skip_prefixes=(f'{app.static_url_path}/dist/',),
+    )
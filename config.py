@@ -129,6 +129,43 @@ SCHOOL_CLASSES = [
 MAX_STUDENTS_PER_PERIOD = 5
 BOOKING_ADVANCE_MINUTES = 60
 
+# Schuljahr beginnt am 1. August (Monat, Tag) - Grenze für das Archiv (archive.py)
+SCHOOL_YEAR_START = (8, 1)
+
+# =====================================================================
+#  Ferien und Feiertage 2026 (Niedersachsen)
+# =====================================================================
+
+# (Start, Ende, Grund, Icon) - von /admin/setup_holidays_2026 gesperrt
+SCHOOL_HOLIDAYS_2026 = [
+    # Winterferien: 02.02. - 03.02.2026
+    ('2026-02-02', '2026-02-03', '❄️ Winterferien', '❄️'),
+    # Osterferien: 23.03. - 04.04.2026
+    ('2026-03-23', '2026-04-04', '🐣 Osterferien', '🐣'),
+    # Pfingstferien: 26.05.2026
+    ('2026-05-26', '2026-05-26', '🌸 Pfingstferien', '🌸'),
+    # Sommerferien: 16.07. - 26.08.2026
+    ('2026-07-16', '2026-08-26', '☀️ Sommerferien', '☀️'),
+    # Herbstferien: 12.10. - 24.10.2026
+    ('2026-10-12', '2026-10-24', '🍂 Herbstferien', '🍂'),
+    # Weihnachtsferien: 23.12.2026 - 06.01.2027
+    ('2026-12-23', '2027-01-06', '🎄 Weihnachtsferien', '🎄'),
+]
+
+# Gesetzliche Feiertage Niedersachsen 2026
+PUBLIC_HOLIDAYS_2026 = [
+    ('2026-01-01', '2026-01-01', '🎆 Neujahr', '🎆'),
+    ('2026-04-03', '2026-04-03', '✝️ Karfreitag', '✝️'),
+    ('2026-04-06', '2026-04-06', '✝️ Ostermontag', '✝️'),
+    ('2026-05-01', '2026-05-01', '🔧 Tag der Arbeit', '🔧'),
+    ('2026-05-14', '2026-05-14', '☁️ Christi Himmelfahrt', '☁️'),
+    ('2026-05-25', '2026-05-25', '🕊️ Pfingstmontag', '🕊️'),
+    ('2026-10-03', '2026-10-03', '🇩🇪 Tag der Deutschen Einheit', '🇩🇪'),
+    ('2026-10-31', '2026-10-31', '⛪ Reformationstag', '⛪'),
+    ('2026-12-25', '2026-12-25', '🎄 1. Weihnachtstag', '🎄'),
+    ('2026-12-26', '2026-12-26', '🎄 2. Weihnachtstag', '🎄'),
+]
+
 # =====================================================================
 #  SMTP (IServ) — Port 587 + STARTTLS (empfohlen)
 # =====================================================================
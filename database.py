@@ -1,3 +1,6 @@
+import os
+
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 
@@ -5,3 +8,40 @@ class Base(DeclarativeBase):
     pass
 
 db = SQLAlchemy(model_class=Base)
+
+def create_cli_app():
+    """
+    Minimale Flask-App nur mit Datenbank für Kommandozeilen-Skripte und Cron-Jobs
+    (analytics.py, archive.py). app.py wird nicht importiert: kein
+    SESSION_SECRET nötig, keine Metriken, kein Tracing, kein Watchdog und keine
+    Schema-Prüfung beim Start.
+    """
+    db_uri = (os.environ.get("DATABASE_URL") or os.environ.get("SQLALCHEMY_DATABASE_URI") or "").strip()
+    if not db_uri:
+        raise RuntimeError(
+            "Keine DB-URL gefunden. Bitte DATABASE_URL "
+            "oder SQLALCHEMY_DATABASE_URI setzen."
+        )
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_pre_ping": True}
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+def get_pool_stats(engine):
+    """Gibt Kennzahlen des Connection-Pools als Dictionary zurück"""
+    pool = engine.pool
+    stats = {
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+    }
+    # Nur QueuePool kennt Größe, Overflow und ausgeliehene Verbindungen
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    timeout = getattr(pool, 'timeout', None)
+    if callable(timeout):
+        stats['timeout'] = timeout()
+    return stats
@@ -5,12 +5,13 @@ import os
 from app import app
 from models import create_user, get_user_by_username
 from database import db
+from migrations import run_migrations
 
 def setup_database():
     """Initialisiert die Datenbank und erstellt einen Standard-Admin-Account"""
     with app.app_context():
-        print("Erstelle Datenbank-Tabellen...")
-        db.create_all()
+        print("Erstelle/aktualisiere Datenbank-Tabellen...")
+        run_migrations(db.engine)
         print("Datenbank-Tabellen erfolgreich erstellt!")
         
         # Prüfe, ob bereits ein Admin existiert
@@ -1,11 +1,14 @@
 import os
 import json
 import logging
+import time
 from datetime import datetime
 
-import resend
-
 from config import ADMIN_EMAIL
+from metrics import track_outbound
+from tracing import traced
+
+logger = logging.getLogger(__name__)
 
 
 def format_date_german(date_str):
@@ -34,6 +37,28 @@ def get_german_weekday(weekday_abbr):
     return weekday_map.get(weekday_abbr, weekday_abbr)
 
 
+# Resend-Zugangsdaten pro Worker-Prozess zwischenspeichern, damit nicht jede
+# E-Mail einen HTTP-Aufruf beim Replit Connector auslöst. An die Prozess-ID
+# gebunden, damit nach fork() (preload_app) jeder Worker selbst nachlädt.
+RESEND_CREDENTIALS_TTL = 600
+_resend_state = {'pid': None, 'api_key': None, 'from_email': None, 'loaded_at': 0.0}
+
+
+def get_resend_client():
+    """
+    Gibt (api_key, from_email) für diesen Worker zurück und lädt sie
+    höchstens alle RESEND_CREDENTIALS_TTL Sekunden neu.
+    """
+    now = time.monotonic()
+    if (_resend_state['pid'] != os.getpid()
+            or now - _resend_state['loaded_at'] > RESEND_CREDENTIALS_TTL):
+        api_key, from_email = get_resend_credentials()
+        _resend_state.update(pid=os.getpid(), api_key=api_key,
+                             from_email=from_email, loaded_at=now)
+    return _resend_state['api_key'], _resend_state['from_email']
+
+
+@traced()
 def get_resend_credentials():
     """Holt Resend API-Key - zuerst aus ENV, dann über Replit Connector"""
 
@@ -42,7 +67,7 @@ def get_resend_credentials():
                                     'SportOase <mauro@sportoase.app>')
 
     if env_api_key:
-        print(f"[EMAIL] Resend API-Key aus Environment Variable gefunden")
+        logger.info("Resend API-Key aus Environment Variable gefunden")
         return env_api_key, env_from_email
 
     hostname = os.environ.get('REPLIT_CONNECTORS_HOSTNAME')
@@ -54,18 +79,19 @@ def get_resend_credentials():
         x_replit_token = 'depl ' + os.environ.get('WEB_REPL_RENEWAL')
 
     if not x_replit_token or not hostname:
-        print("[EMAIL] Weder ENV noch Replit Connector verfügbar")
+        logger.warning("Resend: weder ENV noch Replit Connector verfügbar")
         return None, None
 
     try:
         import requests
-        response = requests.get(
-            f'https://{hostname}/api/v2/connection?include_secrets=true&connector_names=resend',
-            headers={
-                'Accept': 'application/json',
-                'X_REPLIT_TOKEN': x_replit_token
-            },
-            timeout=10)
+        with track_outbound('replit_connector'):
+            response = requests.get(
+                f'https://{hostname}/api/v2/connection?include_secrets=true&connector_names=resend',
+                headers={
+                    'Accept': 'application/json',
+                    'X_REPLIT_TOKEN': x_replit_token
+                },
+                timeout=10)
         data = response.json()
         connection = data.get('items', [{}])[0] if data.get('items') else {}
         settings = connection.get('settings', {})
@@ -74,32 +100,31 @@ def get_resend_credentials():
         from_email = settings.get('from_email')
 
         if api_key:
-            print(f"[EMAIL] Resend API-Key über Replit Connector gefunden")
+            logger.info("Resend API-Key über Replit Connector gefunden")
             return api_key, from_email
         else:
-            print("[EMAIL] Resend nicht konfiguriert")
+            logger.warning("Resend nicht konfiguriert")
             return None, None
 
     except Exception as e:
-        print(f"[EMAIL] Fehler beim Abrufen der Resend-Credentials: {e}")
+        logger.error(f"Fehler beim Abrufen der Resend-Credentials: {e}")
         return None, None
 
 
+@traced()
 def send_email_resend(to_email, subject, body_html, body_text=None):
     """Sendet E-Mail über Resend API"""
-    logger = logging.getLogger(__name__)
-
-    logger.info(f"Versuche E-Mail zu senden an: {to_email}")
+    logger.debug(f"Versuche E-Mail zu senden an: {to_email}")
 
     try:
-        api_key, from_email = get_resend_credentials()
+        api_key, from_email = get_resend_client()
 
         if not api_key:
-            print(
-                f"[EMAIL] WARNUNG: Resend nicht konfiguriert - E-Mail an {to_email} nicht gesendet"
-            )
+            logger.warning(f"Resend nicht konfiguriert - E-Mail an {to_email} nicht gesendet")
             return False
 
+        # resend (zieht requests nach sich) erst beim ersten Versand laden
+        import resend
         resend.api_key = api_key
 
         from_address = "SportOase <mauro@sportoase.app>"
@@ -114,16 +139,15 @@ def send_email_resend(to_email, subject, body_html, body_text=None):
         if body_text:
             params["text"] = body_text
 
-        print(f"[EMAIL] Sende von {from_address} an {to_email}...")
-        result = resend.Emails.send(params)
+        with track_outbound('resend'):
+            result = resend.Emails.send(params)
 
-        print(
-            f"[EMAIL] Erfolgreich gesendet an {to_email} (ID: {result.get('id', 'unknown')})"
-        )
+        logger.info("E-Mail gesendet", extra={'to': to_email, 'subject': subject,
+                                              'resend_id': result.get('id', 'unknown')})
         return True
 
     except Exception as e:
-        print(f"[EMAIL] FEHLER beim E-Mail-Versand an {to_email}: {e}")
+        logger.error(f"Fehler beim E-Mail-Versand an {to_email}: {e}")
         return False
 
 
@@ -224,6 +248,7 @@ Automatisch generiert am {datetime.now().strftime('%d.%m.%Y um %H:%M Uhr')}
     return subject, html, text
 
 
+@traced()
 def send_booking_notification(data):
     """Sendet Buchungsbenachrichtigung an Admin"""
     subject, html, text = create_booking_notification_email(data)
@@ -315,12 +340,14 @@ SportOase – Ernst-Reuter-Schule Pattensen
     return subject, html, text
 
 
+@traced()
 def send_user_booking_confirmation(email, data):
     """Sendet Buchungsbestätigung an den buchenden Benutzer"""
     subject, html, text = create_user_confirmation_email(data)
     return send_email_resend(email, subject, html, text)
 
 
+@traced()
 def send_exclusive_pending_email(email, data):
     """Sendet E-Mail bei ausstehender Einzelbuchung (Freigabe erforderlich)"""
     from config import PERIOD_TIMES
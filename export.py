@@ -0,0 +1,223 @@
+# Export der Buchungen als CSV oder XLSX (/admin/export)
+#
+# Eine Zeile pro Schüler*in, gefiltert nach Zeitraum, Lehrkraft und Klasse.
+# Die Buchungen werden mit yield_per in Blöcken gelesen (auf PostgreSQL über
+# einen serverseitigen Cursor) und die Datei als Generator gestreamt - der
+# Worker hält nie mehr als einen Block im Speicher, egal wie groß der
+# Zeitraum ist.
+#
+# XLSX wird ohne Zusatzpaket geschrieben: ein ZIP-Stream (zipfile mit
+# Data-Descriptoren, kein seek nötig) mit einem Tabellenblatt aus
+# Inline-Strings.
+#
+# CSV ist für deutsches Excel eingestellt: UTF-8 mit BOM, Semikolon als
+# Trennzeichen. Zellen, die mit = + - @ beginnen, bekommen ein ' vorangestellt,
+# damit Schülernamen o.ä. nicht als Formel ausgeführt werden.
+
+import csv
+import io
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from database import db
+from models import Booking, BookingArchive, User
+
+EXPORT_BATCH = 500
+
+# (Überschrift, Schlüssel in der Zeile)
+EXPORT_COLUMNS = (
+    ('Datum', 'date'),
+    ('Wochentag', 'weekday'),
+    ('Stunde', 'period'),
+    ('Angebot', 'offer_label'),
+    ('Art', 'offer_type'),
+    ('Schüler*in', 'student_name'),
+    ('Klasse Schüler*in', 'student_class'),
+    ('Lehrkraft', 'teacher_name'),
+    ('E-Mail Lehrkraft', 'teacher_email'),
+    ('Klasse Buchung', 'teacher_class'),
+    ('Einzelangebot', 'is_exclusive'),
+    ('Genehmigt', 'is_approved'),
+    ('Notizen', 'notes'),
+    ('Buchungs-ID', 'booking_id'),
+    ('Gebucht am', 'created_at'),
+    ('Archiviert', 'archived'),
+)
+
+_BOOKING_FIELDS = ('id', 'date', 'weekday', 'period', 'teacher_name', 'teacher_class', 'students_json',
+                   'offer_type', 'offer_label', 'notes', 'is_exclusive', 'is_approved', 'created_at')
+
+# In XML 1.0 nicht erlaubte Steuerzeichen (z.B. aus kopierten Notizen)
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _booking_rows(model, start_date, end_date, teacher_id):
+    """Buchungen eines Modells (live oder Archiv) blockweise mit E-Mail der Lehrkraft"""
+    columns = [getattr(model, name) for name in _BOOKING_FIELDS]
+    query = (db.session.query(*columns, User.email)
+             .outerjoin(User, User.id == model.teacher_id)
+             .filter(model.date >= start_date, model.date <= end_date))
+    if teacher_id:
+        query = query.filter(model.teacher_id == teacher_id)
+    return query.order_by(model.date, model.period, model.id).yield_per(EXPORT_BATCH)
+
+
+def iter_export_rows(start_date, end_date, teacher_id=None, school_class=None, include_archive=False):
+    """
+    Zeilen für den Export, eine pro Schüler*in, aufsteigend nach Datum und Stunde.
+
+    Args:
+        start_date, end_date: Zeitraum als 'YYYY-MM-DD' (beide inklusive)
+        teacher_id: nur Buchungen dieser Lehrkraft
+        school_class: nur Schüler*innen dieser Klasse
+        include_archive: abgeschlossene Schuljahre einbeziehen (archive.py)
+    """
+    # Archivierte Schuljahre liegen zeitlich vor den Live-Daten
+    sources = ((BookingArchive, True), (Booking, False)) if include_archive else ((Booking, False),)
+    for model, archived in sources:
+        for row in _booking_rows(model, start_date, end_date, teacher_id):
+            booking = dict(zip(_BOOKING_FIELDS, row))
+            students = json.loads(booking['students_json']) if booking['students_json'] else []
+            for student in students:
+                if school_class and student.get('klasse') != school_class:
+                    continue
+                yield {
+                    'date': booking['date'],
+                    'weekday': booking['weekday'],
+                    'period': booking['period'],
+                    'offer_label': booking['offer_label'],
+                    'offer_type': booking['offer_type'],
+                    'student_name': student.get('name', ''),
+                    'student_class': student.get('klasse', ''),
+                    'teacher_name': booking['teacher_name'],
+                    'teacher_email': row[-1],
+                    'teacher_class': booking['teacher_class'],
+                    'is_exclusive': 'ja' if booking['is_exclusive'] else 'nein',
+                    'is_approved': 'ja' if booking['is_approved'] else 'nein',
+                    'notes': booking['notes'],
+                    'booking_id': booking['id'],
+                    'created_at': booking['created_at'].strftime('%Y-%m-%d %H:%M') if booking['created_at'] else '',
+                    'archived': 'ja' if archived else 'nein',
+                }
+
+
+def _csv_safe(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    """CSV-Chunks (Bytes), ein Chunk pro EXPORT_BATCH Zeilen"""
+    # BOM, damit Excel die Datei als UTF-8 erkennt
+    yield '\ufeff'.encode('utf-8')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow([title for title, _ in EXPORT_COLUMNS])
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_safe(row[key]) for _, key in EXPORT_COLUMNS])
+        if count % EXPORT_BATCH == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# Minimales Workbook mit einem Blatt "Buchungen"
+_XLSX_STATIC_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Buchungen" sheetId="1" r:id="rId1"/></sheets>'
+     '</workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+)
+
+
+class _ChunkSink:
+    """Schreibziel für zipfile ohne seek/tell: sammelt Bytes bis zum nächsten yield"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = _INVALID_XML_CHARS.sub('', str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(rows):
+    """XLSX-Chunks (Bytes); das Tabellenblatt wird beim Lesen der Zeilen komprimiert"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS:
+            workbook.writestr(name, content)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>'.encode('utf-8'))
+            sheet.write(_xlsx_row(title for title, _ in EXPORT_COLUMNS).encode('utf-8'))
+            batch = []
+            for count, row in enumerate(rows, 1):
+                batch.append(_xlsx_row(row[key] for _, key in EXPORT_COLUMNS))
+                if count % EXPORT_BATCH == 0:
+                    sheet.write(''.join(batch).encode('utf-8'))
+                    batch = []
+                    yield sink.take()
+            sheet.write((''.join(batch) + '</sheetData></worksheet>').encode('utf-8'))
+    yield sink.take()
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
@@ -1,14 +1,24 @@
-import multiprocessing
 import os
+import sys
+import tempfile
+import time
+
+from server_profile import env_bool, env_int, get_server_profile
+
+# Worker-Modell über SERVER_PROFILE wählbar (sync, gthread, gevent)
+server_profile = get_server_profile()
 
 bind = "0.0.0.0:5000"
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+workers = server_profile['workers']
+worker_class = server_profile['worker_class']
+threads = server_profile['threads']
+worker_connections = server_profile['worker_connections']
 timeout = 120
 keepalive = 5
 
-max_requests = 1000
+# Worker werden nach Speicher recycelt (WORKER_MAX_RSS_MB, worker_memory.py),
+# nicht mehr nach Anzahl Requests; GUNICORN_MAX_REQUESTS bleibt als Notbremse
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 0)
 max_requests_jitter = 50
 
 errorlog = "-"
@@ -16,11 +26,35 @@ loglevel = "info"
 accesslog = "-"
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 
-preload_app = False
+# Metriken aller Worker werden über Dateien zusammengeführt (metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'sportoase-metrics'))
+
+# App einmal im Master laden und per fork() (Copy-on-Write) an die Worker
+# weitergeben. Bei gevent muss das Monkey-Patching vor dem App-Import
+# passieren, daher dort standardmäßig ohne Preload.
+preload_app = env_bool('GUNICORN_PRELOAD', server_profile['name'] != 'gevent')
+
+def _precompile_templates(log):
+    """Kompiliert alle Templates der geladenen App vorab (siehe template_cache.py)"""
+    app_module = sys.modules.get('app')
+    if app_module is None:
+        return
+    from template_cache import precompile_templates, should_precompile
+    if not should_precompile():
+        return
+    count, elapsed_ms = precompile_templates(app_module.app)
+    log.info("%s Templates vorkompiliert in %.1f ms (pid %s)", count, elapsed_ms, os.getpid())
 
 def on_starting(server):
     """Called just before the master process is initialized."""
     server.log.info("Starting SportOase Buchungssystem")
+    server.log.info(
+        "Server-Profil: %s (workers=%s, threads=%s, worker_connections=%s)",
+        server_profile['name'], workers, threads, worker_connections
+    )
+    # Zähler eines früheren Laufs nicht mitzählen
+    from metrics import reset_metrics_dir
+    reset_metrics_dir()
 
 def on_reload(server):
     """Called to recycle workers during a reload via SIGHUP."""
@@ -29,6 +63,60 @@ def on_reload(server):
 def when_ready(server):
     """Called just after the server is started."""
     server.log.info("SportOase Buchungssystem is ready to serve requests")
+    # Mit preload_app ist die App hier bereits geladen: Templates einmal im
+    # Master kompilieren, alle (auch recycelte) Worker erben sie per fork()
+    if preload_app:
+        _precompile_templates(server.log)
+
+def pre_fork(server, worker):
+    """Called just before a worker is forked."""
+    # Wird mit dem Worker-Objekt in den Kindprozess kopiert
+    worker.spawn_started = time.monotonic()
+
+def post_fork(server, worker):
+    """Called just after a worker has been forked."""
+    # Vom Master geerbte Datenbankverbindungen nicht weiterverwenden:
+    # close=False lässt die Sockets für den Master offen und verwirft
+    # nur die Referenzen im Pool dieses Workers
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        with app_module.app.app_context():
+            app_module.db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    """Called just after a worker has initialized the application."""
+    spawn_started = getattr(worker, 'spawn_started', None)
+    if spawn_started is not None:
+        worker.log.info(
+            "Worker %s bereit nach %.1f ms (preload_app=%s)",
+            worker.pid, (time.monotonic() - spawn_started) * 1000, preload_app
+        )
+    if not preload_app:
+        _precompile_templates(worker.log)
+    # RSS-Schwelle gilt ab jetzt für diesen Worker
+    from worker_memory import register_worker
+    register_worker(worker)
+    if server_profile['name'] == 'gevent':
+        # psycopg2 blockiert sonst den ganzen Event-Loop während einer Query
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+        worker.log.info("psycopg2 für gevent gepatcht (psycogreen)")
+
+def worker_exit(server, worker):
+    """Called just after a worker has been exited, in the worker process."""
+    from metrics import flush
+    flush(force=True)
+    # Wartende Traces und Log-Records schreiben, bevor der Prozess endet
+    from tracing import shutdown_tracing
+    shutdown_tracing()
+    from log_pipeline import shutdown_logging
+    shutdown_logging()
+
+def child_exit(server, worker):
+    """Called just after a worker has been exited, in the master process."""
+    # Zähler des beendeten Workers bleiben in archive.json erhalten
+    from metrics import archive_worker
+    archive_worker(worker.pid)
 
 def on_exit(server):
     """Called just before exiting Gunicorn."""
@@ -0,0 +1,204 @@
+# Strukturiertes Logging über eine Queue
+#
+# Log-Aufrufe im Request legen den Record nur in eine Queue (QueueHandler).
+# Ein Listener-Thread pro Prozess formatiert ihn als JSON-Zeile und schreibt
+# nach stdout und logs/sportoase.log. Langsames stdout oder eine volle Platte
+# bremsen damit keinen Request mehr. Ist die Queue voll, wird der Record
+# verworfen und gezählt (sportoase_log_records_dropped_total), statt zu warten.
+#
+# Nach fork() (Gunicorn mit preload_app) bekommt jeder Worker eine neue Queue
+# und einen eigenen Listener-Thread.
+#
+# Umgebungsvariablen:
+#   LOG_LEVEL=INFO                   Level für alle Logger
+#   LOG_LEVELS=oauth_config=DEBUG    Level pro Logger (kommagetrennt)
+#   LOG_SAMPLING=app.booking=0.1     Anteil behaltener Records unter WARNING pro Logger
+#   LOG_FORMAT=json                  json oder text (lesbar für die Entwicklung)
+#   LOG_FILE=logs/sportoase.log      Log-Datei, leer = nur stdout
+#   LOG_QUEUE_SIZE=10000             Records in der Queue, bevor verworfen wird
+#
+# Logger der App: app (Flask app.logger), app.auth, app.booking, models,
+# email_service, oauth_config
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import has_request_context, request, session
+
+from server_profile import env_int
+
+DEFAULT_LOG_FILE = os.path.join('logs', 'sportoase.log')
+DEFAULT_QUEUE_SIZE = 10000
+
+# Attribute jedes LogRecords; alles andere kam über extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_state = {'pid': None, 'handler': None, 'listener': None, 'targets': None}
+
+
+def _parse_mapping(name):
+    """'a=1,b.c=2' → {'a': '1', 'b.c': '2'}"""
+    mapping = {}
+    for item in os.environ.get(name, '').split(','):
+        key, sep, value = item.partition('=')
+        if sep and key.strip() and value.strip():
+            mapping[key.strip()] = value.strip()
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Record inkl. Request-Kontext und extra-Feldern"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Hängt Route, Methode und Benutzer-ID des laufenden Requests an"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.route = request.endpoint or request.path
+            record.method = request.method
+            user_id = session.get('user_id')
+            if user_id is not None:
+                record.user_id = user_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Behält pro Logger (und Unterlogger) nur einen Anteil der Records unter WARNING"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        return random.random() < self.rate_for(record.name)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler, der bei voller Queue verwirft statt zu blockieren"""
+
+    def prepare(self, record):
+        # Nachricht und Traceback im aufrufenden Thread auflösen (args und
+        # exc_info sind nicht immer thread-sicher), formatiert wird im Listener
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            from metrics import inc_counter
+            inc_counter('sportoase_log_records_dropped_total')
+
+
+def _make_targets():
+    """Handler, in die der Listener schreibt"""
+    if os.environ.get('LOG_FORMAT', 'json').strip().lower() == 'text':
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    else:
+        formatter = JsonFormatter()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    targets = [stream_handler]
+
+    log_file = os.environ.get('LOG_FILE', DEFAULT_LOG_FILE).strip()
+    if log_file:
+        try:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            file_handler = RotatingFileHandler(log_file, maxBytes=10240000, backupCount=10)
+            file_handler.setFormatter(formatter)
+            targets.append(file_handler)
+        except OSError as e:
+            sys.stderr.write(f"⚠️ Log-Datei {log_file} nicht nutzbar: {e}\n")
+    return targets
+
+
+def _start_listener():
+    """Neue Queue und Listener-Thread für diesen Prozess"""
+    handler = _state['handler']
+    handler.queue = queue.Queue(maxsize=max(1, env_int('LOG_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)))
+    listener = QueueListener(handler.queue, *_state['targets'], respect_handler_level=True)
+    listener.start()
+    _state.update(pid=os.getpid(), listener=listener)
+
+
+def _after_fork_in_child():
+    # Der Listener-Thread des Masters existiert im Kind nicht mehr
+    if _state['handler'] is not None:
+        _start_listener()
+
+
+def shutdown_logging():
+    """Schreibt alle wartenden Records und beendet den Listener dieses Prozesses"""
+    listener = _state['listener']
+    if listener is not None and _state['pid'] == os.getpid():
+        _state['listener'] = None
+        listener.stop()
+        for target in _state['targets']:
+            target.flush()
+
+
+def init_logging(app):
+    """Richtet das Queue-Logging für den Root-Logger ein (einmal pro Prozess)"""
+    if _state['handler'] is not None:
+        return
+
+    root = logging.getLogger()
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').strip().upper() or 'INFO')
+    for name, level in _parse_mapping('LOG_LEVELS').items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    rates = {}
+    for name, value in _parse_mapping('LOG_SAMPLING').items():
+        try:
+            rates[name] = min(1.0, max(0.0, float(value)))
+        except ValueError:
+            sys.stderr.write(f"⚠️ LOG_SAMPLING {name}={value!r} ist keine Zahl - ignoriert\n")
+
+    handler = NonBlockingQueueHandler(queue.Queue())
+    handler.addFilter(SamplingFilter(rates))
+    handler.addFilter(RequestContextFilter())
+    _state.update(handler=handler, targets=_make_targets())
+    _start_listener()
+    root.addHandler(handler)
+
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+    atexit.register(shutdown_logging)
+    app.logger.info('SportOase Buchungssystem gestartet')
@@ -0,0 +1,349 @@
+# Laufzeit-Metriken im Prometheus-Textformat
+#
+# Erfasst pro Worker:
+#   - Latenz jeder Route (Histogramm nach Endpoint, Methode, Status)
+#   - Anzahl und Dauer der SQL-Statements pro Route (SQLAlchemy-Events)
+#   - Dauer ausgehender HTTP-Aufrufe (Resend, IServ OAuth) über track_outbound()
+#
+# Mehrere Gunicorn-Worker: Jeder Worker schreibt seinen Stand höchstens alle
+# METRICS_FLUSH_INTERVAL Sekunden nach METRICS_DIR/<pid>.json. /metrics summiert
+# alle Dateien. Beendete Worker werden vom Master in archive.json übernommen
+# (gunicorn_config.child_exit), damit Zähler beim Recycling nicht zurückspringen.
+# Ohne METRICS_DIR (z.B. `python app.py`) zählt nur der eigene Prozess.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRICS_FLUSH_INTERVAL = 5.0
+ARCHIVE_NAME = 'archive.json'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Name → (Typ, Hilfetext, Buckets bei Histogrammen)
+METRICS = {
+    'sportoase_http_request_duration_seconds': (
+        'histogram', 'Dauer der Requests nach Route', LATENCY_BUCKETS),
+    'sportoase_sql_statements_per_request': (
+        'histogram', 'SQL-Statements pro Request nach Route', SQL_COUNT_BUCKETS),
+    'sportoase_sql_statements_total': (
+        'counter', 'SQL-Statements nach Route', None),
+    'sportoase_sql_duration_seconds_total': (
+        'counter', 'Zeit in SQL-Statements nach Route', None),
+    'sportoase_outbound_http_duration_seconds': (
+        'histogram', 'Dauer ausgehender HTTP-Aufrufe nach Dienst', LATENCY_BUCKETS),
+    'sportoase_week_grid_cache_total': (
+        'counter', 'Wochenplan-Fragmentcache nach Ergebnis', None),
+    'sportoase_log_records_dropped_total': (
+        'counter', 'Verworfene Log-Records (Queue voll)', None),
+    'sportoase_worker_memory_restarts_total': (
+        'counter', 'Worker-Neustarts wegen Überschreitung von WORKER_MAX_RSS_MB', None),
+    'sportoase_slow_requests_total': (
+        'counter', 'Requests über WATCHDOG_SECONDS nach Route', None),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) → Wert
+_histograms = {}  # (name, labels) → [Zähler je Bucket..., +Inf, Summe]
+_state = {'pid': None, 'last_flush': 0.0}
+
+# SQL-Statistik des laufenden Requests (pro Thread bzw. Greenlet)
+_request_stats = contextvars.ContextVar('metrics_request_stats', default=None)
+
+
+def _metrics_dir():
+    return os.environ.get('METRICS_DIR', '').strip() or None
+
+
+def _ensure_process():
+    """Nach fork() nicht die Werte des Masters weiterzählen"""
+    if _state['pid'] != os.getpid():
+        _counters.clear()
+        _histograms.clear()
+        _state.update(pid=os.getpid(), last_flush=time.monotonic())
+
+
+def _labels(**labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc_counter(name, value=1, **labels):
+    with _lock:
+        _ensure_process()
+        key = (name, _labels(**labels))
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    buckets = METRICS[name][2]
+    with _lock:
+        _ensure_process()
+        key = (name, _labels(**labels))
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(buckets) + 2)
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        else:
+            series[len(buckets)] += 1
+        series[-1] += value
+
+
+@contextmanager
+def track_outbound(service):
+    """Misst einen ausgehenden HTTP-Aufruf (outcome=error bei Exception), mit Span bei aktivem Trace"""
+    from tracing import KIND_HTTP, span
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        with span(f"http {service}", KIND_HTTP, service=service):
+            yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        observe('sportoase_outbound_http_duration_seconds', time.perf_counter() - started,
+                service=service, outcome=outcome)
+
+
+# ----------------------------------------------------------------------------
+# Snapshot, Multiprozess-Dateien und Ausgabe
+# ----------------------------------------------------------------------------
+
+def snapshot():
+    """Stand dieses Prozesses als JSON-serialisierbares Dict"""
+    with _lock:
+        _ensure_process()
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, labels, list(series)] for (name, labels), series in _histograms.items()],
+        }
+
+
+def _merge(total, data):
+    """Addiert einen Snapshot in total ({(name, labels): Wert bzw. Liste})"""
+    for name, labels, value in data.get('counters', []):
+        key = ('c', name, tuple(map(tuple, labels)))
+        total[key] = total.get(key, 0) + value
+    for name, labels, series in data.get('histograms', []):
+        key = ('h', name, tuple(map(tuple, labels)))
+        current = total.get(key)
+        if current is None or len(current) != len(series):
+            total[key] = list(series)
+        else:
+            total[key] = [a + b for a, b in zip(current, series)]
+    return total
+
+
+def _to_snapshot(total):
+    return {
+        'counters': [[name, [list(pair) for pair in labels], value]
+                     for (kind, name, labels), value in total.items() if kind == 'c'],
+        'histograms': [[name, [list(pair) for pair in labels], series]
+                       for (kind, name, labels), series in total.items() if kind == 'h'],
+    }
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def flush(force=False):
+    """Schreibt den Stand dieses Workers nach METRICS_DIR/<pid>.json"""
+    directory = _metrics_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _state['last_flush'] < METRICS_FLUSH_INTERVAL:
+        return
+    _state['last_flush'] = now
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write(os.path.join(directory, f'{os.getpid()}.json'), snapshot())
+    except OSError as e:
+        logger.warning(f"Metriken konnten nicht geschrieben werden: {e}")
+
+
+def archive_worker(pid):
+    """Übernimmt die Datei eines beendeten Workers in archive.json (im Master)"""
+    directory = _metrics_dir()
+    if not directory:
+        return
+    path = os.path.join(directory, f'{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive_path = os.path.join(directory, ARCHIVE_NAME)
+    total = _merge(_merge({}, _read(archive_path)), _read(path))
+    try:
+        _write(archive_path, _to_snapshot(total))
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Metriken von Worker {pid} nicht archiviert: {e}")
+
+
+def reset_metrics_dir():
+    """Leert METRICS_DIR beim Start des Masters"""
+    directory = _metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith('.json') or name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def collect():
+    """Summe über alle Worker (bzw. nur diesen Prozess ohne METRICS_DIR)"""
+    total = _merge({}, snapshot())
+    directory = _metrics_dir()
+    if directory and os.path.isdir(directory):
+        own_file = f'{os.getpid()}.json'
+        for name in os.listdir(directory):
+            if name.endswith('.json') and name != own_file:
+                _merge(total, _read(os.path.join(directory, name)))
+    return total
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render_metrics():
+    """Alle Metriken im Prometheus-Textformat"""
+    total = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (_, metric, labels), value in total.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", str(bound))])} {cumulative}')
+            cumulative += value[len(buckets)]
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_token_valid(authorization):
+    """Bearer-Token für Prometheus-Scraper (METRICS_TOKEN), sonst nur Admin-Login"""
+    token = os.environ.get('METRICS_TOKEN', '').strip()
+    if not token or not authorization:
+        return False
+    import hmac
+    return hmac.compare_digest(authorization.strip(), f'Bearer {token}')
+
+
+# ----------------------------------------------------------------------------
+# Flask- und SQLAlchemy-Hooks
+# ----------------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats['sql_count'] += 1
+        stats['sql_time'] += elapsed
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get('metrics_query_start') if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def _endpoint():
+    if not has_request_context():
+        return 'none'
+    # Unbekannte URLs (404) unter einem Namen, sonst wächst die Zahl der Serien
+    return request.endpoint or 'unmatched'
+
+
+def init_metrics(app):
+    """Registriert Request- und SQL-Hooks"""
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def metrics_start_request():
+        _request_stats.set({'started': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0, 'status': 500})
+
+    @app.after_request
+    def metrics_record_status(response):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats['status'] = response.status_code
+        return response
+
+    @app.teardown_request
+    def metrics_finish_request(exc):
+        stats = _request_stats.get()
+        if stats is None:
+            return
+        _request_stats.set(None)
+        endpoint = _endpoint()
+        observe('sportoase_http_request_duration_seconds', time.perf_counter() - stats['started'],
+                endpoint=endpoint, method=request.method, status=stats['status'])
+        observe('sportoase_sql_statements_per_request', stats['sql_count'], endpoint=endpoint)
+        if stats['sql_count']:
+            inc_counter('sportoase_sql_statements_total', stats['sql_count'], endpoint=endpoint)
+            inc_counter('sportoase_sql_duration_seconds_total', stats['sql_time'], endpoint=endpoint)
+        flush()
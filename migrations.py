@@ -0,0 +1,335 @@
+# Versionierte Schema-Migrationen für die SportOase-Datenbank
+#
+# db.create_all() legt nur fehlende Tabellen an, ändert aber bestehende nicht.
+# Neue Spalten und Indizes kommen deshalb als nummerierte Migration hierher.
+#
+# Regeln für neue Migrationen:
+#   - Versionen fortlaufend vergeben, nie eine bestehende Migration ändern
+#   - Jede Migration muss idempotent sein (IF NOT EXISTS), da sie nach einem
+#     Abbruch erneut laufen kann
+#   - Große Tabellen nur über batched_backfill() aktualisieren
+#   - Indizes nur über create_index() anlegen (CONCURRENTLY auf PostgreSQL)
+#   - Neue Spalten nullable anlegen (ohne Table-Rewrite), Werte per Backfill setzen
+#
+# Ausführen:
+#   python migrations.py            # ausstehende Migrationen anwenden
+#   python migrations.py --status   # nur anzeigen
+
+import logging
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from server_profile import env_bool
+
+logger = logging.getLogger(__name__)
+
+# Schlüssel für pg_advisory_lock, damit nur ein Prozess gleichzeitig migriert
+MIGRATION_LOCK_KEY = 7320451
+
+# Maximale Wartezeit auf Tabellen-Locks bei DDL; danach lieber abbrechen als
+# alle laufenden Requests hinter dem ALTER TABLE zu blockieren
+DDL_LOCK_TIMEOUT = '5s'
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Decorator: registriert eine Migration mit Versionsnummer"""
+    def decorator(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def latest_version():
+    """Höchste bekannte Migrationsversion"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+# ---------------------------------------------------------------------------
+# Hilfsfunktionen für Migrationen
+# ---------------------------------------------------------------------------
+
+def is_postgres(engine):
+    """True, wenn die Engine auf PostgreSQL zeigt"""
+    return engine.dialect.name == 'postgresql'
+
+
+def column_exists(conn, table, column):
+    """Prüft, ob eine Spalte existiert"""
+    if conn.dialect.name == 'postgresql':
+        return conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+        ), {'table': table, 'column': column}).first() is not None
+    rows = conn.execute(text(f'PRAGMA table_info("{table}")')).fetchall()
+    return any(row[1] == column for row in rows)
+
+
+def add_column(engine, table, column, ddl_type, default_sql=None):
+    """
+    Fügt eine nullable Spalte hinzu (nur Katalog-Änderung, kein Table-Rewrite).
+
+    Ein Default gilt danach nur für neue Zeilen; bestehende Zeilen werden
+    über batched_backfill() nachgezogen.
+    """
+    with engine.begin() as conn:
+        if column_exists(conn, table, column):
+            return False
+        if is_postgres(engine):
+            conn.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}'))
+            if default_sql is not None:
+                conn.execute(text(f'ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT {default_sql}'))
+        else:
+            # SQLite kennt kein ALTER COLUMN, der Default muss beim Anlegen gesetzt werden
+            default = f' DEFAULT {default_sql}' if default_sql is not None else ''
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}{default}'))
+    logger.info(f"Spalte {table}.{column} angelegt")
+    return True
+
+
+def create_index(engine, name, table, columns):
+    """
+    Legt einen Index an, ohne Schreibzugriffe zu blockieren.
+
+    PostgreSQL: CREATE INDEX CONCURRENTLY (außerhalb einer Transaktion).
+    Ein ungültiger Index aus einem abgebrochenen Lauf wird vorher entfernt.
+    """
+    column_list = ', '.join(columns)
+    if not is_postgres(engine):
+        with engine.begin() as conn:
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column_list})'))
+        return
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {'name': name}).first()
+        if invalid:
+            logger.warning(f"Ungültiger Index {name} aus früherem Lauf wird entfernt")
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+        conn.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column_list})'))
+    logger.info(f"Index {name} auf {table} ({column_list}) angelegt")
+
+
+def batched_backfill(engine, table, set_sql, where_sql, batch_size=1000, pause=0.05, params=None):
+    """
+    Aktualisiert eine Tabelle in Blöcken über Primärschlüssel-Bereiche.
+
+    Jeder Block läuft in einer eigenen kurzen Transaktion, sodass Zeilen-Locks
+    nur für batch_size Zeilen gehalten werden. Zwischen den Blöcken wird
+    pause Sekunden gewartet, um Replikation und Autovacuum Luft zu lassen.
+
+    Args:
+        table: Tabellenname (mit Integer-Primärschlüssel 'id')
+        set_sql: SET-Teil, z.B. "icon = '🔧'"
+        where_sql: Bedingung für betroffene Zeilen, z.B. "icon IS NULL"
+
+    Returns:
+        Anzahl aktualisierter Zeilen
+    """
+    with engine.connect() as conn:
+        bounds = conn.execute(text(f'SELECT MIN(id), MAX(id) FROM {table} WHERE {where_sql}'),
+                              params or {}).first()
+    if bounds is None or bounds[0] is None:
+        return 0
+
+    low, high = bounds
+    total = 0
+    start = low
+    while start <= high:
+        end = start + batch_size
+        with engine.begin() as conn:
+            result = conn.execute(
+                text(f'UPDATE {table} SET {set_sql} WHERE id >= :start AND id < :end AND ({where_sql})'),
+                dict(params or {}, start=start, end=end)
+            )
+            total += result.rowcount or 0
+        start = end
+        if pause and start <= high:
+            time.sleep(pause)
+    logger.info(f"{total} Zeilen in {table} aktualisiert")
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Migrationen
+# ---------------------------------------------------------------------------
+
+@migration(1, 'Basistabellen anlegen')
+def create_base_tables(engine):
+    """Legt fehlende Tabellen an (bestehende bleiben unverändert)"""
+    from database import db
+    import models  # noqa: F401 - registriert alle Modelle in db.metadata
+    db.metadata.create_all(engine, checkfirst=True)
+
+
+@migration(2, 'blocked_slots.icon')
+def add_blocked_slot_icon(engine):
+    """Spalte icon für gesperrte Slots (fehlte in Produktion)"""
+    add_column(engine, 'blocked_slots', 'icon', 'VARCHAR(10)', default_sql="'🔧'")
+    batched_backfill(engine, 'blocked_slots', 'icon = :icon', 'icon IS NULL', params={'icon': '🔧'})
+
+
+@migration(3, 'Index bookings(date, period)')
+def index_bookings_date_period(engine):
+    """Slot-Belegung und Wochenansicht filtern nach Datum und Stunde"""
+    create_index(engine, 'ix_bookings_date_period', 'bookings', ['date', 'period'])
+
+
+@migration(4, 'Index bookings(teacher_id, date)')
+def index_bookings_teacher_date(engine):
+    """Meine Buchungen: alle Buchungen einer Lehrkraft nach Datum"""
+    create_index(engine, 'ix_bookings_teacher_id_date', 'bookings', ['teacher_id', 'date'])
+
+
+@migration(5, 'Index notifications(recipient_role, is_read, created_at)')
+def index_notifications_unread(engine):
+    """Ungelesene Benachrichtigungen (Zähler und Polling im Admin-Header)"""
+    create_index(engine, 'ix_notifications_role_read_created', 'notifications',
+                 ['recipient_role', 'is_read', 'created_at'])
+
+
+@migration(6, 'Archivtabellen für abgeschlossene Schuljahre')
+def create_archive_tables(engine):
+    """bookings_archive, blocked_slots_archive, notifications_archive (archive.py)"""
+    from database import db
+    from models import BookingArchive, BlockedSlotArchive, NotificationArchive
+    db.metadata.create_all(engine, checkfirst=True, tables=[
+        BookingArchive.__table__, BlockedSlotArchive.__table__, NotificationArchive.__table__,
+    ])
+
+
+@migration(7, 'Tabellen für die Auslastungsstatistik')
+def create_rollup_tables(engine):
+    """booking_rollups und rollup_runs (analytics.py); befüllt beim ersten Lauf von analytics.py"""
+    from database import db
+    from models import BookingRollup, RollupRun
+    db.metadata.create_all(engine, checkfirst=True, tables=[BookingRollup.__table__, RollupRun.__table__])
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _ensure_version_table(engine):
+    """Legt die Tabelle schema_migrations an, falls sie fehlt"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR(200) NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+
+
+def get_schema_version(engine):
+    """
+    Liest die aktuelle Schema-Version mit einer einzigen Query.
+
+    Returns:
+        Versionsnummer (0, wenn noch keine Migration gelaufen ist)
+    """
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text('SELECT MAX(version) FROM schema_migrations')).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        return 0
+
+
+def pending_migrations(engine):
+    """Liste der noch nicht angewendeten Migrationen"""
+    current = get_schema_version(engine)
+    return [m for m in MIGRATIONS if m[0] > current]
+
+
+def run_migrations(engine):
+    """
+    Wendet alle ausstehenden Migrationen der Reihe nach an.
+
+    Auf PostgreSQL sorgt ein Advisory-Lock dafür, dass parallel startende
+    Prozesse nicht gleichzeitig migrieren.
+
+    Returns:
+        Anzahl angewendeter Migrationen
+    """
+    lock_conn = None
+    if is_postgres(engine):
+        lock_conn = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        lock_conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+
+    try:
+        _ensure_version_table(engine)
+        applied = 0
+        # Nach dem Lock neu lesen - ein anderer Prozess kann schon migriert haben
+        for version, name, func in pending_migrations(engine):
+            logger.info(f"Migration {version}: {name}")
+            started = time.perf_counter()
+            func(engine)
+            with engine.begin() as conn:
+                conn.execute(text('INSERT INTO schema_migrations (version, name) VALUES (:version, :name)'),
+                             {'version': version, 'name': name})
+            logger.info(f"Migration {version} abgeschlossen ({time.perf_counter() - started:.1f}s)")
+            applied += 1
+        return applied
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': MIGRATION_LOCK_KEY})
+            lock_conn.close()
+
+
+def check_schema_version(app):
+    """
+    Startprüfung: vergleicht die Schema-Version der Datenbank mit dem Code.
+
+    Kostet eine Query. Mit DB_AUTO_MIGRATE=1 werden fehlende Migrationen
+    direkt angewendet, sonst wird nur gewarnt.
+    """
+    from database import db
+
+    try:
+        with app.app_context():
+            engine = db.engine
+            current = get_schema_version(engine)
+            if current >= latest_version():
+                return current
+
+            missing = [f"{v} ({n})" for v, n, _ in MIGRATIONS if v > current]
+            if env_bool('DB_AUTO_MIGRATE', False):
+                logger.info(f"Schema-Version {current}, wende an: {', '.join(missing)}")
+                run_migrations(engine)
+                return latest_version()
+
+            logger.warning(
+                f"Datenbank-Schema veraltet (Version {current}, erwartet {latest_version()}), "
+                f"ausstehend: {', '.join(missing)}. Bitte 'python migrations.py' ausführen "
+                f"oder DB_AUTO_MIGRATE=1 setzen",
+                extra={'schema_version': current, 'expected_version': latest_version()},
+            )
+            return current
+    except Exception as e:
+        logger.error(f"Schema-Prüfung fehlgeschlagen: {e}")
+        return None
+
+
+if __name__ == '__main__':
+    # Ohne app.py: kein SESSION_SECRET nötig und keine Schema-Prüfung beim
+    # Import, die vor der Migration schon "Schema veraltet" meldet
+    from database import create_cli_app, db
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    with create_cli_app().app_context():
+        if '--status' in sys.argv:
+            current = get_schema_version(db.engine)
+            print(f"Schema-Version: {current} (Code: {latest_version()})")
+            for version, name, _ in MIGRATIONS:
+                print(f"  {'✓' if version <= current else ' '} {version:>3}  {name}")
+        else:
+            count = run_migrations(db.engine)
+            print(f"{count} Migration(en) angewendet" if count else "Schema ist aktuell")
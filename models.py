@@ -4,7 +4,11 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import json
+import logging
 from database import db
+from tracing import traced
+
+logger = logging.getLogger(__name__)
 
 class User(db.Model):
     """Benutzer-Modell für Lehrkräfte und Admins"""
@@ -58,6 +62,12 @@ class Booking(db.Model):
     
     notifications = db.relationship('Notification', back_populates='booking', cascade='all, delete-orphan', passive_deletes=True)
     
+    # Bestehende Datenbanken erhalten die Indizes über migrations.py
+    __table_args__ = (
+        db.Index('ix_bookings_date_period', 'date', 'period'),
+        db.Index('ix_bookings_teacher_id_date', 'teacher_id', 'date'),
+    )
+    
     def to_dict(self):
         """Konvertiert Booking zu Dictionary für Kompatibilität"""
         return {
@@ -147,6 +157,11 @@ class Notification(db.Model):
     
     booking = db.relationship('Booking', back_populates='notifications')
     
+    # Bestehende Datenbanken erhalten den Index über migrations.py
+    __table_args__ = (
+        db.Index('ix_notifications_role_read_created', 'recipient_role', 'is_read', 'created_at'),
+    )
+    
     def to_dict(self):
         """Konvertiert Notification zu Dictionary"""
         metadata = None
@@ -169,6 +184,108 @@ class Notification(db.Model):
             'booking': self.booking.to_dict() if self.booking else None
         }
 
+# Archiv abgeschlossener Schuljahre (archive.py verschiebt die Zeilen)
+#
+# Gleiche Spalten wie die Live-Tabellen plus school_year (Startjahr, z.B. 2025
+# für 2025/26). Die IDs bleiben erhalten; Benachrichtigungen zeigen weiter auf
+# die ID der archivierten Buchung.
+
+class BookingArchive(db.Model):
+    """Buchungen abgeschlossener Schuljahre (nur lesend)"""
+    __tablename__ = 'bookings_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    school_year = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.String(10), nullable=False)
+    weekday = db.Column(db.String(3), nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    teacher_name = db.Column(db.String(100))
+    teacher_class = db.Column(db.String(50))
+    students_json = db.Column(db.Text, nullable=False)
+    offer_type = db.Column(db.String(10), nullable=False)
+    offer_label = db.Column(db.String(100), nullable=False)
+    calendar_event_id = db.Column(db.String(200), nullable=True)
+    notes = db.Column(db.Text, nullable=True)
+    is_exclusive = db.Column(db.Boolean, default=False, nullable=False)
+    is_approved = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    
+    teacher = db.relationship('User')
+    
+    __table_args__ = (
+        db.Index('ix_bookings_archive_year_date', 'school_year', 'date'),
+        db.Index('ix_bookings_archive_teacher_id_date', 'teacher_id', 'date'),
+    )
+    
+    def to_dict(self):
+        """Wie Booking.to_dict, markiert als archiviert"""
+        return dict(Booking.to_dict(self), archived=True, school_year=self.school_year)
+
+class BlockedSlotArchive(db.Model):
+    """Gesperrte Slots abgeschlossener Schuljahre (nur lesend)"""
+    __tablename__ = 'blocked_slots_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    school_year = db.Column(db.Integer, nullable=False, index=True)
+    date = db.Column(db.String(10), nullable=False)
+    weekday = db.Column(db.String(3), nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(200))
+    icon = db.Column(db.String(10))
+    blocked_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    
+    def to_dict(self):
+        """Wie BlockedSlot.to_dict, markiert als archiviert"""
+        return dict(BlockedSlot.to_dict(self), archived=True, school_year=self.school_year)
+
+class NotificationArchive(db.Model):
+    """Benachrichtigungen zu archivierten Buchungen (nur lesend)"""
+    __tablename__ = 'notifications_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    school_year = db.Column(db.Integer, nullable=False, index=True)
+    booking_id = db.Column(db.Integer, nullable=False, index=True)
+    recipient_role = db.Column(db.String(20), nullable=False)
+    notification_type = db.Column(db.String(50), nullable=False)
+    message = db.Column(db.String(500), nullable=False)
+    is_read = db.Column(db.Boolean, nullable=False)
+    read_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    metadata_json = db.Column(db.Text, nullable=True)
+
+# Vorberechnete Auslastung (analytics.py, /admin/analytics)
+#
+# Eine Zeile pro (Datum, Stunde, Lehrkraft, Angebot, Klasse der Schüler*innen).
+# Enthält auch archivierte Schuljahre; die Archivierung lässt die Zeilen stehen.
+
+class BookingRollup(db.Model):
+    """Schüler*innen und Buchungen pro Slot, Lehrkraft, Angebot und Klasse"""
+    __tablename__ = 'booking_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.String(10), nullable=False, index=True)
+    period = db.Column(db.Integer, nullable=False)
+    teacher_id = db.Column(db.Integer, nullable=True)
+    offer_type = db.Column(db.String(10), nullable=False)
+    offer_label = db.Column(db.String(100), nullable=False)
+    student_class = db.Column(db.String(50), nullable=False)
+    students = db.Column(db.Integer, nullable=False)
+    # Jede Buchung zählt nur in der Zeile der Klasse ihrer ersten Schüler*in
+    bookings = db.Column(db.Integer, nullable=False)
+
+class RollupRun(db.Model):
+    """Protokoll der Neuberechnungen von booking_rollups"""
+    __tablename__ = 'rollup_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    first_day = db.Column(db.String(10), nullable=False)
+    last_day = db.Column(db.String(10), nullable=False)
+    rows = db.Column(db.Integer, nullable=False)
+    duration_ms = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
 # Hilfsfunktionen für Kompatibilität mit dem alten Code
 
 def create_user(username, password, role, email=None):
@@ -181,7 +298,7 @@ def create_user(username, password, role, email=None):
         return user.id
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Erstellen des Benutzers: {e}")
+        logger.error(f"Fehler beim Erstellen des Benutzers: {e}")
         return None
 
 def get_user_by_username(username):
@@ -203,7 +320,7 @@ def get_or_create_oauth_user(email, username, oauth_provider, oauth_id, role='te
         if user:
             # Benutzer existiert, aktualisiere Rolle falls nötig
             user.role = role
-            print(f"✅ Benutzer gefunden und aktualisiert: {email} (ID: {user.id}, Rolle: {role})")
+            logger.info("OAuth-Benutzer aktualisiert", extra={'email': email, 'account_id': user.id, 'role': role})
         else:
             # Neuen Benutzer erstellen mit Dummy-Passwort-Hash (für OAuth-Benutzer)
             user = User(
@@ -214,18 +331,16 @@ def get_or_create_oauth_user(email, username, oauth_provider, oauth_id, role='te
             # Setze einen Dummy-Hash für OAuth-Benutzer (wird nie verwendet)
             user.password_hash = generate_password_hash('oauth_user_no_password')
             db.session.add(user)
-            print(f"✅ Neuer Benutzer erstellt: {email} (Rolle: {role})")
+            logger.info("OAuth-Benutzer angelegt", extra={'email': email, 'role': role})
         
         db.session.commit()
         return user.to_dict()
     except Exception as e:
         db.session.rollback()
-        print(f"❌ FEHLER beim Erstellen/Aktualisieren des Benutzers: {e}")
-        print(f"   E-Mail: {email}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Fehler beim Erstellen/Aktualisieren des Benutzers: {e}", extra={'email': email})
         return None
 
+@traced()
 def get_user_by_id(user_id):
     """Sucht einen Benutzer anhand der ID"""
     user = User.query.get(user_id)
@@ -251,7 +366,7 @@ def change_user_password(user_id, old_password, new_password):
         return {'success': True, 'message': 'Passwort erfolgreich geändert'}
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Ändern des Passworts: {e}")
+        logger.error(f"Fehler beim Ändern des Passworts: {e}")
         return {'success': False, 'error': 'Fehler beim Ändern des Passworts'}
 
 def get_all_users():
@@ -259,6 +374,7 @@ def get_all_users():
     users = User.query.order_by(User.role, User.username).all()
     return [u.to_dict() for u in users]
 
+@traced()
 def create_booking(date, weekday, period, teacher_id, students, offer_type, offer_label, teacher_name=None, teacher_class=None, calendar_event_id=None, notes=None, is_exclusive=False):
     """Erstellt eine neue Buchung in der Datenbank"""
     try:
@@ -284,7 +400,7 @@ def create_booking(date, weekday, period, teacher_id, students, offer_type, offe
         return booking.id
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Erstellen der Buchung: {e}")
+        logger.error(f"Fehler beim Erstellen der Buchung: {e}")
         return None
 
 def get_bookings_for_date_period(date, period):
@@ -292,6 +408,7 @@ def get_bookings_for_date_period(date, period):
     bookings = Booking.query.filter_by(date=date, period=period).order_by(Booking.created_at).all()
     return [b.to_dict() for b in bookings]
 
+@traced()
 def count_students_for_period(date, period):
     """Zählt die Gesamtzahl der Schüler für eine bestimmte Stunde"""
     bookings = get_bookings_for_date_period(date, period)
@@ -301,6 +418,7 @@ def count_students_for_period(date, period):
         total += len(students)
     return total
 
+@traced()
 def check_student_double_booking(student_name, student_class, date, period, exclude_booking_id=None):
     """
     Prüft, ob ein Schüler bereits für dieses Datum und diese Stunde gebucht ist.
@@ -336,21 +454,71 @@ def check_student_double_booking(student_name, student_class, date, period, excl
     
     return {'is_booked': False, 'booking_info': None}
 
-def get_all_bookings():
-    """Gibt alle Buchungen zurück (für Admin-Ansicht)"""
-    bookings = Booking.query.order_by(Booking.date.desc(), Booking.period).all()
-    return [b.to_dict() for b in bookings]
-
-def get_bookings_by_date(date):
-    """Gibt alle Buchungen für ein bestimmtes Datum zurück"""
-    bookings = Booking.query.filter_by(date=date).order_by(Booking.period).all()
-    return [b.to_dict() for b in bookings]
+def _with_archive(live, archive_query, order):
+    """Hängt archivierte Zeilen an; sie liegen vor dem laufenden Schuljahr und folgen daher den Live-Zeilen"""
+    return live + [a.to_dict() for a in archive_query.order_by(*order).all()]
+
+def get_all_bookings(include_archive=False):
+    """Gibt alle Buchungen des laufenden Bestands zurück (für Admin-Ansicht), optional mit Archiv"""
+    bookings = [b.to_dict() for b in Booking.query.order_by(Booking.date.desc(), Booking.period).all()]
+    if include_archive:
+        bookings = _with_archive(bookings, BookingArchive.query,
+                                 (BookingArchive.date.desc(), BookingArchive.period))
+    return bookings
+
+def get_bookings_by_date(date, include_archive=False):
+    """Gibt alle Buchungen für ein bestimmtes Datum zurück, optional mit Archiv"""
+    bookings = [b.to_dict() for b in Booking.query.filter_by(date=date).order_by(Booking.period).all()]
+    if include_archive:
+        bookings = _with_archive(bookings, BookingArchive.query.filter_by(date=date),
+                                 (BookingArchive.period,))
+    return bookings
+
+def get_bookings_for_teacher(teacher_id, include_archive=False):
+    """Buchungen einer Lehrkraft (neueste zuerst), optional mit Archiv"""
+    bookings = [b.to_dict() for b in Booking.query.filter_by(teacher_id=teacher_id)
+                .order_by(Booking.date.desc(), Booking.period).all()]
+    if include_archive:
+        bookings = _with_archive(bookings, BookingArchive.query.filter_by(teacher_id=teacher_id),
+                                 (BookingArchive.date.desc(), BookingArchive.period))
+    return bookings
 
 def get_bookings_for_week(start_date, end_date):
     """Gibt alle Buchungen für eine Woche zurück"""
     bookings = Booking.query.filter(Booking.date >= start_date, Booking.date <= end_date).order_by(Booking.date, Booking.period).all()
     return [b.to_dict() for b in bookings]
 
+def get_week_grid_data(start_date, end_date):
+    """
+    Lädt alles, was der Wochenplan braucht, mit drei schlanken Queries
+    (ohne Lehrkraft-Lookup pro Buchung wie in to_dict).
+
+    Returns:
+        Dict mit 'bookings' und 'blocked' (Listen von Dicts) sowie
+        'slot_names' ({(weekday, period): label})
+    """
+    booking_rows = db.session.query(
+        Booking.id, Booking.date, Booking.period, Booking.teacher_id,
+        Booking.teacher_name, Booking.teacher_class, Booking.students_json,
+        Booking.offer_label, Booking.is_exclusive, Booking.is_approved
+    ).filter(
+        Booking.date >= start_date, Booking.date <= end_date
+    ).order_by(Booking.date, Booking.period, Booking.id).all()
+
+    blocked_rows = db.session.query(
+        BlockedSlot.id, BlockedSlot.date, BlockedSlot.period, BlockedSlot.reason, BlockedSlot.icon
+    ).filter(
+        BlockedSlot.date >= start_date, BlockedSlot.date <= end_date
+    ).order_by(BlockedSlot.date, BlockedSlot.period).all()
+
+    slot_name_rows = db.session.query(SlotName.weekday, SlotName.period, SlotName.label).all()
+
+    return {
+        'bookings': [dict(row._mapping) for row in booking_rows],
+        'blocked': [dict(row._mapping, icon=row.icon or '🔧') for row in blocked_rows],
+        'slot_names': {(row.weekday, row.period): row.label for row in slot_name_rows},
+    }
+
 def get_booking_by_id(booking_id):
     """Gibt eine einzelne Buchung anhand der ID zurück"""
     booking = Booking.query.get(booking_id)
@@ -386,7 +554,7 @@ def approve_exclusive_booking(booking_id):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Genehmigen der Buchung: {e}")
+        logger.error(f"Fehler beim Genehmigen der Buchung: {e}")
         return False
 
 def reject_exclusive_booking(booking_id):
@@ -415,7 +583,7 @@ def update_booking(booking_id, date, weekday, period, teacher_id, students, offe
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Aktualisieren der Buchung: {e}")
+        logger.error(f"Fehler beim Aktualisieren der Buchung: {e}")
         return False
 
 def delete_booking(booking_id, delete_calendar_event_callback=None):
@@ -430,14 +598,14 @@ def delete_booking(booking_id, delete_calendar_event_callback=None):
             try:
                 delete_calendar_event_callback(booking.calendar_event_id)
             except Exception as e:
-                print(f"Warnung: Calendar Eintrag konnte nicht gelöscht werden: {e}")
+                logger.warning(f"Calendar-Eintrag konnte nicht gelöscht werden: {e}")
         
         db.session.delete(booking)
         db.session.commit()
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Löschen der Buchung: {e}")
+        logger.error(f"Fehler beim Löschen der Buchung: {e}")
         return False
 
 def get_custom_slot_name(weekday, period):
@@ -459,7 +627,7 @@ def update_slot_name(weekday, period, label):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Aktualisieren des Slot-Namens: {e}")
+        logger.error(f"Fehler beim Aktualisieren des Slot-Namens: {e}")
         return False
 
 def get_all_custom_slot_names():
@@ -467,11 +635,13 @@ def get_all_custom_slot_names():
     slots = SlotName.query.all()
     return [s.to_dict() for s in slots]
 
+@traced()
 def is_slot_blocked(date, period):
     """Prüft, ob ein Slot für ein bestimmtes Datum und Stunde blockiert ist"""
     blocked = BlockedSlot.query.filter_by(date=date, period=period).first()
     return blocked is not None
 
+@traced()
 def get_blocked_slot(date, period):
     """Gibt den blockierten Slot zurück, falls vorhanden"""
     blocked = BlockedSlot.query.filter_by(date=date, period=period).first()
@@ -497,7 +667,7 @@ def block_slot(date, weekday, period, admin_id, reason='Beratung', icon='🔧'):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Blockieren des Slots: {e}")
+        logger.error(f"Fehler beim Blockieren des Slots: {e}")
         return False
 
 def unblock_slot(date, period):
@@ -512,7 +682,7 @@ def unblock_slot(date, period):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Freigeben des Slots: {e}")
+        logger.error(f"Fehler beim Freigeben des Slots: {e}")
         return False
 
 def get_blocked_slots_for_date(date):
@@ -525,10 +695,13 @@ def get_blocked_slots_for_week(start_date, end_date):
     blocked_slots = BlockedSlot.query.filter(BlockedSlot.date >= start_date, BlockedSlot.date <= end_date).all()
     return [b.to_dict() for b in blocked_slots]
 
-def get_all_blocked_slots():
-    """Gibt alle blockierten Slots zurück (für Admin-Ansicht)"""
-    blocked_slots = BlockedSlot.query.order_by(BlockedSlot.date.desc(), BlockedSlot.period).all()
-    return [b.to_dict() for b in blocked_slots]
+def get_all_blocked_slots(include_archive=False):
+    """Gibt alle blockierten Slots zurück (für Admin-Ansicht), optional mit Archiv"""
+    blocked_slots = [b.to_dict() for b in BlockedSlot.query.order_by(BlockedSlot.date.desc(), BlockedSlot.period).all()]
+    if include_archive:
+        blocked_slots = _with_archive(blocked_slots, BlockedSlotArchive.query,
+                                      (BlockedSlotArchive.date.desc(), BlockedSlotArchive.period))
+    return blocked_slots
 
 def bulk_block_slots(start_date, end_date, admin_id, reason='Ferien', periods=None, icon=None):
     """
@@ -596,7 +769,7 @@ def bulk_block_slots(start_date, end_date, admin_id, reason='Ferien', periods=No
         return {'success': True, 'blocked_count': blocked_count, 'skipped_count': skipped_count}
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Bulk-Blockieren: {e}")
+        logger.error(f"Fehler beim Bulk-Blockieren: {e}")
         return {'success': False, 'error': str(e), 'blocked_count': 0, 'skipped_count': 0}
 
 def bulk_unblock_slots(start_date, end_date, periods=None):
@@ -630,9 +803,10 @@ def bulk_unblock_slots(start_date, end_date, periods=None):
         return {'success': True, 'unblocked_count': unblocked_count}
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Bulk-Freigeben: {e}")
+        logger.error(f"Fehler beim Bulk-Freigeben: {e}")
         return {'success': False, 'error': str(e), 'unblocked_count': 0}
 
+@traced()
 def create_notification(booking_id, message, notification_type='new_booking', recipient_role='admin', metadata=None):
     """Erstellt eine neue Benachrichtigung"""
     try:
@@ -651,7 +825,7 @@ def create_notification(booking_id, message, notification_type='new_booking', re
         return notification.id
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Erstellen der Benachrichtigung: {e}")
+        logger.error(f"Fehler beim Erstellen der Benachrichtigung: {e}")
         return None
 
 def get_unread_notifications(recipient_role='admin'):
@@ -676,7 +850,7 @@ def mark_notification_as_read(notification_id):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Markieren der Benachrichtigung: {e}")
+        logger.error(f"Fehler beim Markieren der Benachrichtigung: {e}")
         return False
 
 def mark_all_notifications_as_read(recipient_role='admin'):
@@ -690,9 +864,10 @@ def mark_all_notifications_as_read(recipient_role='admin'):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Markieren aller Benachrichtigungen: {e}")
+        logger.error(f"Fehler beim Markieren aller Benachrichtigungen: {e}")
         return False
 
+@traced()
 def get_unread_notification_count(recipient_role='admin'):
     """Gibt die Anzahl der ungelesenen Benachrichtigungen zurück"""
     return Notification.query.filter_by(recipient_role=recipient_role, is_read=False).count()
@@ -708,5 +883,5 @@ def delete_notification(notification_id):
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Fehler beim Löschen der Benachrichtigung: {e}")
+        logger.error(f"Fehler beim Löschen der Benachrichtigung: {e}")
         return False
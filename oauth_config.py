@@ -4,7 +4,49 @@
 
 import os
 import json
-from authlib.integrations.flask_client import OAuth
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# OAuth-Client pro Worker-Prozess (wird erst beim ersten Login erzeugt).
+# Bei preload_app entsteht die App im Master; der Client soll aber nicht über
+# fork() geteilt werden, deshalb wird er an die Prozess-ID gebunden.
+_oauth_state = {'pid': None, 'oauth': None, 'client': None}
+
+
+def get_oauth_settings():
+    """Liest die IServ-Konfiguration aus den Umgebungsvariablen"""
+    client_id = os.environ.get('ISERV_CLIENT_ID', '').strip()
+    client_secret = os.environ.get('ISERV_CLIENT_SECRET', '').strip()
+    iserv_domain = os.environ.get('ISERV_DOMAIN', 'kgs-pattensen.de').strip()
+    return client_id, client_secret, iserv_domain
+
+
+def is_oauth_configured():
+    """Prüft ohne Client-Erzeugung, ob IServ OAuth konfiguriert ist"""
+    client_id, client_secret, _ = get_oauth_settings()
+    return bool(client_id and client_secret)
+
+
+def print_oauth_status():
+    """Gibt einmalig beim Start aus, ob IServ OAuth konfiguriert ist"""
+    client_id, client_secret, iserv_domain = get_oauth_settings()
+    
+    if not client_id or not client_secret:
+        missing = [name for name, value in (('ISERV_CLIENT_ID', client_id),
+                                            ('ISERV_CLIENT_SECRET', client_secret)) if not value]
+        logger.warning(
+            f"IServ OAuth ist NICHT konfiguriert - fehlend: {', '.join(missing)}. "
+            "Bitte in den Secrets/Environment Variables setzen "
+            "(Render: Dashboard → Environment, Replit: Secrets-Tab)"
+        )
+        return
+    
+    logger.info("IServ OAuth Konfiguration geladen", extra={
+        'iserv_domain': iserv_domain,
+        'client_id': f"{client_id[:8]}...{client_id[-4:] if len(client_id) > 12 else ''}",
+    })
 
 
 def init_oauth(app):
@@ -14,37 +56,17 @@ def init_oauth(app):
     Gibt (oauth, iserv_client) zurück, wobei iserv_client None ist,
     wenn die Konfiguration fehlt.
     """
+    from authlib.integrations.flask_client import OAuth
+    
     oauth = OAuth(app)
     
-    # IServ-Konfiguration aus Umgebungsvariablen
-    client_id = os.environ.get('ISERV_CLIENT_ID', '').strip()
-    client_secret = os.environ.get('ISERV_CLIENT_SECRET', '').strip()
-    iserv_domain = os.environ.get('ISERV_DOMAIN', 'kgs-pattensen.de').strip()
+    client_id, client_secret, iserv_domain = get_oauth_settings()
     
     # Prüfe ob die erforderlichen Secrets vorhanden sind
     if not client_id or not client_secret:
-        print("=" * 70)
-        print("⚠️  WARNUNG: IServ OAuth ist NICHT konfiguriert!")
-        print("   Fehlende Umgebungsvariablen:")
-        if not client_id:
-            print("   - ISERV_CLIENT_ID")
-        if not client_secret:
-            print("   - ISERV_CLIENT_SECRET")
-        print("")
-        print("   Bitte konfigurieren Sie diese in den Secrets/Environment Variables:")
-        print("   - Auf Render: Dashboard → Environment → Add Environment Variable")
-        print("   - Auf Replit: Secrets-Tab (Schloss-Symbol)")
-        print("=" * 70)
         return oauth, None
     
     iserv_base_url = f'https://{iserv_domain}'
-    
-    print("=" * 70)
-    print("✅ IServ OAuth Konfiguration geladen")
-    print(f"   Domain: {iserv_domain}")
-    print(f"   Base URL: {iserv_base_url}")
-    print(f"   Client ID: {client_id[:8]}...{client_id[-4:] if len(client_id) > 12 else ''}")
-    print("=" * 70)
 
     # Registriere IServ als OAuth-Provider
     # Scopes: openid, profile, email, roles UND groups für maximale Kompatibilität
@@ -59,10 +81,24 @@ def init_oauth(app):
         )
         return oauth, iserv
     except Exception as e:
-        print(f"❌ Fehler bei OAuth-Registrierung: {e}")
+        logger.error(f"Fehler bei OAuth-Registrierung: {e}")
         return oauth, None
 
 
+def get_iserv_client(app):
+    """
+    Gibt den IServ-OAuth-Client des aktuellen Worker-Prozesses zurück.
+    
+    Der Client wird beim ersten Aufruf pro Prozess erzeugt (lazy), damit
+    Worker nach fork() keine Verbindungen oder Caches des Masters erben.
+    """
+    pid = os.getpid()
+    if _oauth_state['pid'] != pid:
+        _oauth_state['oauth'], _oauth_state['client'] = init_oauth(app)
+        _oauth_state['pid'] = pid
+    return _oauth_state['client']
+
+
 def get_admin_email():
     """Gibt die E-Mail-Adresse des Admin-Benutzers zurück"""
     return os.environ.get('ADMIN_EMAIL', 'morelli.maurizio@kgs-pattensen.de')
@@ -91,7 +127,7 @@ def extract_roles_from_userinfo(userinfo):
     
     if 'roles' in userinfo:
         roles_data = userinfo['roles']
-        print(f"   📋 Raw 'roles' data: {roles_data}")
+        logger.debug(f"Raw 'roles' data: {roles_data}")
         
         if isinstance(roles_data, list):
             for role_item in roles_data:
@@ -100,26 +136,26 @@ def extract_roles_from_userinfo(userinfo):
                     if 'displayName' in role_item and isinstance(role_item['displayName'], str):
                         display_name = role_item['displayName'].lower().strip()
                         roles.append(display_name)
-                        print(f"   ✓ Rolle (displayName): {role_item['displayName']}")
+                        logger.debug(f"Rolle (displayName): {role_item['displayName']}")
                     # Auch 'name' prüfen (Fallback)
                     if 'name' in role_item and isinstance(role_item['name'], str):
                         role_name = role_item['name'].lower().strip()
                         if role_name not in roles:
                             roles.append(role_name)
-                            print(f"   ✓ Rolle (name): {role_item['name']}")
+                            logger.debug(f"Rolle (name): {role_item['name']}")
                     # Auch 'id' als String prüfen (z.B. ROLE_SCHOOL_MANAGEMENT)
                     if 'id' in role_item and isinstance(role_item['id'], str):
                         role_id = role_item['id'].lower().strip()
                         roles.append(role_id)
-                        print(f"   ✓ Rolle (id): {role_item['id']}")
+                        logger.debug(f"Rolle (id): {role_item['id']}")
                 elif isinstance(role_item, str):
                     roles.append(role_item.lower().strip())
-                    print(f"   ✓ Rolle (String): {role_item}")
+                    logger.debug(f"Rolle (String): {role_item}")
         elif isinstance(roles_data, str):
             roles.append(roles_data.lower().strip())
-            print(f"   ✓ Rolle (einzelner String): {roles_data}")
+            logger.debug(f"Rolle (einzelner String): {roles_data}")
     else:
-        print(f"   ⚠️ Kein 'roles' Feld in userinfo gefunden")
+        logger.debug("Kein 'roles' Feld in userinfo gefunden")
     
     return list(set(r for r in roles if r))
 
@@ -141,7 +177,7 @@ def extract_groups_from_userinfo(userinfo):
     
     if 'groups' in userinfo:
         groups_data = userinfo['groups']
-        print(f"   📋 Raw 'groups' data: {groups_data}")
+        logger.debug(f"Raw 'groups' data: {groups_data}")
         
         # IServ sendet groups als Dictionary mit IDs als Keys!
         if isinstance(groups_data, dict):
@@ -150,34 +186,34 @@ def extract_groups_from_userinfo(userinfo):
                     # Extrahiere name
                     if 'name' in group_item and isinstance(group_item['name'], str):
                         groups.append(group_item['name'].lower().strip())
-                        print(f"   ✓ Gruppe (name): {group_item['name']}")
+                        logger.debug(f"Gruppe (name): {group_item['name']}")
                     # Extrahiere act (z.B. "schulleitung")
                     if 'act' in group_item and isinstance(group_item['act'], str):
                         act_value = group_item['act'].lower().strip()
                         if act_value not in groups:
                             groups.append(act_value)
-                            print(f"   ✓ Gruppe (act): {group_item['act']}")
+                            logger.debug(f"Gruppe (act): {group_item['act']}")
                 elif isinstance(group_item, str):
                     groups.append(group_item.lower().strip())
-                    print(f"   ✓ Gruppe (String value): {group_item}")
+                    logger.debug(f"Gruppe (String value): {group_item}")
         elif isinstance(groups_data, list):
             # Fallback für Listen-Format
             for group_item in groups_data:
                 if isinstance(group_item, dict):
                     if 'name' in group_item and isinstance(group_item['name'], str):
                         groups.append(group_item['name'].lower().strip())
-                        print(f"   ✓ Gruppe (name): {group_item['name']}")
+                        logger.debug(f"Gruppe (name): {group_item['name']}")
                     if 'act' in group_item and isinstance(group_item['act'], str):
                         groups.append(group_item['act'].lower().strip())
-                        print(f"   ✓ Gruppe (act): {group_item['act']}")
+                        logger.debug(f"Gruppe (act): {group_item['act']}")
                 elif isinstance(group_item, str):
                     groups.append(group_item.lower().strip())
-                    print(f"   ✓ Gruppe (String): {group_item}")
+                    logger.debug(f"Gruppe (String): {group_item}")
         elif isinstance(groups_data, str):
             groups.append(groups_data.lower().strip())
-            print(f"   ✓ Gruppe (einzelner String): {groups_data}")
+            logger.debug(f"Gruppe (einzelner String): {groups_data}")
     else:
-        print(f"   ⚠️ Kein 'groups' Feld in userinfo gefunden")
+        logger.debug("Kein 'groups' Feld in userinfo gefunden")
     
     return list(set(g for g in groups if g))
 
@@ -203,22 +239,15 @@ def determine_user_role(userinfo):
     """
     email = userinfo.get('email', '').lower().strip()
 
-    # === AUSFÜHRLICHES LOGGING ===
-    print("=" * 70)
-    print(f"🔐 IServ OAuth Login-Versuch")
-    print(f"   E-Mail: {email}")
-    print(f"   UserInfo Keys: {list(userinfo.keys())}")
-    print("-" * 70)
-    
-    # Logge die komplette userinfo für Debugging
-    print(f"   📋 Komplette UserInfo:")
-    for key, value in userinfo.items():
-        value_str = str(value)
-        if len(value_str) > 300:
-            value_str = value_str[:300] + "..."
-        print(f"      {key}: {value_str}")
-    
-    print("-" * 70)
+    # Komplette UserInfo nur für die Fehlersuche (LOG_LEVELS=oauth_config=DEBUG)
+    if logger.isEnabledFor(logging.DEBUG):
+        userinfo_dump = {}
+        for key, value in userinfo.items():
+            value_str = str(value)
+            if len(value_str) > 300:
+                value_str = value_str[:300] + "..."
+            userinfo_dump[key] = value_str
+        logger.debug("IServ OAuth Login-Versuch", extra={'email': email, 'userinfo': userinfo_dump})
     
     # Extrahiere Rollen UND Gruppen
     roles = extract_roles_from_userinfo(userinfo)
@@ -226,21 +255,16 @@ def determine_user_role(userinfo):
     
     # Kombiniere Rollen und Gruppen für die Prüfung
     all_memberships = roles + groups
-    
-    print("-" * 70)
-    print(f"   🏷️ Extrahierte Rollen: {roles}")
-    print(f"   👥 Extrahierte Gruppen: {groups}")
-    print(f"   📊 Kombinierte Mitgliedschaften: {all_memberships}")
-    print("=" * 70)
+    logger.debug("IServ Mitgliedschaften", extra={'email': email, 'roles': roles, 'groups': groups})
 
     # 1. Admin-E-Mail hat immer Admin-Zugang
     if is_admin_email(email):
-        print(f"   ✅ Admin erkannt (E-Mail-Match: {get_admin_email()})")
+        logger.info("Admin erkannt (E-Mail-Match)", extra={'email': email})
         return 'admin', 'Administrator'
 
     # Prüfe E-Mail-Domain
     if not email.endswith('@kgs-pattensen.de'):
-        print(f"   ❌ KEIN ZUGANG - Keine @kgs-pattensen.de E-Mail")
+        logger.warning("Kein Zugang - keine @kgs-pattensen.de E-Mail", extra={'email': email})
         return None, None
 
     # 2. Prüfe auf erlaubte Rollen/Gruppen
@@ -293,7 +317,8 @@ def determine_user_role(userinfo):
             if allowed in membership:
                 # Formatiere für Anzeige
                 display_role = membership.replace('_', ' ').title()
-                print(f"   ✅ Zugang gewährt - Rolle/Gruppe erkannt: '{membership}' (matched '{allowed}')")
+                logger.info(f"Zugang gewährt - Rolle/Gruppe erkannt: '{membership}' (matched '{allowed}')",
+                            extra={'email': email})
                 return 'teacher', display_role
     
     # 3. Nur wenn KEINE erlaubte Rolle gefunden wurde, prüfe auf Schüler-Blockierung
@@ -312,21 +337,21 @@ def determine_user_role(userinfo):
         for blocked in blocked_keywords:
             if blocked in membership:
                 is_student_only = True
-                print(f"   ⚠️ Schüler-Rolle/Gruppe erkannt: '{membership}'")
+                logger.debug(f"Schüler-Rolle/Gruppe erkannt: '{membership}'")
                 break
     
     if is_student_only:
-        print(f"   ❌ KEIN ZUGANG - Nur Schüler-Rolle gefunden, keine Lehrer/Mitarbeiter-Rolle")
+        logger.warning("Kein Zugang - nur Schüler-Rolle gefunden, keine Lehrer/Mitarbeiter-Rolle",
+                       extra={'email': email})
         return None, None
     
     # Keine passende Rolle/Gruppe gefunden
     if all_memberships:
-        print(f"   ❌ KEIN ZUGANG - Keine erlaubte Rolle/Gruppe gefunden")
-        print(f"   ℹ️ Gefundene Mitgliedschaften: {all_memberships}")
-        print(f"   ℹ️ Erlaubte Keywords: {allowed_keywords}")
+        logger.warning("Kein Zugang - keine erlaubte Rolle/Gruppe gefunden",
+                       extra={'email': email, 'memberships': all_memberships})
     else:
-        print(f"   ❌ KEIN ZUGANG - Keine Rollen/Gruppen in userinfo gefunden")
-        print(f"   ⚠️ HINWEIS: Stellen Sie sicher, dass in IServ Admin → Single-Sign-On")
-        print(f"      die Scopes 'roles' und/oder 'groups' für diese App aktiviert sind!")
+        logger.warning("Kein Zugang - keine Rollen/Gruppen in userinfo. In IServ unter Admin → "
+                       "Single-Sign-On die Scopes 'roles' und/oder 'groups' für diese App aktivieren",
+                       extra={'email': email})
     
     return None, None
@@ -0,0 +1,101 @@
+# Zeitlogik für Schulstunden (Vergangenheit, Vorlaufzeit, Änderungsfrist)
+#
+# PERIOD_TIMES wird beim Import einmal in time-Objekte umgewandelt. Die
+# Startzeitpunkte aller Stunden eines Tages werden pro Datum einmal als
+# UTC-Timestamp berechnet (zoneinfo, inkl. Sommer-/Winterzeit) und gecacht.
+# Eine PeriodClock hält "jetzt" fest, sodass jede Prüfung danach nur noch
+# ein Zahlenvergleich ist.
+
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from config import PERIOD_TIMES, BOOKING_ADVANCE_MINUTES
+
+BERLIN_TZ = ZoneInfo('Europe/Berlin')
+
+# Eigene Buchungen können bis 1 Stunde vor Stundenbeginn geändert werden
+MODIFY_CUTOFF = timedelta(hours=1)
+
+
+def _parse_time(value):
+    """Wandelt 'HH:MM' in ein time-Objekt um"""
+    hour, minute = map(int, value.split(':'))
+    return time(hour, minute)
+
+
+PERIOD_START_TIMES = {period: _parse_time(times['start']) for period, times in PERIOD_TIMES.items()}
+PERIOD_END_TIMES = {period: _parse_time(times['end']) for period, times in PERIOD_TIMES.items()}
+PERIODS = tuple(sorted(PERIOD_START_TIMES))
+
+
+@lru_cache(maxsize=1024)
+def period_start_timestamps(day):
+    """
+    Startzeitpunkte aller Stunden eines Tages als POSIX-Timestamps.
+
+    Returns:
+        Dict period → Timestamp (Sekunden, UTC)
+    """
+    return {
+        period: datetime.combine(day, start, tzinfo=BERLIN_TZ).timestamp()
+        for period, start in PERIOD_START_TIMES.items()
+    }
+
+
+class PeriodClock:
+    """Beantwortet Zeitfragen zu Schulstunden relativ zu einem festen Zeitpunkt"""
+
+    def __init__(self, now=None):
+        if now is None:
+            now = datetime.now(BERLIN_TZ)
+        elif now.tzinfo is None:
+            now = now.replace(tzinfo=BERLIN_TZ)
+        self.now = now.astimezone(BERLIN_TZ)
+        self.today = self.now.date()
+        self.timestamp = self.now.timestamp()
+        self.booking_deadline = self.timestamp + BOOKING_ADVANCE_MINUTES * 60
+        self.modify_deadline = self.timestamp + MODIFY_CUTOFF.total_seconds()
+
+    def is_past(self, day, period=None):
+        """Liegt der Tag (bzw. der Beginn der Stunde) in der Vergangenheit?"""
+        if period is None:
+            return day < self.today
+        return period_start_timestamps(day)[period] < self.timestamp
+
+    def can_book(self, day, period):
+        """Beginnt die Stunde mindestens BOOKING_ADVANCE_MINUTES nach jetzt?"""
+        return period_start_timestamps(day)[period] >= self.booking_deadline
+
+    def can_modify(self, day, period):
+        """
+        Darf eine Buchung noch geändert werden?
+
+        Returns:
+            Tuple (can_modify: bool, reason: str or None)
+        """
+        if day < self.today:
+            return False, "Vergangener Termin"
+        if day == self.today and period_start_timestamps(day)[period] <= self.modify_deadline:
+            return False, "Weniger als 1 Stunde vor Termin"
+        return True, None
+
+    def grid(self, days, periods=PERIODS):
+        """
+        Prüft alle Slots mehrerer Tage in einem Durchlauf.
+
+        Returns:
+            Dict (day, period) → (is_past, can_book, can_modify)
+        """
+        result = {}
+        now_ts = self.timestamp
+        booking_deadline = self.booking_deadline
+        for day in days:
+            starts = period_start_timestamps(day)
+            past_day = day < self.today
+            modify_deadline = self.modify_deadline if day == self.today else None
+            for period in periods:
+                start = starts[period]
+                can_modify = not past_day and (modify_deadline is None or start > modify_deadline)
+                result[day, period] = (start < now_ts, start >= booking_deadline, can_modify)
+        return result
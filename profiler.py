@@ -0,0 +1,346 @@
+# Sampling-Profiler pro Request mit Flamegraph (/admin/profiles)
+#
+# Ein profilierter Request bekommt einen Sampler-Thread, der alle
+# PROFILE_INTERVAL_MS den Stack des Request-Threads abgreift
+# (sys._current_frames). Der Request selbst wird nicht instrumentiert, die
+# Kosten liegen im Sampler (einige µs pro Sample).
+#
+# Ausgelöst wird das Profil
+#   - von Admins mit ?profile=1 oder dem Header X-Profile: 1
+#     (die Antwort enthält X-Profile-Id)
+#   - zufällig für jeden PROFILE_SAMPLE_N-ten Request (im Mittel)
+#
+# Gespeichert wird im Collapsed-Stack-Format ("a;b;c 12"), das auch
+# flamegraph.pl und speedscope lesen, als JSON-Datei pro Profil in PROFILE_DIR.
+# Alle Worker schreiben in dasselbe Verzeichnis; es bleiben nur die neuesten
+# PROFILE_KEEP Profile erhalten.
+#
+# Umgebungsvariablen:
+#   PROFILE_SAMPLE_N=0          Zufallsprofil für 1 von N Requests, 0 = aus
+#   PROFILE_INTERVAL_MS=5       Abstand der Samples
+#   PROFILE_MAX_SECONDS=30      Längere Requests werden nur bis hier profiliert
+#   PROFILE_KEEP=50             Anzahl gespeicherter Profile
+#   PROFILE_DIR=<tmp>/sportoase-profiles
+
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from flask import g, request, session
+from markupsafe import escape
+
+from server_profile import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_MS = 5
+DEFAULT_MAX_SECONDS = 30
+DEFAULT_KEEP = 50
+MAX_STACK_DEPTH = 128
+# Mehr gleichzeitige Profile pro Worker werden bei Zufallsauswahl übersprungen
+MAX_CONCURRENT = 2
+# Eigene Seiten und Dateien nicht zufällig profilieren
+SKIP_ENDPOINTS = {'static', 'metrics_endpoint', 'admin_profiles', 'admin_profile', 'admin_profile_collapsed'}
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$')
+
+FRAME_HEIGHT = 16
+FLAMEGRAPH_WIDTH = 1200
+MIN_FRAME_WIDTH = 0.5
+
+_state = {'sample_n': 0, 'interval': DEFAULT_INTERVAL_MS / 1000, 'max_seconds': DEFAULT_MAX_SECONDS,
+          'keep': DEFAULT_KEEP, 'active': 0}
+_active_lock = threading.Lock()
+_label_cache = {}  # Code-Objekt → Name im Flamegraph
+
+
+def _thread_api():
+    """start_new_thread, allocate_lock, get_ident und sleep als echte OS-Thread-Funktionen
+
+    Unter gevent sind threading und time gepatcht; ein Greenlet als Sampler
+    käme nur zum Zug, wenn der Request ohnehin wartet.
+    """
+    import _thread
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            return (monkey.get_original('_thread', 'start_new_thread'),
+                    monkey.get_original('_thread', 'allocate_lock'),
+                    monkey.get_original('_thread', 'get_ident'),
+                    monkey.get_original('time', 'sleep'))
+    except ImportError:
+        pass
+    return _thread.start_new_thread, _thread.allocate_lock, _thread.get_ident, time.sleep
+
+
+def profile_dir():
+    return (os.environ.get('PROFILE_DIR', '').strip()
+            or os.path.join(tempfile.gettempdir(), 'sportoase-profiles'))
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    label = _label_cache.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.endswith('.html'):
+            # Kompilierte Jinja-Templates: root, block_content, ...
+            label = f"{os.path.basename(filename)}:{code.co_name}"
+        else:
+            module = frame.f_globals.get('__name__') or os.path.basename(filename)
+            label = f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+        label = label.replace(';', ':')
+        _label_cache[code] = label
+    return label
+
+
+def _stack_key(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+class Sampler:
+    """Sammelt Stacks eines Threads, bis stop() aufgerufen wird"""
+
+    def __init__(self, thread_id, interval, max_seconds):
+        start_new_thread, allocate_lock, _, sleep = _thread_api()
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = {}
+        self.samples = 0
+        self.started = time.perf_counter()
+        self._sleep = sleep
+        self._lock = allocate_lock()
+        self._running = True
+        start_new_thread(self._run, ())
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while self._running and time.monotonic() < deadline:
+            self._sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            key = _stack_key(frame)
+            with self._lock:
+                if not self._running:
+                    break
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+            del frame
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            return dict(self.stacks)
+
+
+def _should_profile():
+    """
+    'admin', 'sample' oder None. Bei 'admin'/'sample' ist das Profil bereits
+    in _state['active'] gezählt (Prüfung und Zählen unter einem Lock, sonst
+    kommen gleichzeitige Requests alle an MAX_CONCURRENT vorbei).
+    Angeforderte Admin-Profile zählen mit, werden aber nie übersprungen.
+    """
+    if request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1':
+        if session.get('user_role') == 'admin':
+            with _active_lock:
+                _state['active'] += 1
+            return 'admin'
+    sample_n = _state['sample_n']
+    if sample_n > 0 and request.endpoint not in SKIP_ENDPOINTS and random.randrange(sample_n) == 0:
+        with _active_lock:
+            if _state['active'] < MAX_CONCURRENT:
+                _state['active'] += 1
+                return 'sample'
+    return None
+
+
+def _new_profile_id():
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+
+
+def _save(profile):
+    """Schreibt ein Profil und löscht die ältesten über PROFILE_KEEP"""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{profile['id']}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    for name in names[:max(0, len(names) - _state['keep'])]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass  # anderer Worker war schneller
+
+
+def list_profiles():
+    """Metadaten aller gespeicherten Profile, neueste zuerst"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profile.pop('stacks', None)
+        profiles.append(profile)
+    return profiles
+
+
+def load_profile(profile_id):
+    """Profil mit Stacks oder None (auch bei ungültiger ID)"""
+    if not PROFILE_ID_PATTERN.match(profile_id or ''):
+        return None
+    try:
+        with open(os.path.join(profile_dir(), f"{profile_id}.json"), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_profiles():
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def collapsed_text(stacks):
+    """Collapsed-Stack-Format für flamegraph.pl / speedscope"""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def _frame_color(name):
+    h = zlib.crc32(name.encode('utf-8'))
+    if ':' in name and name.split(':', 1)[0].endswith('.html'):
+        return f"hsl({90 + h % 40}, 45%, {55 + h % 15}%)"  # Templates grün
+    return f"hsl({h % 50}, {70 + h % 20}%, {55 + (h >> 8) % 15}%)"
+
+
+def render_flamegraph(stacks, width=FLAMEGRAPH_WIDTH):
+    """Flamegraph als SVG (Wurzel unten, Breite = Anteil der Samples)"""
+    root = {'name': 'all', 'value': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['value'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'name': name, 'value': 0, 'children': {}})
+            node['value'] += count
+    total = root['value'] or 1
+    scale = width / total
+
+    frames = []  # (x, Tiefe, Knoten)
+    pending = [(root, 0.0, 0)]
+    while pending:
+        node, x, depth = pending.pop()
+        frames.append((x, depth, node))
+        child_x = x
+        for child in sorted(node['children'].values(), key=lambda c: c['name']):
+            if child['value'] * scale >= MIN_FRAME_WIDTH:
+                pending.append((child, child_x, depth + 1))
+            child_x += child['value'] * scale
+
+    height = (max(depth for _, depth, _ in frames) + 1) * FRAME_HEIGHT
+    parts = [f'<svg class="flamegraph" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+             f'width="100%" font-family="monospace" font-size="11">']
+    for x, depth, node in frames:
+        frame_width = node['value'] * scale
+        y = height - (depth + 1) * FRAME_HEIGHT
+        name = node['name']
+        share = node['value'] / total
+        parts.append(f'<g><title>{escape(name)} ({node["value"]} Samples, {share:.1%})</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{frame_width:.1f}" height="{FRAME_HEIGHT - 1}" '
+                     f'rx="2" fill="{_frame_color(name)}"/>')
+        max_chars = int((frame_width - 6) / 7)
+        if max_chars >= 3:
+            text = name if len(name) <= max_chars else name[:max_chars - 2] + '..'
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + 11}">{escape(text)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def init_profiler(app):
+    """Registriert die Request-Hooks für den Sampling-Profiler"""
+    _state['sample_n'] = max(0, env_int('PROFILE_SAMPLE_N', 0))
+    _state['interval'] = max(1, env_int('PROFILE_INTERVAL_MS', DEFAULT_INTERVAL_MS)) / 1000
+    _state['max_seconds'] = max(1, env_int('PROFILE_MAX_SECONDS', DEFAULT_MAX_SECONDS))
+    _state['keep'] = max(1, env_int('PROFILE_KEEP', DEFAULT_KEEP))
+    get_ident = _thread_api()[2]
+
+    @app.before_request
+    def profiler_start_request():
+        trigger = _should_profile()
+        if trigger is None:
+            return
+        g.profile = {'id': _new_profile_id(), 'trigger': trigger,
+                     'sampler': Sampler(get_ident(), _state['interval'], _state['max_seconds'])}
+
+    @app.after_request
+    def profiler_add_header(response):
+        profile = g.get('profile')
+        if profile is not None:
+            profile['status'] = response.status_code
+            if profile['trigger'] == 'admin':
+                response.headers['X-Profile-Id'] = profile['id']
+        return response
+
+    @app.teardown_request
+    def profiler_finish_request(exc):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        with _active_lock:
+            _state['active'] -= 1
+        sampler = profile['sampler']
+        stacks = sampler.stop()
+        duration_ms = (time.perf_counter() - sampler.started) * 1000
+        try:
+            _save({
+                'id': profile['id'],
+                'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'route': request.endpoint or request.path,
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'status': profile.get('status', 500),
+                'trigger': profile['trigger'],
+                'duration_ms': round(duration_ms, 1),
+                'interval_ms': round(sampler.interval * 1000, 1),
+                'samples': sampler.samples,
+                'pid': os.getpid(),
+                'stacks': stacks,
+            })
+        except OSError as e:
+            logger.warning(f"Profil {profile['id']} nicht gespeichert: {e}")
+
+    if _state['sample_n']:
+        logger.info(f"Zufallsprofile aktiv: 1 von {_state['sample_n']} Requests")
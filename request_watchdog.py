@@ -0,0 +1,178 @@
+# Watchdog für hängende Requests
+#
+# Gunicorn beendet einen Worker nach `timeout` (120 s) kommentarlos. Damit
+# vorher klar ist, woran ein Request hängt (Resend, OAuth-Token-Austausch,
+# DB-Lock), prüft ein Thread pro Worker jede Sekunde alle laufenden Requests.
+# Überschreitet einer WATCHDOG_SECONDS, wird geloggt:
+#   - Route, Methode, Pfad und bisherige Dauer
+#   - das gerade laufende SQL-Statement (ohne Parameter) und seit wann
+#   - der komplette Python-Stack des Request-Threads
+# und sportoase_slow_requests_total gezählt. Hängt der Request weiter, folgt
+# jeweils nach doppelter Dauer (5 s, 10 s, 20 s, ...) ein weiterer Stack.
+#
+# Umgebungsvariablen:
+#   WATCHDOG_SECONDS=5      Schwelle, 0 = Watchdog aus
+
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from server_profile import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_SECONDS = 5
+CHECK_INTERVAL = 1.0
+MAX_STATEMENT_LENGTH = 2000
+
+_lock = threading.Lock()
+_state = {'pid': None, 'threshold': 0, 'requests': {}}
+
+# Eintrag des laufenden Requests (pro Thread bzw. Greenlet)
+_current = contextvars.ContextVar('watchdog_request', default=None)
+
+
+def _request_frame(entry):
+    """Aktueller Frame des Requests (Thread oder wartendes Greenlet)"""
+    greenlet = entry['greenlet']
+    if greenlet is not None and getattr(greenlet, 'gr_frame', None) is not None:
+        return greenlet.gr_frame
+    return sys._current_frames().get(entry['thread'])
+
+
+def _report(entry, elapsed):
+    frame = _request_frame(entry)
+    stack = ''.join(traceback.format_stack(frame)) if frame is not None else None
+    del frame
+    sql = entry['sql']
+    sql_elapsed = time.monotonic() - entry['sql_started'] if sql else None
+    logger.warning(
+        f"Request läuft seit {elapsed:.1f} s: {entry['method']} {entry['path']}"
+        + (f" - SQL seit {sql_elapsed:.1f} s" if sql else ""),
+        extra={
+            'route': entry['route'],
+            'path': entry['path'],
+            'elapsed_s': round(elapsed, 1),
+            'sql': sql[:MAX_STATEMENT_LENGTH] if sql else None,
+            'sql_elapsed_s': round(sql_elapsed, 1) if sql else None,
+            'stack': stack,
+        },
+    )
+
+
+def _watch(sleep):
+    from metrics import inc_counter
+    while True:
+        sleep(CHECK_INTERVAL)
+        now = time.monotonic()
+        with _lock:
+            entries = list(_state['requests'].values())
+        for entry in entries:
+            elapsed = now - entry['started']
+            if elapsed < entry['next_report']:
+                continue
+            if entry['reports'] == 0:
+                inc_counter('sportoase_slow_requests_total', endpoint=entry['route'])
+            entry['reports'] += 1
+            entry['next_report'] = elapsed * 2
+            try:
+                _report(entry, elapsed)
+            except Exception as e:
+                # Der Watchdog darf nicht sterben, nur weil ein Stack nicht lesbar war
+                logger.error(f"Watchdog-Report fehlgeschlagen: {e}")
+
+
+def _ensure_thread():
+    """Startet den Watchdog-Thread einmal pro Prozess (nach fork() neu)"""
+    if _state['pid'] == os.getpid():
+        return
+    with _lock:
+        if _state['pid'] == os.getpid():
+            return
+        _state['pid'] = os.getpid()
+        _state['requests'] = {}
+    from profiler import _thread_api
+    start_new_thread, _, _, sleep = _thread_api()
+    start_new_thread(_watch, (sleep,))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    entry = _current.get()
+    if entry is not None:
+        entry['sql_started'] = time.monotonic()
+        entry['sql'] = statement
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    entry = _current.get()
+    if entry is not None:
+        entry['sql'] = None
+
+
+def _handle_error(exception_context):
+    entry = _current.get()
+    if entry is not None:
+        entry['sql'] = None
+
+
+def init_watchdog(app):
+    """Registriert Request- und SQL-Hooks, wenn WATCHDOG_SECONDS > 0"""
+    threshold = env_int('WATCHDOG_SECONDS', DEFAULT_THRESHOLD_SECONDS)
+    if threshold <= 0:
+        return
+    _state['threshold'] = threshold
+    from profiler import _thread_api
+    get_ident = _thread_api()[2]
+    getcurrent = None
+    if 'gevent' in sys.modules:
+        # Unter gevent teilen sich alle Requests einen Thread, der Stack
+        # steckt im wartenden Greenlet
+        from gevent import getcurrent
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def watchdog_start_request():
+        _ensure_thread()
+        greenlet = getcurrent() if getcurrent is not None else None
+        entry = {
+            # Wie metrics._endpoint(): unbekannte URLs unter einem Namen, damit
+            # Scanner-Pfade keine neuen Prometheus-Serien erzeugen; der Pfad
+            # steht nur im Log
+            'route': request.endpoint or 'unmatched',
+            'method': request.method,
+            'path': request.path,
+            'started': time.monotonic(),
+            'thread': get_ident(),
+            'greenlet': greenlet,
+            'sql': None,
+            'sql_started': None,
+            'next_report': _state['threshold'],
+            'reports': 0,
+        }
+        _current.set(entry)
+        with _lock:
+            _state['requests'][id(entry)] = entry
+
+    @app.teardown_request
+    def watchdog_finish_request(exc):
+        entry = _current.get()
+        if entry is None:
+            return
+        _current.set(None)
+        with _lock:
+            _state['requests'].pop(id(entry), None)
+        if entry['reports']:
+            logger.warning(f"Langsamer Request beendet nach {time.monotonic() - entry['started']:.1f} s: "
+                           f"{entry['method']} {entry['path']}",
+                           extra={'route': entry['route'], 'path': entry['path']})
@@ -0,0 +1,164 @@
+# Server-Profile für Gunicorn und den SQLAlchemy-Connection-Pool
+# Diese Datei wird sowohl von gunicorn_config.py (Master) als auch von app.py
+# (Worker) gelesen, damit Worker-Modell und Pool-Größe immer zusammenpassen.
+#
+# Auswahl über die Umgebungsvariable SERVER_PROFILE:
+#   sync    - ein Request pro Prozess (bisheriges Verhalten)
+#   gthread - mehrere Threads pro Prozess, blockierende I/O (Resend, OAuth)
+#             hält nur noch einen Thread statt eines ganzen Workers auf
+#   gevent  - Greenlets pro Prozess, psycopg2 wird über psycogreen kooperativ
+
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+SERVER_PROFILES = ('sync', 'gthread', 'gevent')
+DEFAULT_SERVER_PROFILE = 'sync'
+
+# Render Postgres erlaubt nur wenige Verbindungen; Reserve für psql/db_setup lassen
+DEFAULT_DB_MAX_CONNECTIONS = 40
+
+
+def env_int(name, default):
+    """Liest eine Ganzzahl aus der Umgebung, fällt bei Fehlern auf default zurück"""
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"{name}={value!r} ist keine Zahl - verwende {default}")
+        return default
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def env_bool(name, default):
+    """Liest einen Schalter aus der Umgebung (1/true/yes/on bzw. 0/false/no/off, ohne Groß-/Kleinschreibung)"""
+    value = os.environ.get(name, '').strip().lower()
+    if not value:
+        return default
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    logger.warning(f"{name}={value!r} ist kein Ein/Aus-Wert - verwende {'1' if default else '0'}")
+    return default
+
+
+def get_server_profile():
+    """
+    Ermittelt das aktive Server-Profil aus der Umgebung.
+
+    Returns:
+        Dict mit 'name', 'worker_class', 'workers', 'threads',
+        'worker_connections' und 'concurrency' (gleichzeitige Requests pro Worker)
+    """
+    name = os.environ.get('SERVER_PROFILE', DEFAULT_SERVER_PROFILE).strip().lower()
+    if name not in SERVER_PROFILES:
+        logger.warning(f"Unbekanntes SERVER_PROFILE '{name}' - verwende '{DEFAULT_SERVER_PROFILE}'")
+        name = DEFAULT_SERVER_PROFILE
+
+    cpu_count = multiprocessing.cpu_count()
+
+    if name == 'gthread':
+        workers = env_int('WEB_CONCURRENCY', cpu_count + 1)
+        threads = env_int('GUNICORN_THREADS', 8)
+        worker_connections = 1000
+        concurrency = threads
+    elif name == 'gevent':
+        workers = env_int('WEB_CONCURRENCY', cpu_count)
+        threads = 1
+        worker_connections = env_int('GUNICORN_WORKER_CONNECTIONS', 100)
+        concurrency = worker_connections
+    else:
+        workers = env_int('WEB_CONCURRENCY', cpu_count * 2 + 1)
+        threads = 1
+        worker_connections = 1000
+        concurrency = 1
+
+    return {
+        'name': name,
+        'worker_class': name,
+        'workers': max(1, workers),
+        'threads': max(1, threads),
+        'worker_connections': max(1, worker_connections),
+        'concurrency': max(1, concurrency),
+    }
+
+
+def get_pool_options(profile=None):
+    """
+    Leitet die Pool-Größe pro Worker aus dem Worker-Modell ab.
+
+    sync:    1 Request gleichzeitig → 1 Verbindung (+1 Reserve)
+    gthread: 1 Verbindung pro Thread (+2 Reserve)
+    gevent:  Greenlets teilen sich einen kleinen Pool, der Rest wartet
+             bis zu pool_timeout auf eine freie Verbindung
+
+    Die Summe über alle Worker wird durch DB_MAX_CONNECTIONS begrenzt, damit
+    das Verbindungslimit der Postgres-Instanz nie überschritten wird.
+    DB_POOL_SIZE / DB_MAX_OVERFLOW überschreiben die berechneten Werte.
+    """
+    if profile is None:
+        profile = get_server_profile()
+
+    if profile['name'] == 'gthread':
+        pool_size = profile['threads']
+        max_overflow = 2
+    elif profile['name'] == 'gevent':
+        pool_size = min(profile['concurrency'], 10)
+        max_overflow = 5
+    else:
+        pool_size = 1
+        max_overflow = 1
+
+    # Verbindungsbudget gleichmäßig auf die Worker verteilen
+    max_connections = env_int('DB_MAX_CONNECTIONS', DEFAULT_DB_MAX_CONNECTIONS)
+    per_worker = max(1, max_connections // profile['workers'])
+    pool_size = min(pool_size, per_worker)
+    max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+
+    return {
+        'pool_size': env_int('DB_POOL_SIZE', pool_size),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', max_overflow),
+    }
+
+
+def get_engine_options(profile=None):
+    """
+    Baut SQLALCHEMY_ENGINE_OPTIONS für das aktive Profil.
+
+    DB_POOL_MODE:
+      queue     - eigener Pool pro Worker (Standard)
+      pgbouncer - NullPool; PgBouncer (Transaction Pooling) hält die Verbindungen,
+                  jede Checkout-Anfrage öffnet eine kurze Verbindung zu PgBouncer
+    """
+    if get_pool_mode() == 'pgbouncer':
+        from sqlalchemy.pool import NullPool
+        return {
+            'poolclass': NullPool,
+            'pool_pre_ping': False,
+        }
+
+    return {
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 300),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 10),
+        # Pre-Ping kostet einen Roundtrip pro Checkout; abschaltbar, wenn
+        # pool_recycle unter dem Idle-Timeout der Datenbank liegt
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+        **get_pool_options(profile),
+    }
+
+
+def get_pool_mode():
+    """Gibt den aktiven DB_POOL_MODE zurück ('queue' oder 'pgbouncer')"""
+    mode = os.environ.get('DB_POOL_MODE', 'queue').strip().lower()
+    if mode not in ('queue', 'pgbouncer'):
+        logger.warning(f"Unbekannter DB_POOL_MODE '{mode}' - verwende 'queue'")
+        return 'queue'
+    return mode
@@ -0,0 +1,180 @@
+# Slow-Query-Log mit EXPLAIN-Plänen (opt-in)
+#
+# Misst jedes SQL-Statement über die SQLAlchemy-Events before/after_cursor_execute.
+# Statements über SLOW_QUERY_MS landen in einem Ringpuffer dieses Workers
+# (/admin/slow_queries), zusammen mit
+#   - der Form der Parameter (Namen und Typen, keine Werte - Schülernamen!)
+#   - Route und Methode des Requests
+#   - der aufrufenden Funktion im Projekt (z.B. models.get_bookings_for_week)
+#   - bei SELECTs mit Wahrscheinlichkeit SLOW_QUERY_EXPLAIN_RATE einem Plan:
+#     PostgreSQL EXPLAIN (ANALYZE, BUFFERS) in einem Savepoint, SQLite
+#     EXPLAIN QUERY PLAN
+#
+# Umgebungsvariablen:
+#   SLOW_QUERY_MS=<ms>              Schwelle; ohne Wert ist das Log aus
+#   SLOW_QUERY_EXPLAIN_RATE=0.2     Anteil der langsamen SELECTs mit Plan (0-1)
+#   SLOW_QUERY_BUFFER=100           Anzahl gespeicherter Einträge pro Worker
+
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from server_profile import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPLAIN_RATE = 0.2
+DEFAULT_BUFFER_SIZE = 100
+MAX_STATEMENT_LENGTH = 4000
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_lock = threading.Lock()
+_state = {'pid': None, 'threshold': None, 'explain_rate': DEFAULT_EXPLAIN_RATE,
+          'entries': deque(maxlen=DEFAULT_BUFFER_SIZE)}
+
+
+def _env_float(name, default):
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"{name}={value!r} ist keine Zahl - verwende {default}")
+        return default
+
+
+def is_enabled():
+    return _state['threshold'] is not None
+
+
+def _entries():
+    """Ringpuffer dieses Prozesses (nach fork() nicht die Einträge des Masters zeigen)"""
+    if _state['pid'] != os.getpid():
+        _state['entries'] = deque(maxlen=_state['entries'].maxlen)
+        _state['pid'] = os.getpid()
+    return _state['entries']
+
+
+def get_slow_queries():
+    """Einträge dieses Workers, neueste zuerst"""
+    with _lock:
+        return list(reversed(_entries()))
+
+
+def clear_slow_queries():
+    with _lock:
+        _entries().clear()
+
+
+def parameter_shape(parameters, executemany=False):
+    """Namen und Typen der Parameter ohne Werte, z.B. {'date_1': 'str'}"""
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0]) if rows else None
+        return f"{len(rows)} × {first}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+
+def _caller():
+    """Erste Funktion im Projekt (außerhalb dieses Moduls) auf dem Stack"""
+    for frame in reversed(traceback.extract_stack(limit=40)):
+        filename = os.path.abspath(frame.filename)
+        if filename == os.path.abspath(__file__) or not filename.startswith(PROJECT_DIR):
+            continue
+        if os.sep + 'site-packages' + os.sep in filename:
+            continue
+        module = os.path.splitext(os.path.relpath(filename, PROJECT_DIR))[0].replace(os.sep, '.')
+        return f"{module}.{frame.name}:{frame.lineno}"
+    return None
+
+
+def _explain(conn, cursor, statement, parameters):
+    """EXPLAIN für ein SELECT auf derselben DBAPI-Verbindung"""
+    dialect = conn.dialect.name
+    raw = cursor.connection.cursor()
+    try:
+        if dialect == 'postgresql':
+            # ANALYZE führt das SELECT erneut aus; ein Fehler darf die
+            # Transaktion des Requests nicht abbrechen
+            raw.execute('SAVEPOINT slow_query_explain')
+            try:
+                raw.execute('EXPLAIN (ANALYZE, BUFFERS) ' + statement, parameters)
+                plan = '\n'.join(row[0] for row in raw.fetchall())
+            finally:
+                raw.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                raw.execute('RELEASE SAVEPOINT slow_query_explain')
+            return plan
+        if dialect == 'sqlite':
+            raw.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            return '\n'.join(str(row[-1]) for row in raw.fetchall())
+        return None
+    except Exception as e:
+        return f"EXPLAIN fehlgeschlagen: {e}"
+    finally:
+        raw.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('slow_query_start')
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    if elapsed_ms < _state['threshold']:
+        return
+
+    plan = None
+    if (not executemany and statement.lstrip()[:6].upper() == 'SELECT'
+            and random.random() < _state['explain_rate']):
+        plan = _explain(conn, cursor, statement, parameters)
+
+    entry = {
+        'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'duration_ms': round(elapsed_ms, 1),
+        'statement': statement[:MAX_STATEMENT_LENGTH],
+        'parameters': parameter_shape(parameters, executemany),
+        'route': f"{request.method} {request.endpoint or request.path}" if has_request_context() else None,
+        'caller': _caller(),
+        'plan': plan,
+    }
+    with _lock:
+        _entries().append(entry)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get('slow_query_start') if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def init_slow_queries(app):
+    """Registriert die SQL-Hooks, wenn SLOW_QUERY_MS gesetzt ist"""
+    if not os.environ.get('SLOW_QUERY_MS', '').strip():
+        return
+    _state['threshold'] = _env_float('SLOW_QUERY_MS', 100.0)
+    _state['explain_rate'] = min(1.0, max(0.0, _env_float('SLOW_QUERY_EXPLAIN_RATE', DEFAULT_EXPLAIN_RATE)))
+    _state['entries'] = deque(maxlen=max(1, env_int('SLOW_QUERY_BUFFER', DEFAULT_BUFFER_SIZE)))
+    _state['pid'] = os.getpid()
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+    logger.info(f"Slow-Query-Log aktiv: ab {_state['threshold']:g} ms, "
+                f"EXPLAIN für {_state['explain_rate']:.0%} der SELECTs")
@@ -0,0 +1,17 @@
+// Allgemeine Seitenfunktionen (alle Seiten)
+
+function toggleCredits() {
+    var modal = document.getElementById('creditsModal');
+    if (modal.style.display === 'block') {
+        modal.style.display = 'none';
+    } else {
+        modal.style.display = 'block';
+    }
+}
+
+window.onclick = function(event) {
+    var modal = document.getElementById('creditsModal');
+    if (event.target == modal) {
+        modal.style.display = 'none';
+    }
+}
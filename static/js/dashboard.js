@@ -0,0 +1,325 @@
+// Dashboard: Sperr-Modal (Admin), Slot-Klick und Wochenwechsel
+//
+// Konfiguration kommt aus den data-Attributen von #weekGrid.
+
+// Sperr-Modal (Admin)
+function openBlockModal(date, period, slotInfo) {
+    document.getElementById("blockDate").value = date;
+    document.getElementById("blockPeriod").value = period;
+    document.getElementById("blockSlotInfo").textContent =
+        slotInfo + ", " + period + ". Stunde";
+    document.getElementById("blockReason").value = "";
+    document.getElementById("blockModal").style.display = "flex";
+}
+
+function closeBlockModal() {
+    document.getElementById("blockModal").style.display = "none";
+}
+
+// Das Sperr-Modal gibt es nur in der Admin-Ansicht
+var blockModal = document.getElementById("blockModal");
+if (blockModal) {
+    blockModal.addEventListener("click", function (e) {
+        if (e.target === this) {
+            closeBlockModal();
+        }
+    });
+}
+
+// Slot-Klick-Handler (für alle Benutzer, Desktop & Mobile)
+document.addEventListener("DOMContentLoaded", function () {
+    // Klick auf eine buchbare Zelle öffnet die Buchung (Delegation, damit
+    // es auch nach dem Neuzeichnen des Wochenplans funktioniert)
+    document
+        .querySelector(".week-table")
+        .addEventListener("click", function (e) {
+            var cell = e.target.closest(".clickable-slot");
+            // Ignoriere Klicks auf Buttons, Formulare und den Buchen-Link selbst
+            if (!cell || e.target.closest("button, form, a")) {
+                return;
+            }
+
+            // Finde den Buchen-Link und navigiere dorthin
+            var bookBtn = cell.querySelector(".book-btn");
+            if (bookBtn) {
+                var bookUrl =
+                    bookBtn.getAttribute("href") ||
+                    bookBtn.getAttribute("data-book-url");
+                if (bookUrl) {
+                    window.location.href = bookUrl;
+                }
+            }
+        });
+});
+
+// Wochenwechsel ohne Seiten-Reload: lädt /api/week als JSON und zeichnet die Tabelle neu
+(function () {
+    var grid = document.getElementById("weekGrid");
+    if (!grid || !window.fetch || !window.history.pushState) {
+        return;
+    }
+
+    var WEEK_API_VERSION = 1;
+    var WEEKDAY_NAMES = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag"];
+    var cfg = grid.dataset;
+    var isAdmin = cfg.role === "admin";
+    var cache = {};
+    var shown = { monday: cfg.monday, version: null };
+
+    function el(tag, className, text) {
+        var node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function pageUrl(monday) {
+        return cfg.dashboardUrl + "?date=" + monday;
+    }
+
+    function fetchWeek(monday) {
+        // Der Browser-Cache revalidiert per ETag (Cache-Control: no-cache)
+        return fetch(cfg.apiUrl.replace("__MONDAY__", monday), {
+            credentials: "same-origin",
+            headers: { Accept: "application/json" },
+        })
+            .then(function (response) {
+                if (!response.ok) throw new Error(response.status);
+                return response.json();
+            })
+            .then(function (data) {
+                if (data.v !== WEEK_API_VERSION) throw new Error("version");
+                cache[data.monday] = data;
+                return data;
+            });
+    }
+
+    function prefetch(monday) {
+        if (cache[monday]) return;
+        var run = function () {
+            fetchWeek(monday).catch(function () {});
+        };
+        if (window.requestIdleCallback) window.requestIdleCallback(run);
+        else setTimeout(run, 200);
+    }
+
+    function renderHeader(data) {
+        var row = el("tr");
+        row.appendChild(el("th", null, "Stunde"));
+        data.days.forEach(function (day) {
+            var th = el("th", day.today ? "today-column" : "");
+            var header = el("div", "week-day-header" + (day.today ? " today-header" : ""));
+            header.appendChild(el("div", "day-name", day.name));
+            header.appendChild(el("div", "day-date", day.fmt));
+            th.appendChild(header);
+            row.appendChild(th);
+        });
+        return row;
+    }
+
+    function renderExclusive(td, slot) {
+        var header = el("div", "period-header exclusive-header");
+        var detail = el("div", "slot-detail");
+        detail.appendChild(el("span", "exclusive-star", "⭐"));
+        detail.appendChild(document.createTextNode(" Einzelangebot"));
+        header.appendChild(detail);
+        td.appendChild(header);
+
+        var info = el("div", "exclusive-info");
+        if (slot.exclusive.student) {
+            info.appendChild(
+                el("span", "exclusive-student",
+                    slot.exclusive.student[0] + " (" + slot.exclusive.student[1] + ")")
+            );
+            info.appendChild(el("span", "exclusive-teacher", "von " + slot.exclusive.teacher));
+        } else {
+            info.appendChild(el("span", "exclusive-student", "Reserviert"));
+        }
+        td.appendChild(info);
+    }
+
+    function renderBlocked(td, slot, day, period) {
+        var header = el("div", "period-header blocked-header");
+        header.appendChild(el("div", "slot-detail", slot.blocked));
+        td.appendChild(header);
+        if (!isAdmin) return;
+
+        var actions = el("div", "slot-actions");
+        var form = el("form");
+        form.method = "POST";
+        form.action = cfg.unblockUrl;
+        [["csrf_token", cfg.csrf], ["date", day.date], ["period", period]].forEach(function (field) {
+            var input = el("input");
+            input.type = "hidden";
+            input.name = field[0];
+            input.value = field[1];
+            form.appendChild(input);
+        });
+        var button = el("button", "slot-btn slot-btn-success", "Freigeben");
+        button.type = "submit";
+        form.appendChild(button);
+        actions.appendChild(form);
+        td.appendChild(actions);
+    }
+
+    function renderCard(td, slot, day, period) {
+        var card = el("div", "slot-card " + slot.course[0]);
+        card.appendChild(el("div", "slot-course-name", slot.type === "fest" ? slot.label : "Freie Wahl"));
+
+        if (slot.pending) {
+            var hint = el("div", "pending-exclusive-hint");
+            hint.appendChild(el("span", "pending-icon", "⏳"));
+            hint.appendChild(el("span", "pending-text", "Einzelbuchung angefragt"));
+            card.appendChild(hint);
+        }
+        if (slot.students) {
+            var list = el("div", "slot-students-list");
+            slot.students.forEach(function (student) {
+                list.appendChild(
+                    student
+                        ? el("span", "student-name", student[0] + " (" + student[1] + ")")
+                        : el("span", "student-name blurred", "***")
+                );
+            });
+            card.appendChild(list);
+        }
+
+        var footer = el("div", "slot-footer");
+        var tag = el("span", "course-tag");
+        tag.appendChild(el("span", "tag-icon", slot.course[1]));
+        tag.appendChild(document.createTextNode(" " + slot.course[2]));
+        footer.appendChild(tag);
+        var availability = el("span", "slot-availability");
+        if (slot.book) {
+            availability.appendChild(el("span", "availability-text", slot.count + "/5 gebucht"));
+        } else if (slot.available === 0 && !slot.past) {
+            availability.appendChild(el("span", "full-text", "Ausgebucht (5/5)"));
+        } else {
+            availability.appendChild(el("span", "status-text", slot.count + "/5 gebucht"));
+        }
+        footer.appendChild(availability);
+        card.appendChild(footer);
+
+        if (slot.book) {
+            var link = el("a", "book-btn", "📝 Jetzt buchen");
+            link.href = slot.book;
+            link.setAttribute("data-book-url", slot.book);
+            card.appendChild(link);
+        }
+        if (isAdmin && !slot.past) {
+            var block = el("button", "slot-block-mini", "🔒");
+            block.type = "button";
+            block.title = "Sperren";
+            block.addEventListener("click", function () {
+                openBlockModal(day.date, period, day.name + " " + day.fmt);
+            });
+            card.appendChild(block);
+        }
+        td.appendChild(card);
+    }
+
+    function renderSlot(slot, day, period) {
+        var classes = [];
+        if (day.today) classes.push("today-column");
+        if ("blocked" in slot) classes.push("period-blocked");
+        else if (slot.exclusive) classes.push("period-exclusive");
+        else if (slot.past) classes.push("period-past");
+        else classes.push("period-" + slot.type);
+        if (slot.book) classes.push("clickable-slot");
+
+        var td = el("td", classes.join(" "));
+        if (slot.exclusive) renderExclusive(td, slot);
+        else if ("blocked" in slot) renderBlocked(td, slot, day, period);
+        else renderCard(td, slot, day, period);
+        return td;
+    }
+
+    function render(data) {
+        var table = grid.querySelector(".week-table");
+        var thead = el("thead");
+        thead.appendChild(renderHeader(data));
+        var tbody = el("tbody");
+        for (var period = 1; period <= 6; period++) {
+            var row = el("tr");
+            var label = el("td");
+            label.appendChild(el("strong", null, period + "."));
+            row.appendChild(label);
+            data.days.forEach(function (day) {
+                row.appendChild(renderSlot(day.slots[period - 1], day, period));
+            });
+            tbody.appendChild(row);
+        }
+        table.replaceChild(thead, table.tHead);
+        table.replaceChild(tbody, table.tBodies[0]);
+
+        var title = grid.querySelector(".week-title");
+        title.childNodes.forEach(function (node) {
+            if (node.nodeType === Node.TEXT_NODE && node.textContent.trim()) {
+                node.textContent = " Wochenplan KW " + data.calendar_week + "/" + data.calendar_year + " ";
+            }
+        });
+        title.querySelector(".week-dates").textContent = data.monday_date + " - " + data.friday_date;
+
+        var arrows = grid.querySelectorAll(".week-nav-arrow");
+        arrows[0].href = pageUrl(data.prev);
+        arrows[0].setAttribute("data-week", data.prev);
+        arrows[1].href = pageUrl(data.next);
+        arrows[1].setAttribute("data-week", data.next);
+
+        // Wochenwechsel wählt wie bisher den Montag als Datum
+        document.getElementById("selectedDateLabel").textContent =
+            WEEKDAY_NAMES[0] + ", " + data.monday_date;
+        document.getElementById("date").value = data.monday;
+        var calendarLink = document.getElementById("calendarLink");
+        var parts = data.monday.split("-");
+        calendarLink.href = calendarLink.getAttribute("data-calendar-url") +
+            "/" + parseInt(parts[0], 10) + "/" + parseInt(parts[1], 10);
+
+        shown = { monday: data.monday, version: data.version };
+    }
+
+    function show(data, push) {
+        render(data);
+        if (push) {
+            window.history.pushState({ monday: data.monday }, "", pageUrl(data.monday));
+        }
+        prefetch(data.prev);
+        prefetch(data.next);
+    }
+
+    function go(monday, push) {
+        var cached = cache[monday];
+        if (cached) {
+            show(cached, push);
+        }
+        // Vorab geladene Daten sofort zeigen und im Hintergrund revalidieren
+        fetchWeek(monday)
+            .then(function (data) {
+                if (!cached) show(data, push);
+                else if (shown.monday === monday && shown.version !== data.version) render(data);
+            })
+            .catch(function () {
+                if (!cached) window.location.href = pageUrl(monday);
+            });
+    }
+
+    grid.querySelectorAll(".week-nav-arrow").forEach(function (arrow) {
+        arrow.addEventListener("click", function (e) {
+            var monday = arrow.getAttribute("data-week");
+            if (!monday || e.ctrlKey || e.metaKey || e.shiftKey) return;
+            e.preventDefault();
+            go(monday, true);
+        });
+    });
+
+    window.addEventListener("popstate", function (e) {
+        if (e.state && e.state.monday) go(e.state.monday, false);
+    });
+
+    window.history.replaceState({ monday: cfg.monday }, "", window.location.href);
+    window.addEventListener("load", function () {
+        var arrows = grid.querySelectorAll(".week-nav-arrow");
+        prefetch(arrows[0].getAttribute("data-week"));
+        prefetch(arrows[1].getAttribute("data-week"));
+    });
+})();
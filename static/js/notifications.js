@@ -0,0 +1,149 @@
+// Benachrichtigungen für Admins (Glocke in der Navigation)
+//
+// Wird nur für Admins eingebunden. Das CSRF-Token steht als data-csrf-token
+// am .notification-container.
+
+let notificationSound = null;
+let eventSource = null;
+
+function getCsrfToken() {
+    return document.querySelector('.notification-container').dataset.csrfToken;
+}
+
+function toggleNotifications() {
+    const dropdown = document.getElementById('notificationDropdown');
+    dropdown.style.display = dropdown.style.display === 'block' ? 'none' : 'block';
+}
+
+function updateNotificationBadge(count) {
+    const badge = document.getElementById('notificationBadge');
+    if (count > 0) {
+        badge.textContent = count > 99 ? '99+' : count;
+        badge.style.display = 'inline';
+    } else {
+        badge.style.display = 'none';
+    }
+}
+
+function formatDate(dateString) {
+    const date = new Date(dateString);
+    const now = new Date();
+    const diff = (now - date) / 1000;
+
+    if (diff < 60) return 'Gerade eben';
+    if (diff < 3600) return Math.floor(diff / 60) + ' Min';
+    if (diff < 86400) return Math.floor(diff / 3600) + ' Std';
+    return date.toLocaleDateString('de-DE');
+}
+
+function renderNotification(notification) {
+    const div = document.createElement('div');
+    div.className = 'notification-item' + (notification.is_read ? ' read' : '');
+    div.innerHTML = `
+        <div class="notification-content">
+            <p class="notification-message">${notification.message}</p>
+            <span class="notification-time">${formatDate(notification.created_at)}</span>
+        </div>
+        ${!notification.is_read ? `<button class="mark-read-btn" onclick="markAsRead(${notification.id})">✓</button>` : ''}
+    `;
+    return div;
+}
+
+function loadRecentNotifications() {
+    fetch('/api/notifications/recent?limit=10')
+        .then(response => response.json())
+        .then(data => {
+            const list = document.getElementById('notificationList');
+            if (data.success && data.notifications.length > 0) {
+                list.innerHTML = '';
+                data.notifications.forEach(notif => {
+                    list.appendChild(renderNotification(notif));
+                });
+            } else {
+                list.innerHTML = '<p class="no-notifications">Keine neuen Benachrichtigungen</p>';
+            }
+        })
+        .catch(error => console.error('Fehler beim Laden der Benachrichtigungen:', error));
+}
+
+function updateUnreadCount() {
+    fetch('/api/notifications/unread_count')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                updateNotificationBadge(data.count);
+            }
+        })
+        .catch(error => console.error('Fehler beim Aktualisieren des Zählers:', error));
+}
+
+function markAsRead(notificationId) {
+    fetch(`/api/notifications/${notificationId}/mark_read`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            csrf_token: getCsrfToken()
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            loadRecentNotifications();
+            updateUnreadCount();
+        }
+    })
+    .catch(error => console.error('Fehler beim Markieren:', error));
+}
+
+function markAllAsRead() {
+    fetch('/api/notifications/mark_all_read', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            csrf_token: getCsrfToken()
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            loadRecentNotifications();
+            updateNotificationBadge(0);
+        }
+    })
+    .catch(error => console.error('Fehler beim Markieren aller:', error));
+}
+
+function playNotificationSound() {
+    if (!notificationSound) {
+        notificationSound = new Audio('data:audio/wav;base64,UklGRnoGAABXQVZFZm10IBAAAAABAAEAQAAAAEAAAAAgAEAAAA=');
+    }
+    notificationSound.play().catch(e => console.log('Sound play failed:', e));
+}
+
+// SSE deaktiviert - Polling-basierte Updates stattdessen
+function startPolling() {
+    // Aktualisiere alle 30 Sekunden
+    setInterval(() => {
+        updateUnreadCount();
+        loadRecentNotifications();
+    }, 30000);
+}
+
+document.addEventListener('click', function(event) {
+    const dropdown = document.getElementById('notificationDropdown');
+    const bell = document.querySelector('.notification-bell');
+
+    if (!dropdown.contains(event.target) && !bell.contains(event.target)) {
+        dropdown.style.display = 'none';
+    }
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    updateUnreadCount();
+    loadRecentNotifications();
+    startPolling();
+});
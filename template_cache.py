@@ -0,0 +1,65 @@
+# Jinja-Templates: Bytecode-Cache und Vorkompilieren
+#
+# Jeder Gunicorn-Worker kompiliert Templates sonst beim ersten Aufruf neu
+# (und Worker werden nach max_requests recycelt). Deshalb:
+#   - FileSystemBytecodeCache: kompilierter Code wird in JINJA_CACHE_DIR
+#     abgelegt und von allen Workern (und nach Neustarts) wiederverwendet
+#   - precompile_templates(): lädt alle Templates vorab. Mit preload_app im
+#     Master vor dem ersten fork(), sodass jeder (auch jeder recycelte) Worker
+#     die fertigen Templates erbt; ohne Preload in post_worker_init.
+#
+# Umgebungsvariablen:
+#   JINJA_CACHE_DIR=<pfad>      Verzeichnis für den Bytecode-Cache
+#                               (Standard: Jinja-Verzeichnis im Temp-Ordner)
+#   JINJA_BYTECODE_CACHE=0      Bytecode-Cache abschalten
+#   PRECOMPILE_TEMPLATES=0      Vorkompilieren in gunicorn_config abschalten
+
+import logging
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+from server_profile import env_bool
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html',)
+
+
+def init_template_cache(app):
+    """Aktiviert den dateibasierten Bytecode-Cache für app.jinja_env"""
+    if not env_bool('JINJA_BYTECODE_CACHE', True):
+        return
+    directory = os.environ.get('JINJA_CACHE_DIR', '').strip() or None
+    if directory:
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"JINJA_CACHE_DIR {directory} nicht nutzbar ({e}) - verwende Temp-Verzeichnis")
+            directory = None
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def template_names(app):
+    """Alle HTML-Templates der App (inkl. partials/)"""
+    return sorted(name for name in app.jinja_env.list_templates()
+                  if name.endswith(TEMPLATE_EXTENSIONS))
+
+
+def precompile_templates(app):
+    """
+    Lädt alle Templates in den Template-Cache der Jinja-Umgebung.
+
+    Returns:
+        (Anzahl Templates, Dauer in ms)
+    """
+    started = time.perf_counter()
+    names = template_names(app)
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names), (time.perf_counter() - started) * 1000
+
+
+def should_precompile():
+    return env_bool('PRECOMPILE_TEMPLATES', True)
@@ -0,0 +1,470 @@
+# Tracing: verschachtelte Spans pro Request (SQL, E-Mail, OAuth, Modellfunktionen)
+#
+# Ein Anteil der Requests (TRACE_SAMPLE_RATE, optional nur für TRACE_ROUTES)
+# bekommt einen Trace. Darin entstehen Spans
+#   - automatisch für jedes SQL-Statement (SQLAlchemy-Events, ohne Parameter)
+#   - für ausgehende HTTP-Aufrufe über metrics.track_outbound (Resend,
+#     Replit Connector, IServ OAuth)
+#   - für Funktionen mit @traced() und Blöcke mit `with span(...)`
+# Ohne aktiven Trace kosten span() und @traced() nur einen ContextVar-Zugriff.
+#
+# Fertige Traces schreibt ein Export-Thread pro Worker außerhalb des Requests
+# als JSON-Zeile nach TRACE_FILE (gemeinsam für alle Worker, Grundlage für
+# /admin/traces) und/oder per OTLP/HTTP (JSON) an TRACE_OTLP_ENDPOINT, z.B. einen
+# lokalen OpenTelemetry Collector oder Jaeger (http://localhost:4318/v1/traces).
+#
+# Umgebungsvariablen:
+#   TRACE_SAMPLE_RATE=0             Anteil getracter Requests (0-1), 0 = aus
+#   TRACE_ROUTES=book,dashboard     Nur diese Endpoints tracen (leer = alle)
+#   TRACE_FILE=<tmp>/sportoase-traces.jsonl   leer = keine Datei
+#   TRACE_FILE_MAX_MB=20            Danach wird die Datei nach .1 rotiert
+#   TRACE_OTLP_ENDPOINT=            OTLP/HTTP-URL, leer = kein Export
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from server_profile import env_int
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS_PER_TRACE = 500
+MAX_STATEMENT_LENGTH = 500
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_INTERVAL = 1.0
+# /admin/traces liest höchstens so viel vom Ende der Datei
+VIEWER_READ_BYTES = 5 * 1024 * 1024
+
+# Kategorien für die Aufschlüsselung nach Abhängigkeit
+KIND_DB = 'db'
+KIND_HTTP = 'http'
+KIND_INTERNAL = 'internal'
+
+_state = {'pid': None, 'rate': 0.0, 'routes': None, 'file': None, 'max_bytes': 0,
+          'otlp_endpoint': None, 'queue': None, 'thread': None}
+_start_lock = threading.Lock()
+
+# (Trace, Span) des laufenden Requests
+_current = contextvars.ContextVar('tracing_current', default=None)
+
+
+def is_enabled():
+    return _state['rate'] > 0
+
+
+def trace_file():
+    return _state['file']
+
+
+def _env_rate(name):
+    value = os.environ.get(name, '').strip()
+    try:
+        return min(1.0, max(0.0, float(value))) if value else 0.0
+    except ValueError:
+        logger.warning(f"{name}={value!r} ist keine Zahl - Tracing aus")
+        return 0.0
+
+
+def _new_span(trace, parent, name, kind, attributes):
+    span = {
+        'span_id': secrets.token_hex(8),
+        'parent_id': parent['span_id'] if parent else None,
+        'name': name,
+        'kind': kind,
+        'start': time.perf_counter(),
+        'end': None,
+        'attributes': attributes,
+        'error': None,
+    }
+    if len(trace['spans']) < MAX_SPANS_PER_TRACE:
+        trace['spans'].append(span)
+    else:
+        trace['dropped_spans'] += 1
+    return span
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """Kind-Span des aktuellen Spans; ohne aktiven Trace ein No-op"""
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+    trace, parent = current
+    child = _new_span(trace, parent, name, kind, attributes)
+    token = _current.set((trace, child))
+    try:
+        yield child
+    except Exception as e:
+        child['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child['end'] = time.perf_counter()
+        _current.reset(token)
+
+
+def traced(name=None, kind=KIND_INTERNAL):
+    """Decorator: eigener Span pro Aufruf (Name: modul.funktion)"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ----------------------------------------------------------------------------
+# SQL-Spans
+# ----------------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    if current is None:
+        return
+    trace, parent = current
+    verb = statement.split(None, 1)[0].upper() if statement.strip() else ''
+    db_span = _new_span(trace, parent, f"SQL {verb}".strip(), KIND_DB,
+                        {'db.statement': statement[:MAX_STATEMENT_LENGTH], 'db.system': conn.dialect.name})
+    conn.info.setdefault('tracing_spans', []).append(db_span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('tracing_spans')
+    if spans:
+        spans.pop()['end'] = time.perf_counter()
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get('tracing_spans') if conn is not None else None
+    if spans:
+        db_span = spans.pop()
+        db_span['end'] = time.perf_counter()
+        db_span['error'] = type(exception_context.original_exception).__name__
+
+
+# ----------------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------------
+
+def _finish_trace(trace):
+    """Span-Zeiten relativ zum Start in ms, fertig für Datei und OTLP"""
+    started = trace['started']
+    end = time.perf_counter()
+    spans = []
+    for item in trace['spans']:
+        spans.append({
+            'span_id': item['span_id'],
+            'parent_id': item['parent_id'],
+            'name': item['name'],
+            'kind': item['kind'],
+            'start_ms': round((item['start'] - started) * 1000, 2),
+            'duration_ms': round(((item['end'] or end) - item['start']) * 1000, 2),
+            'attributes': item['attributes'],
+            'error': item['error'],
+        })
+    return {
+        'trace_id': trace['trace_id'],
+        'at': trace['at'],
+        'start_unix_nano': trace['start_unix_nano'],
+        'route': trace['route'],
+        'method': trace['method'],
+        'path': trace['path'],
+        'status': trace['status'],
+        'pid': os.getpid(),
+        'duration_ms': round((end - started) * 1000, 2),
+        'dropped_spans': trace['dropped_spans'],
+        'spans': spans,
+    }
+
+
+def _write_file(traces):
+    path = _state['file']
+    if _state['max_bytes'] and os.path.exists(path) and os.path.getsize(path) > _state['max_bytes']:
+        try:
+            os.replace(path, path + '.1')
+        except OSError:
+            pass  # anderer Worker hat schon rotiert
+    data = ''.join(json.dumps(trace, ensure_ascii=False, default=str) + '\n' for trace in traces)
+    # Ein write() mit O_APPEND pro Stapel, damit sich Worker nicht mitten in Zeilen schreiben
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(traces):
+    """OTLP/JSON (ExportTraceServiceRequest) für einen Stapel Traces"""
+    otlp_spans = []
+    for trace in traces:
+        base = trace['start_unix_nano']
+        for item in trace['spans']:
+            start = base + int(item['start_ms'] * 1e6)
+            attributes = dict(item['attributes'])
+            if item['kind'] in (KIND_DB, KIND_HTTP):
+                kind = 3  # CLIENT
+            elif item['parent_id'] is None:
+                kind = 2  # SERVER
+                attributes.update({'http.method': trace['method'], 'http.route': trace['route'],
+                                   'http.target': trace['path'], 'http.status_code': trace['status']})
+            else:
+                kind = 1  # INTERNAL
+            otlp_span = {
+                'traceId': trace['trace_id'],
+                'spanId': item['span_id'],
+                'name': item['name'],
+                'kind': kind,
+                'startTimeUnixNano': str(start),
+                'endTimeUnixNano': str(start + int(item['duration_ms'] * 1e6)),
+                'attributes': [{'key': key, 'value': _otlp_value(value)}
+                               for key, value in attributes.items() if value is not None],
+                'status': {'code': 2, 'message': item['error']} if item['error'] else {'code': 0},
+            }
+            if item['parent_id']:
+                otlp_span['parentSpanId'] = item['parent_id']
+            otlp_spans.append(otlp_span)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': 'sportoase'}}]},
+        'scopeSpans': [{'scope': {'name': 'sportoase.tracing'}, 'spans': otlp_spans}],
+    }]}
+
+
+def _post_otlp(traces):
+    import urllib.request
+    body = json.dumps(to_otlp(traces), default=str).encode('utf-8')
+    req = urllib.request.Request(_state['otlp_endpoint'], data=body, method='POST',
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=5) as response:
+        response.read()
+
+
+def _export(traces):
+    if _state['file']:
+        try:
+            _write_file(traces)
+        except OSError as e:
+            logger.warning(f"Traces nicht geschrieben: {e}")
+    if _state['otlp_endpoint']:
+        try:
+            _post_otlp(traces)
+        except Exception as e:
+            logger.warning(f"OTLP-Export an {_state['otlp_endpoint']} fehlgeschlagen: {e}")
+
+
+def _export_loop(export_queue):
+    while True:
+        batch = [export_queue.get()]
+        if batch[0] is None:
+            return
+        time.sleep(EXPORT_INTERVAL)  # Traces eines Intervalls zusammen schreiben
+        stop = False
+        while True:
+            try:
+                item = export_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        _export(batch)
+        if stop:
+            return
+
+
+def _export_queue():
+    """Queue und Export-Thread dieses Prozesses (nach fork() neu)"""
+    if _state['pid'] != os.getpid():
+        with _start_lock:
+            if _state['pid'] != os.getpid():
+                export_queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+                thread = threading.Thread(target=_export_loop, args=(export_queue,),
+                                          name='trace-export', daemon=True)
+                thread.start()
+                _state.update(pid=os.getpid(), queue=export_queue, thread=thread)
+    return _state['queue']
+
+
+def shutdown_tracing():
+    """Exportiert wartende Traces (gunicorn worker_exit)"""
+    if _state['pid'] != os.getpid() or _state['queue'] is None:
+        return
+    try:
+        _state['queue'].put_nowait(None)
+    except queue.Full:
+        return
+    _state['thread'].join(timeout=EXPORT_INTERVAL + 5)
+
+
+# ----------------------------------------------------------------------------
+# Viewer (/admin/traces)
+# ----------------------------------------------------------------------------
+
+def _read_traces():
+    path = _state['file']
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - VIEWER_READ_BYTES))
+        data = f.read()
+    lines = data.split(b'\n')
+    if size > VIEWER_READ_BYTES:
+        lines = lines[1:]  # erste Zeile ist abgeschnitten
+    traces = []
+    for line in lines:
+        if line.strip():
+            try:
+                traces.append(json.loads(line))
+            except ValueError:
+                continue
+    return traces
+
+
+def breakdown(trace):
+    """Zeit in ms nach Abhängigkeit: SQL, HTTP (Resend, OAuth, ...) und Rest"""
+    db_ms = sum(s['duration_ms'] for s in trace['spans'] if s['kind'] == KIND_DB)
+    http_ms = sum(s['duration_ms'] for s in trace['spans'] if s['kind'] == KIND_HTTP)
+    return {
+        'total': trace['duration_ms'],
+        'db': db_ms,
+        'db_count': sum(1 for s in trace['spans'] if s['kind'] == KIND_DB),
+        'http': http_ms,
+        'app': max(0.0, trace['duration_ms'] - db_ms - http_ms),
+    }
+
+
+def trace_summary(limit=20):
+    """Langsamste Traces und Mittelwerte pro Route aus TRACE_FILE"""
+    traces = _read_traces()
+    routes = {}
+    for trace in traces:
+        trace['breakdown'] = breakdown(trace)
+        key = (trace['method'], trace['route'])
+        route = routes.setdefault(key, {'method': key[0], 'route': key[1], 'count': 0,
+                                        'total': 0.0, 'db': 0.0, 'db_count': 0, 'http': 0.0, 'app': 0.0})
+        route['count'] += 1
+        for field in ('total', 'db', 'db_count', 'http', 'app'):
+            route[field] += trace['breakdown'][field]
+    for route in routes.values():
+        for field in ('total', 'db', 'db_count', 'http', 'app'):
+            route[field] /= route['count']
+    slowest = sorted(traces, key=lambda t: t['duration_ms'], reverse=True)[:limit]
+    return {
+        'count': len(traces),
+        'routes': sorted(routes.values(), key=lambda r: r['total'], reverse=True),
+        'slowest': slowest,
+    }
+
+
+def find_trace(trace_id):
+    """Trace mit Spans (nach Start sortiert, mit Tiefe) oder None"""
+    for trace in _read_traces():
+        if trace['trace_id'] == trace_id:
+            depth = {}
+            for item in trace['spans']:
+                depth[item['span_id']] = depth.get(item['parent_id'], -1) + 1
+                item['depth'] = depth[item['span_id']]
+            trace['breakdown'] = breakdown(trace)
+            return trace
+    return None
+
+
+# ----------------------------------------------------------------------------
+# Einrichtung
+# ----------------------------------------------------------------------------
+
+def init_tracing(app):
+    """Registriert Request- und SQL-Hooks, wenn TRACE_SAMPLE_RATE > 0"""
+    rate = _env_rate('TRACE_SAMPLE_RATE')
+    if rate <= 0:
+        return
+    routes = {name.strip() for name in os.environ.get('TRACE_ROUTES', '').split(',') if name.strip()}
+    _state.update(
+        rate=rate,
+        routes=routes or None,
+        file=os.environ.get('TRACE_FILE', os.path.join(tempfile.gettempdir(), 'sportoase-traces.jsonl')).strip() or None,
+        max_bytes=max(1, env_int('TRACE_FILE_MAX_MB', 20)) * 1024 * 1024,
+        otlp_endpoint=os.environ.get('TRACE_OTLP_ENDPOINT', '').strip() or None,
+    )
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def tracing_start_request():
+        if _state['routes'] is not None and request.endpoint not in _state['routes']:
+            return
+        if random.random() >= _state['rate']:
+            return
+        trace = {
+            'trace_id': secrets.token_hex(16),
+            'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'start_unix_nano': time.time_ns(),
+            'started': time.perf_counter(),
+            'route': request.endpoint or request.path,
+            'method': request.method,
+            'path': request.path,
+            'status': 500,
+            'spans': [],
+            'dropped_spans': 0,
+        }
+        root = _new_span(trace, None, f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+                         KIND_INTERNAL, {})
+        _current.set((trace, root))
+
+    @app.after_request
+    def tracing_record_status(response):
+        current = _current.get()
+        if current is not None:
+            current[0]['status'] = response.status_code
+        return response
+
+    @app.teardown_request
+    def tracing_finish_request(exc):
+        current = _current.get()
+        if current is None:
+            return
+        _current.set(None)
+        trace, root = current
+        root['end'] = time.perf_counter()
+        if exc is not None:
+            root['error'] = f"{type(exc).__name__}: {exc}"
+        try:
+            _export_queue().put_nowait(_finish_trace(trace))
+        except queue.Full:
+            pass  # Export hängt (z.B. Collector weg) - Request nicht bremsen
+
+    logger.info(f"Tracing aktiv: {rate:.0%} der Requests"
+                + (f" ({', '.join(sorted(routes))})" if routes else ""))
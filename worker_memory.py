@@ -0,0 +1,233 @@
+# Speicher der Gunicorn-Worker: RSS, tracemalloc-Snapshots, Recycling nach RSS
+#
+# Statt Worker alle max_requests Requests neu zu starten (kalte Caches, auch
+# wenn der Speicher stabil ist), prüft jeder Worker alle CHECK_EVERY Requests
+# seine RSS. Liegt sie über WORKER_MAX_RSS_MB, nimmt der Worker keine neuen
+# Requests mehr an, beendet die laufenden und wird vom Master ersetzt
+# (wie bei max_requests über worker.alive = False).
+#
+# /admin/memory zeigt die RSS aller Worker (über /proc, Geschwister-Prozesse
+# desselben Masters). Mit TRACEMALLOC_FRAMES>0 zeichnet tracemalloc
+# Allokationen auf; ein Snapshot vergleicht die Allokationsstellen des
+# antwortenden Workers mit dem vorigen Snapshot bzw. dem Stand beim Start.
+# tracemalloc kostet spürbar CPU und Speicher - nur zur Fehlersuche einschalten.
+#
+# Umgebungsvariablen:
+#   WORKER_MAX_RSS_MB=300       Schwelle für das Recycling, 0 = aus
+#   TRACEMALLOC_FRAMES=0        Frames pro Allokation, 0 = tracemalloc aus
+
+import logging
+import os
+import random
+import sys
+import threading
+import tracemalloc
+from datetime import datetime
+
+from server_profile import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RSS_MB = 300
+# Schwelle pro Worker um bis zu 5 % streuen, damit nicht alle gleichzeitig neu starten
+RSS_LIMIT_JITTER = 0.05
+CHECK_EVERY = 10
+REPORT_LIMIT = 25
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Allokationen von tracemalloc selbst und vom Import-System ausblenden
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+_lock = threading.Lock()
+_state = {'pid': None, 'worker': None, 'limit_mb': 0, 'limit': None, 'requests': 0, 'restarting': False,
+          'started': None, 'baseline': None, 'previous': None, 'latest': None}
+
+
+def _ensure_process():
+    """Nach fork() zählt und vergleicht jeder Worker für sich"""
+    if _state['pid'] != os.getpid():
+        _state.update(pid=os.getpid(), worker=None, limit=None, requests=0, restarting=False,
+                      started=datetime.now(), baseline=None, previous=None, latest=None)
+
+
+def rss_bytes(pid=None):
+    """Aktuelle RSS eines Prozesses (Linux /proc) oder None"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", encoding='ascii') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if pid is None:
+        # Andere Systeme: Spitzenwert statt aktueller RSS (Linux KB, macOS Bytes)
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+    return None
+
+
+def _parent_pid(pid):
+    try:
+        with open(f"/proc/{pid}/stat", encoding='ascii') as f:
+            # Feld 2 (comm) kann Leerzeichen enthalten, daher ab der letzten Klammer
+            return int(f.read().rsplit(')', 1)[1].split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def worker_pids():
+    """PIDs aller Worker desselben Masters (ohne Gunicorn nur dieser Prozess)"""
+    if _state['worker'] is None or not os.path.isdir('/proc'):
+        return [os.getpid()]
+    master = os.getppid()
+    pids = [int(name) for name in os.listdir('/proc')
+            if name.isdigit() and _parent_pid(name) == master]
+    return sorted(pids) or [os.getpid()]
+
+
+def worker_overview():
+    """RSS pro Worker für /admin/memory"""
+    own_pid = os.getpid()
+    workers = []
+    for pid in worker_pids():
+        rss = rss_bytes(None if pid == own_pid else pid)
+        if rss is None:
+            continue  # inzwischen beendet
+        workers.append({'pid': pid, 'rss_mb': rss / 1024 / 1024, 'current': pid == own_pid})
+    return workers
+
+
+def status():
+    """Zustand dieses Workers"""
+    with _lock:
+        _ensure_process()
+        return {
+            'pid': os.getpid(),
+            'limit_mb': _state['limit'] / 1024 / 1024 if _state['limit'] else _state['limit_mb'] or None,
+            'requests': _state['requests'],
+            'started': _state['started'],
+            'managed': _state['worker'] is not None,
+            'tracing': tracemalloc.is_tracing(),
+            'traced_mb': tracemalloc.get_traced_memory()[0] / 1024 / 1024 if tracemalloc.is_tracing() else None,
+            'snapshots': sum(1 for key in ('baseline', 'previous', 'latest') if _state[key] is not None),
+        }
+
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+
+def take_snapshot():
+    """Neuer Snapshot dieses Workers; der bisher neueste wird zum Vergleichsstand"""
+    if not tracemalloc.is_tracing():
+        return False
+    snapshot = _take_snapshot()
+    with _lock:
+        _ensure_process()
+        if _state['baseline'] is None:
+            _state['baseline'] = snapshot
+        _state['previous'] = _state['latest'] or _state['baseline']
+        _state['latest'] = snapshot
+    return True
+
+
+def _short_filename(filename):
+    for marker in (os.sep + 'site-packages' + os.sep, os.sep + 'lib' + os.sep):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    return os.path.relpath(filename) if os.path.isabs(filename) else filename
+
+
+def allocation_report(since='previous', limit=REPORT_LIMIT):
+    """Stellen mit dem größten Zuwachs zwischen zwei Snapshots dieses Workers"""
+    with _lock:
+        _ensure_process()
+        latest = _state['latest']
+        older = _state['baseline'] if since == 'baseline' else _state['previous']
+    if latest is None or older is None or latest is older:
+        return []
+    report = []
+    for stat in latest.compare_to(older, 'traceback')[:limit]:
+        if not stat.size_diff:
+            break  # sortiert nach Zuwachs, der Rest ist unverändert
+        frame = stat.traceback[-1] if len(stat.traceback) else None
+        report.append({
+            'where': f"{_short_filename(frame.filename)}:{frame.lineno}" if frame else '?',
+            'size_diff_kb': stat.size_diff / 1024,
+            'size_kb': stat.size / 1024,
+            'count_diff': stat.count_diff,
+            'traceback': [f"{_short_filename(f.filename)}:{f.lineno}" for f in reversed(stat.traceback)],
+        })
+    return report
+
+
+def register_worker(worker):
+    """Aus gunicorn_config.post_worker_init: Worker für das Recycling merken"""
+    with _lock:
+        _ensure_process()
+        _state['worker'] = worker
+        if _state['limit_mb'] > 0:
+            _state['limit'] = int(_state['limit_mb'] * 1024 * 1024 * (1 + random.uniform(0, RSS_LIMIT_JITTER)))
+    if tracemalloc.is_tracing():
+        # Vergleichsstand vor dem ersten Request
+        snapshot = _take_snapshot()
+        with _lock:
+            _state['baseline'] = snapshot
+
+
+def _log_growth():
+    """Top-Zuwächse seit dem Start in das Log, bevor der Worker endet"""
+    if not tracemalloc.is_tracing() or _state['baseline'] is None:
+        return
+    snapshot = _take_snapshot()
+    with _lock:
+        _state['latest'] = snapshot
+    for entry in allocation_report(since='baseline', limit=5):
+        logger.warning(f"Zuwachs seit Start: {entry['where']} +{entry['size_diff_kb']:.0f} KB "
+                       f"({entry['count_diff']:+d} Objekte)")
+
+
+def check_memory():
+    """Nach jedem Request: alle CHECK_EVERY Requests die RSS mit der Schwelle vergleichen"""
+    with _lock:
+        _ensure_process()
+        _state['requests'] += 1
+        if (_state['requests'] % CHECK_EVERY or _state['limit'] is None
+                or _state['worker'] is None or _state['restarting']):
+            return
+    rss = rss_bytes()
+    if rss is None or rss <= _state['limit']:
+        return
+    with _lock:
+        if _state['restarting']:
+            return
+        _state['restarting'] = True
+    logger.warning(
+        f"Worker {os.getpid()} über Speicherlimit ({rss / 1024 / 1024:.0f} MB > "
+        f"{_state['limit'] / 1024 / 1024:.0f} MB) nach {_state['requests']} Requests - Neustart",
+        extra={'rss_bytes': rss},
+    )
+    _log_growth()
+    from metrics import inc_counter
+    inc_counter('sportoase_worker_memory_restarts_total')
+    # Wie max_requests: laufende Requests beenden, dann ersetzt der Master den Worker
+    _state['worker'].alive = False
+
+
+def init_memory(app):
+    """RSS-Schwelle und optional tracemalloc einrichten"""
+    # Die Schwelle gilt erst mit register_worker (nur unter Gunicorn)
+    _state['limit_mb'] = max(0, env_int('WORKER_MAX_RSS_MB', DEFAULT_MAX_RSS_MB))
+    frames = env_int('TRACEMALLOC_FRAMES', 0)
+    if frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info(f"tracemalloc aktiv ({frames} Frames pro Allokation)")
+
+    @app.teardown_request
+    def memory_check_request(exc):
+        check_memory()